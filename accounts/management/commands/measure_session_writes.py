@@ -0,0 +1,97 @@
+"""
+Count django_session queries per request on the staff desk workflow.
+
+Replays a desk shift with the test client - sign in, cycle through the pages
+a circulation desk uses, sign out - once per session engine, and reports how
+many session reads and writes reach the database. ``--save-every-request``
+replays it with sliding expiry (SESSION_SAVE_EVERY_REQUEST), which a short
+SESSION_COOKIE_AGE needs to keep an active desk signed in. Everything runs
+inside a transaction that is rolled back, and against a private in-memory
+cache, so no users or sessions are left behind and the configured cache (with
+real users' sessions) is never touched.
+"""
+
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import User
+
+DESK_PAGES = [
+    "circulation:staff_dashboard",
+    "circulation:circulation_hub",
+    "circulation:checkout",
+    "circulation:checkin",
+    "circulation:manage_holds",
+    "circulation:manage_checkout_requests",
+    "circulation:borrower_list",
+    "circulation:receive_in_transit",
+]
+
+ENGINES = ["db", "cached_db"]
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Measure django_session reads/writes per request for each session engine."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rounds", type=int, default=5, help="Times to cycle through the desk pages")
+        parser.add_argument(
+            "--save-every-request", action="store_true", help="Replay with sliding expiry (SESSION_SAVE_EVERY_REQUEST)"
+        )
+
+    def handle(self, *args, **options):
+        for engine in ENGINES:
+            try:
+                with transaction.atomic():
+                    reads, writes, requests = self.replay(engine, options["rounds"], options["save_every_request"])
+                    raise Rollback
+            except Rollback:
+                pass
+            self.stdout.write(
+                f"{engine:<10} requests: {requests:<5} session reads: {reads:<4} writes: {writes:<4} "
+                f"reads/request: {reads / requests:.2f}  writes/request: {writes / requests:.2f}"
+            )
+
+    def replay(self, engine, rounds, save_every_request):
+        password = uuid.uuid4().hex
+        staff = User.objects.create_user(username=f"desk-{uuid.uuid4().hex[:8]}", password=password, user_type="staff")
+        counts = {"reads": 0, "writes": 0, "requests": 0}
+
+        def request(method, url, data=None):
+            with CaptureQueriesContext(connection) as queries:
+                getattr(client, method)(url, data)
+            counts["requests"] += 1
+            for query in queries.captured_queries:
+                sql = query["sql"].lstrip().upper()
+                if "DJANGO_SESSION" not in sql:
+                    continue
+                counts["reads" if sql.startswith("SELECT") else "writes"] += 1
+
+        # A fresh, private cache: cached_db starts cold and the shared cache is left alone
+        caches = {
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": f"measure-session-writes-{uuid.uuid4().hex}",
+            }
+        }
+        with override_settings(
+            CACHES=caches,
+            SESSION_ENGINE=f"django.contrib.sessions.backends.{engine}",
+            SESSION_SAVE_EVERY_REQUEST=save_every_request,
+        ):
+            client = Client()
+            request("post", reverse("accounts:login"), {"username": staff.username, "password": password})
+            for _ in range(rounds):
+                for page in DESK_PAGES:
+                    request("get", reverse(page))
+            request("post", reverse("accounts:logout"))
+        return counts["reads"], counts["writes"], counts["requests"]
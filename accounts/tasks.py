@@ -0,0 +1,24 @@
+from celery import shared_task
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.utils import timezone
+
+
+@shared_task
+def purge_expired_sessions():
+    """
+    Delete expired django_session rows in small chunks so the purge never
+    holds a long write lock on the session table
+    Runs hourly
+    """
+    chunk_size = getattr(settings, "SESSION_PURGE_CHUNK_SIZE", 5000)
+    now = timezone.now()
+    deleted = 0
+    while True:
+        keys = list(Session.objects.filter(expire_date__lt=now).values_list("session_key", flat=True)[:chunk_size])
+        if not keys:
+            break
+        Session.objects.filter(session_key__in=keys).delete()
+        deleted += len(keys)
+
+    return f"Purged {deleted} expired sessions"
@@ -3,12 +3,13 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth import login as auth_login
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib import messages
-from django.core.paginator import Paginator
 from django.db.models import Q
 from .forms import BorrowerRegistrationForm, ProfileUpdateForm
 from .decorators import admin_required, staff_or_admin_required
 from circulation.models import Loan, Hold
 from .models import User
+from elibrary.exports import ITERATOR_CHUNK_SIZE, requested_export_format, stream_export
+from elibrary.pagination import listing_count, paginate_request
 
 
 def custom_login(request):
@@ -140,12 +141,29 @@ def manage_users(request):
     if user_type_filter:
         users = users.filter(user_type=user_type_filter)
 
-    paginator = Paginator(users, 25)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    export_format = requested_export_format(request)
+    if export_format:
+        rows = (
+            [
+                user.username,
+                user.last_name,
+                user.first_name,
+                user.email,
+                user.get_user_type_display(),
+                user.library_card_number,
+                "Blocked" if user.is_blocked else "Active",
+                user.date_joined,
+            ]
+            for user in users.iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+        )
+        header = ["Username", "Last Name", "First Name", "Email", "Type", "Library Card", "Status", "Joined"]
+        return stream_export(export_format, "users", header, rows)
+
+    page_obj = paginate_request(request, users, ["-date_joined", "-id"], per_page=25)
 
     context = {
         "page_obj": page_obj,
+        "total_results": listing_count(users),
         "search_query": search_query,
         "user_type_filter": user_type_filter,
     }
@@ -0,0 +1,233 @@
+"""
+Read-only JSON API, version 1, for mobile and kiosk clients.
+
+    /api/v1/publications/   ?type=<code> &subject=<id> &author=<id> &isbn=<isbn>
+    /api/v1/items/          ?publication=<id> &location=<code> &status=<status>
+    /api/v1/authors/  /api/v1/subjects/  /api/v1/locations/
+    /api/v1/<resource>/<id>/
+
+Every endpoint accepts ``?fields=id,title,...`` to trim the representation.
+Lists are keyset-paginated by id (``?limit=``, at most MAX_PAGE_SIZE, and the
+opaque ``next``/``previous`` links); publications and items also take
+``?updated_since=<ISO datetime>``, which orders by (date_updated, id) so a
+client can sync changes page by page.
+
+Representations come from the per-object cache in catalog.serializers.
+Responses carry an ETag and, for publications and items, Last-Modified from
+``date_updated``, with ``Cache-Control: no-cache`` so clients revalidate and get
+a 304 while nothing changed. A publication or item detail request is answered
+with 304 from its ``date_updated`` alone, before anything is serialized.
+"""
+
+import functools
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, HttpResponse, JsonResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date
+from django.views.decorators.http import require_GET
+
+from elibrary.db_router import read_from_replica
+from elibrary.pagination import CURSOR_PARAM, keyset_paginate
+from .isbn import compact_isbn, to_isbn13
+from .serializers import AUTHORS, ITEMS, LOCATIONS, PUBLICATIONS, SUBJECTS
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class APIError(Exception):
+    """A bad request, answered with 400 and the message"""
+
+
+def _selected_fields(request, resource):
+    value = request.GET.get("fields", "")
+    if not value:
+        return None
+    fields = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in fields if name not in resource.fields]
+    if unknown:
+        raise APIError(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(resource.fields)}")
+    return fields
+
+
+def _project(data, fields):
+    return data if fields is None else {name: data[name] for name in fields}
+
+
+def _int_param(request, name):
+    value = request.GET.get(name)
+    if value is None:
+        return None
+    if not value.isdigit():
+        raise APIError(f"{name} must be an integer")
+    return int(value)
+
+
+def _conditional(request, etag, last_modified, build):
+    """304 when the client's copy matches, else the JSON built by ``build()``"""
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = None
+    if etag:
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        body = json.dumps(build(), cls=DjangoJSONEncoder)
+        etag = etag or f'"{hashlib.sha1(body.encode()).hexdigest()}"'
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = HttpResponse(body, content_type="application/json")
+    response["ETag"] = etag
+    if timestamp:
+        response["Last-Modified"] = http_date(timestamp)
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+def _page_link(request, cursor):
+    if not cursor:
+        return None
+    params = request.GET.copy()
+    params[CURSOR_PARAM] = cursor
+    return f"{request.path}?{params.urlencode()}"
+
+
+def _list(request, resource, queryset):
+    fields = _selected_fields(request, resource)
+    limit = min(_int_param(request, "limit") or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+    ordering = ["id"]
+    if resource.timestamped and request.GET.get("updated_since"):
+        since = parse_datetime(request.GET["updated_since"])
+        if since is None:
+            raise APIError("updated_since must be an ISO 8601 datetime")
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        queryset = queryset.filter(date_updated__gte=since)
+        ordering = ["date_updated", "id"]
+
+    page = keyset_paginate(queryset, ordering, request.GET.get(CURSOR_PARAM), per_page=limit)
+    last_modified = max((row.date_updated for row in page), default=None) if resource.timestamped else None
+    return _conditional(
+        request,
+        None,
+        last_modified,
+        lambda: {
+            "results": [_project(data, fields) for data in resource.serialize(page.object_list)],
+            "next": _page_link(request, page.next_cursor),
+            "previous": _page_link(request, page.previous_cursor),
+        },
+    )
+
+
+def _detail(request, resource, pk):
+    fields = _selected_fields(request, resource)
+    row = resource.page_queryset().filter(pk=pk).first()
+    if row is None:
+        raise Http404
+    etag = last_modified = None
+    if resource.timestamped:
+        last_modified = row.date_updated
+        version = f"{resource.cache_key(row)}|{','.join(fields or [])}"
+        etag = f'"{hashlib.sha1(version.encode()).hexdigest()}"'
+
+    def build():
+        results = resource.serialize([row])
+        if not results:
+            raise Http404
+        return _project(results[0], fields)
+
+    return _conditional(request, etag, last_modified, build)
+
+
+def _endpoint(view):
+    """GET only, catalog reads from the replica, APIError answered with 400"""
+
+    @functools.wraps(view)
+    @require_GET
+    @read_from_replica
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except APIError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+    return wrapper
+
+
+@_endpoint
+def publications(request):
+    """Publications, optionally filtered by type code, subject, author or ISBN"""
+    queryset = PUBLICATIONS.page_queryset()
+    if request.GET.get("type"):
+        queryset = queryset.filter(publication_type__code=request.GET["type"])
+    subject = _int_param(request, "subject")
+    if subject is not None:
+        queryset = queryset.filter(subjects=subject)
+    author = _int_param(request, "author")
+    if author is not None:
+        queryset = queryset.filter(authors=author)
+    if request.GET.get("isbn"):
+        isbn13 = to_isbn13(request.GET["isbn"])
+        if isbn13:
+            queryset = queryset.filter(isbn13=isbn13)
+        else:
+            # Malformed ISBNs have no ISBN-13 form; match them as catalogued
+            queryset = queryset.filter(normalized_isbn=compact_isbn(request.GET["isbn"]) or "-")
+    return _list(request, PUBLICATIONS, queryset)
+
+
+@_endpoint
+def publication(request, pk):
+    return _detail(request, PUBLICATIONS, pk)
+
+
+@_endpoint
+def items(request):
+    """Copies, optionally filtered by publication, location code or status"""
+    queryset = ITEMS.page_queryset()
+    publication_id = _int_param(request, "publication")
+    if publication_id is not None:
+        queryset = queryset.filter(publication_id=publication_id)
+    if request.GET.get("location"):
+        queryset = queryset.filter(location__code=request.GET["location"])
+    if request.GET.get("status"):
+        queryset = queryset.filter(status=request.GET["status"])
+    return _list(request, ITEMS, queryset)
+
+
+@_endpoint
+def item(request, pk):
+    return _detail(request, ITEMS, pk)
+
+
+@_endpoint
+def authors(request):
+    return _list(request, AUTHORS, AUTHORS.page_queryset())
+
+
+@_endpoint
+def author(request, pk):
+    return _detail(request, AUTHORS, pk)
+
+
+@_endpoint
+def subjects(request):
+    return _list(request, SUBJECTS, SUBJECTS.page_queryset())
+
+
+@_endpoint
+def subject(request, pk):
+    return _detail(request, SUBJECTS, pk)
+
+
+@_endpoint
+def locations(request):
+    return _list(request, LOCATIONS, LOCATIONS.page_queryset())
+
+
+@_endpoint
+def location(request, pk):
+    return _detail(request, LOCATIONS, pk)
@@ -0,0 +1,136 @@
+"""
+Resumable, chunked backfills for derived columns and denormalized counters.
+
+A ``Backfill`` names a model, the columns it writes and a ``compute`` function
+that receives one chunk of rows (dicts with ``pk``, the source fields and the
+current values) and returns ``{pk: {field: new value}}``. It may run one
+aggregate query for the whole chunk, which is how counters are rebuilt.
+
+``run_backfill`` walks the table in primary-key order. Each chunk is read and
+locked (``select_for_update``) in one query, computed in Python, and only
+changed rows are written with ``bulk_update`` before the lock is released, so
+a concurrent save cannot land between the read and the write and be
+overwritten. Like a ``save()``, the write also bumps ``version`` on
+``VersionedModel`` rows and sets ``date_updated`` where the model has it, so
+desks holding a stale copy get a conflict and incremental exports see the
+change. The checkpoint row is updated in the same short transaction,
+so a crash loses at most one chunk and the next run resumes after the last
+committed primary key. Runs can be throttled to a target rows/second to keep
+load down on a live database, and each chunk reports throughput and an ETA.
+
+Apps declare backfills in a ``backfills.py`` module with ``register()``;
+``python manage.py backfill --list`` shows them.
+"""
+
+import time
+from collections import namedtuple
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .concurrency import VersionedModel, bump_version
+from .models import BackfillCheckpoint
+
+ChunkReport = namedtuple("ChunkReport", ["last_pk", "scanned", "updated", "remaining", "rate", "eta"])
+
+_registry = {}
+
+
+class Backfill:
+    """A set of derived columns recomputed in primary-key chunks"""
+
+    def __init__(self, name, model, fields, compute, source_fields=(), description=""):
+        self.name = name
+        self.model = model
+        self.fields = list(fields)
+        self.compute = compute
+        self.source_fields = list(source_fields)
+        self.description = description
+
+    def get_queryset(self):
+        return self.model._default_manager.all()
+
+    def written_fields(self):
+        """The computed columns plus the bookkeeping columns a save() would update"""
+        fields = list(self.fields)
+        if issubclass(self.model, VersionedModel):
+            fields.append("version")
+        if any(field.name == "date_updated" for field in self.model._meta.concrete_fields):
+            fields.append("date_updated")
+        return fields
+
+
+def register(backfill):
+    _registry[backfill.name] = backfill
+    return backfill
+
+
+def registered_backfills():
+    """All backfills declared in the installed apps' backfills.py modules, by name"""
+    autodiscover_modules("backfills")
+    return dict(sorted(_registry.items()))
+
+
+def _changed_rows(backfill, rows):
+    computed = backfill.compute(rows)
+    bookkeeping = {"version": bump_version(), "date_updated": timezone.now()}
+    extra = {field: bookkeeping[field] for field in backfill.written_fields() if field not in backfill.fields}
+    changed = []
+    for row in rows:
+        values = computed.get(row["pk"])
+        if values and any(row[field] != values[field] for field in backfill.fields):
+            changed.append(backfill.model(pk=row["pk"], **values, **extra))
+    return changed
+
+
+def run_backfill(backfill, chunk_size=1000, rows_per_second=None, restart=False, progress=None):
+    """
+    Run ``backfill`` from its checkpoint to the end of the table.
+
+    A finished backfill, or ``restart=True``, starts again from the first row.
+    ``progress`` is called with a ``ChunkReport`` after each chunk. Returns the
+    checkpoint.
+    """
+    checkpoint, _ = BackfillCheckpoint.objects.get_or_create(name=backfill.name)
+    if restart or checkpoint.completed_date:
+        checkpoint.last_pk = checkpoint.rows_scanned = checkpoint.rows_updated = 0
+        checkpoint.started_date = timezone.now()
+        checkpoint.completed_date = None
+        checkpoint.save()
+
+    queryset = backfill.get_queryset().order_by("pk")
+    remaining = queryset.filter(pk__gt=checkpoint.last_pk).count()
+    columns = ["pk", *backfill.source_fields, *[f for f in backfill.fields if f not in backfill.source_fields]]
+    started = time.monotonic()
+    scanned = 0
+
+    while True:
+        with transaction.atomic():
+            rows = list(queryset.filter(pk__gt=checkpoint.last_pk).select_for_update().values(*columns)[:chunk_size])
+            if not rows:
+                break
+            changed = _changed_rows(backfill, rows)
+
+            checkpoint.last_pk = rows[-1]["pk"]
+            checkpoint.rows_scanned += len(rows)
+            checkpoint.rows_updated += len(changed)
+            checkpoint.updated_date = timezone.now()
+            backfill.model._default_manager.bulk_update(changed, backfill.written_fields())
+            checkpoint.save(update_fields=["last_pk", "rows_scanned", "rows_updated", "updated_date"])
+
+        scanned += len(rows)
+        if rows_per_second:
+            # Sleep off any lead over the target rate
+            time.sleep(max(0, scanned / rows_per_second - (time.monotonic() - started)))
+        if progress:
+            elapsed = time.monotonic() - started
+            rate = scanned / elapsed if elapsed else 0
+            left = max(remaining - scanned, 0)
+            eta = timedelta(seconds=round(left / rate)) if rate else None
+            progress(ChunkReport(checkpoint.last_pk, checkpoint.rows_scanned, checkpoint.rows_updated, left, rate, eta))
+
+    checkpoint.completed_date = timezone.now()
+    checkpoint.save(update_fields=["completed_date"])
+    return checkpoint
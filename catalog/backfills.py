@@ -0,0 +1,24 @@
+"""Backfills for catalog columns (run with ``python manage.py backfill <name>``)"""
+
+from .backfill import Backfill, register
+from .isbn import compact_isbn, to_isbn13
+from .models import Publication
+
+
+def _isbn_keys(rows):
+    return {
+        row["pk"]: {"normalized_isbn": compact_isbn(row["isbn"]), "isbn13": to_isbn13(row["isbn"]) or ""}
+        for row in rows
+    }
+
+
+register(
+    Backfill(
+        "isbn",
+        Publication,
+        ["normalized_isbn", "isbn13"],
+        _isbn_keys,
+        source_fields=["isbn"],
+        description="Publication.normalized_isbn and the canonical isbn13 lookup key",
+    )
+)
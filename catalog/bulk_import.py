@@ -0,0 +1,483 @@
+"""
+Bulk catalog import.
+
+Migrating an existing collection through ``add_publication`` and ``add_items``
+costs several queries per record. ``CatalogImporter`` instead streams records
+from CSV, JSON Lines or MARC21 (one record in memory at a time), validates each
+one, and writes them in chunks:
+
+- publication types and locations must already exist; authors, subjects and
+  publishers are looked up in maps loaded once at the start, and the missing
+  ones are created with one ``bulk_create`` per chunk
+- publications, their author/subject through rows and their items are each
+  written with one ``bulk_create`` per chunk, in one transaction per chunk
+  together with the chunk's new authors, subjects and publishers, so a chunk
+  that fails to save leaves none of them behind
+- a record whose ISBN is already catalogued, or whose barcode is taken, is
+  rejected (checked with one query per chunk), so re-running an import after
+  a failure skips what was already loaded
+
+Rejected records never stop the import; each is reported with its row number
+and reason. With ``dry_run`` nothing is written and the report lists every
+record that would be rejected.
+
+All formats are read into the same row shape. CSV columns (list columns are
+separated by ";")::
+
+    title, subtitle, authors, subjects, publisher, publication_type,
+    publication_date, edition, isbn, language, pages, abstract, summary,
+    call_number, barcodes, location, status, condition, price, acquisition_date
+
+Authors are "Last, First" or "First Last". JSON Lines objects use the same
+keys, where list values may be JSON arrays and ``items`` may be a list of
+objects with ``barcode``, ``location``, ``status``, ``condition``, ``price``
+and ``acquisition_date``. MARC21 records are mapped by ``marc_row``.
+"""
+
+import csv
+import json
+import re
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, transaction
+
+from .cached_pages import CATALOG_SCOPE, invalidate_pages
+from .isbn import compact_isbn, to_isbn13, validate_isbn
+from .marc import MARCError, read_records
+from .models import Author, Item, Location, Publication, PublicationType, Publisher, Subject
+
+FORMATS = ["csv", "jsonl", "marc"]
+LIST_SEPARATOR = ";"
+ITEM_FIELDS = ["barcode", "location", "status", "condition", "price", "acquisition_date"]
+ITEM_STATUSES = {code for code, _ in Item.STATUS_CHOICES}
+
+_YEAR = re.compile(r"(?<!\d)(1[5-9]\d\d|20\d\d)(?!\d)")
+_PAGES = re.compile(r"(\d+)\s*p")
+_DIGITS = re.compile(r"(\d+)")
+
+
+class RowError(ValueError):
+    """A record that cannot be imported"""
+
+
+# Readers: yield (row number, raw row dict or RowError)
+
+
+def read_csv(stream):
+    for number, row in enumerate(csv.DictReader(stream), start=2):
+        yield number, {key.strip().lower(): value for key, value in row.items() if key}
+
+
+def read_jsonl(stream):
+    for number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield number, RowError(f"Invalid JSON: {e}")
+            continue
+        yield number, row if isinstance(row, dict) else RowError("Expected a JSON object")
+
+
+def _clean(value, strip=" /:;,.="):
+    return (value or "").strip().rstrip(strip).strip()
+
+
+def marc_row(record):
+    """The import row for a MARC21 bibliographic record"""
+    authors = [_clean(field.get("a"), " ,") for field in record.get_fields("100", "700") if field.get("a")]
+    isbn = (record.value("020", "a") or "").split(" ")[0]
+    date_value = _clean(record.value("264", "c") or record.value("260", "c"))
+    if not date_value and record.value("008"):
+        date_value = record.value("008")[7:11]
+
+    call_number = ""
+    for tag in ("090", "050", "082"):
+        parts = [part for field in record.get_fields(tag) for part in field.get_all("a", "b")][:2]
+        if parts:
+            call_number = " ".join(parts)
+            break
+
+    items = []
+    for field in record.get_fields("852", "952"):
+        barcode = field.get("p")
+        if barcode:
+            location = field.get("b") if field.tag == "852" else field.get("a")
+            items.append({"barcode": barcode, "location": location or "", "price": field.get("g") or ""})
+
+    return {
+        "title": _clean(record.value("245", "a")),
+        "subtitle": _clean(record.value("245", "b")),
+        "authors": authors,
+        "subjects": [_clean(field.get("a")) for field in record.get_fields("650", "651") if field.get("a")],
+        "publisher": _clean(record.value("264", "b") or record.value("260", "b")),
+        "publication_date": date_value,
+        "edition": _clean(record.value("250", "a")),
+        "isbn": isbn,
+        "language": _clean(record.value("546", "a")),
+        "pages": record.value("300", "a") or "",
+        "abstract": record.value("520", "a") or "",
+        "call_number": call_number,
+        "items": items,
+    }
+
+
+def read_marc(stream):
+    for number, record in enumerate(read_records(stream), start=1):
+        if isinstance(record, MARCError):
+            yield number, RowError(f"Invalid MARC record: {record}")
+        else:
+            yield number, marc_row(record)
+
+
+READERS = {"csv": read_csv, "jsonl": read_jsonl, "marc": read_marc}
+
+
+def open_source(path, file_format):
+    """Open ``path`` the way the reader for ``file_format`` expects"""
+    if file_format == "marc":
+        return open(path, "rb")
+    return open(path, encoding="utf-8-sig", newline="")
+
+
+# Normalization
+
+
+def _text(row, key):
+    value = row.get(key)
+    return "" if value is None else str(value).strip()
+
+
+def _list(value):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.split(LIST_SEPARATOR)
+    return [str(part).strip() for part in value if str(part).strip()]
+
+
+def _max_length(model, field, value):
+    limit = model._meta.get_field(field).max_length
+    if limit and len(value) > limit:
+        raise RowError(f"{model._meta.verbose_name} {field} is longer than {limit} characters")
+    return value
+
+
+def parse_author(value):
+    """(first name, last name) from "Last, First", "First Last" or a {first_name, last_name} object"""
+    if isinstance(value, dict):
+        first, last = _text(value, "first_name"), _text(value, "last_name")
+    elif "," in value:
+        last, first = (part.strip() for part in value.split(",", 1))
+    else:
+        first, _, last = value.strip().rpartition(" ")
+    if not last:
+        raise RowError(f"Author {value!r} has no last name")
+    return _max_length(Author, "first_name", first), _max_length(Author, "last_name", last)
+
+
+def parse_date(value):
+    """A date from YYYY-MM-DD, or January 1st of the first plausible year found"""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        pass
+    match = _YEAR.search(value)
+    if not match:
+        raise RowError(f"Unrecognized date {value!r}")
+    return date(int(match.group(1)), 1, 1)
+
+
+def _parse_item(raw, defaults):
+    item = {field: _text(raw, field) or defaults.get(field, "") for field in ITEM_FIELDS}
+    _max_length(Item, "barcode", item["barcode"])
+    _max_length(Item, "condition", item["condition"])
+    item["status"] = item["status"] or "available"
+    if item["status"] not in ITEM_STATUSES:
+        raise RowError(f"Unknown item status {item['status']!r}")
+    try:
+        item["price"] = Decimal(item["price"]) if item["price"] else None
+    except InvalidOperation:
+        raise RowError(f"Invalid price {item['price']!r}")
+    item["acquisition_date"] = parse_date(item["acquisition_date"])
+    return item
+
+
+def normalize(row):
+    """Validate a raw row and return it as the values to import; raises RowError"""
+    if not _text(row, "title"):
+        raise RowError("Title is required")
+    record = {}
+    for field in ("title", "subtitle", "edition", "language", "call_number"):
+        record[field] = _max_length(Publication, field, _text(row, field))
+    record["abstract"] = _text(row, "abstract")
+    record["summary"] = _text(row, "summary")
+
+    isbn = _text(row, "isbn")
+    try:
+        validate_isbn(isbn)
+    except ValidationError:
+        raise RowError(f"Invalid ISBN {isbn!r}")
+    record["isbn"] = _max_length(Publication, "isbn", isbn)
+
+    record["publication_date"] = parse_date(_text(row, "publication_date"))
+    pages = _text(row, "pages")
+    match = _PAGES.search(pages) or _DIGITS.search(pages)
+    record["pages"] = int(match.group(1)) if match else None
+
+    authors = row.get("authors")
+    if isinstance(authors, str):
+        authors = _list(authors)
+    record["authors"] = [parse_author(author) for author in authors or []]
+    record["subjects"] = [_max_length(Subject, "name", name) for name in _list(row.get("subjects"))]
+    record["publisher"] = _max_length(Publisher, "name", _text(row, "publisher"))
+    record["publication_type"] = _text(row, "publication_type")
+
+    if isinstance(row.get("items"), list):
+        raw_items = row["items"]
+        defaults = {}
+    else:
+        raw_items = [{"barcode": barcode} for barcode in _list(row.get("barcodes"))]
+        defaults = {field: _text(row, field) for field in ITEM_FIELDS if field != "barcode"}
+    record["items"] = [_parse_item(raw, defaults) for raw in raw_items if isinstance(raw, dict)]
+    barcodes = [item["barcode"] for item in record["items"]]
+    if "" in barcodes:
+        raise RowError("Item without a barcode")
+    if len(set(barcodes)) != len(barcodes):
+        raise RowError("The same barcode is listed twice")
+    return record
+
+
+class ImportSummary:
+    def __init__(self):
+        self.rows = 0
+        self.publications = 0
+        self.items = 0
+        self.authors = 0
+        self.subjects = 0
+        self.publishers = 0
+        self.errors = 0
+
+    def __str__(self):
+        return (
+            f"{self.rows} rows: {self.publications} publications and {self.items} items imported, "
+            f"{self.authors} authors, {self.subjects} subjects and {self.publishers} publishers created, "
+            f"{self.errors} rows rejected"
+        )
+
+
+class CatalogImporter:
+    """
+    Import rows from one of the READERS in chunks of ``chunk_size`` records.
+
+    ``default_type`` and ``default_location`` are codes used for records that
+    do not name a publication type or an item location. ``on_error`` is called
+    with (row number, row values, message) for every rejected record, and
+    ``progress`` with the ImportSummary after every chunk.
+    """
+
+    def __init__(
+        self, default_type="", default_location="", chunk_size=1000, dry_run=False, on_error=None, progress=None
+    ):
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        self.on_error = on_error
+        self.progress = progress
+        self.summary = ImportSummary()
+
+        self.types = {}
+        for pk, code, name in PublicationType.objects.values_list("pk", "code", "name"):
+            self.types[code.lower()] = self.types[name.lower()] = pk
+        self.locations = {code.lower(): pk for pk, code in Location.objects.values_list("pk", "code")}
+        self.publishers = {name.lower(): pk for pk, name in Publisher.objects.values_list("pk", "name")}
+        self.subjects = {name.lower(): pk for pk, name in Subject.objects.values_list("pk", "name")}
+        self.authors = {}
+        for pk, first, last in Author.objects.order_by("pk").values_list("pk", "first_name", "last_name"):
+            self.authors.setdefault((first.lower(), last.lower()), pk)
+
+        self.default_type = default_type.lower()
+        self.default_location = default_location.lower()
+        # ISBN-13s and barcodes of records accepted but not yet in the database
+        self.pending_isbns = set()
+        self.pending_barcodes = set()
+
+    def reject(self, number, row, message):
+        self.summary.errors += 1
+        if self.on_error:
+            self.on_error(number, row if isinstance(row, dict) else {}, message)
+
+    def run(self, rows):
+        """Import (row number, raw row) pairs from a reader. Returns the ImportSummary."""
+        chunk = []
+        for number, row in rows:
+            self.summary.rows += 1
+            try:
+                if isinstance(row, RowError):
+                    raise row
+                chunk.append((number, row, self.resolve(normalize(row))))
+            except RowError as e:
+                self.reject(number, row, str(e))
+                continue
+            if len(chunk) >= self.chunk_size:
+                self.flush(chunk)
+                chunk = []
+        if chunk:
+            self.flush(chunk)
+        return self.summary
+
+    def resolve(self, record):
+        """Check the record's type and locations against the lookup maps"""
+        type_key = record["publication_type"].lower() or self.default_type
+        if type_key not in self.types:
+            raise RowError(f"Unknown publication type {type_key!r}" if type_key else "No publication type")
+        record["publication_type"] = self.types[type_key]
+        for item in record["items"]:
+            location_key = item["location"].lower() or self.default_location
+            if location_key not in self.locations:
+                raise RowError(f"Unknown location {location_key!r}" if location_key else "No location for item")
+            item["location"] = self.locations[location_key]
+        record["isbn13"] = to_isbn13(record["isbn"]) or ""
+        return record
+
+    def _reject_duplicates(self, chunk):
+        isbns = {record["isbn13"] for _, _, record in chunk if record["isbn13"]}
+        barcodes = {item["barcode"] for _, _, record in chunk for item in record["items"]}
+        taken_isbns = set(Publication.objects.filter(isbn13__in=isbns).values_list("isbn13", flat=True))
+        taken_barcodes = set(Item.objects.filter(barcode__in=barcodes).values_list("barcode", flat=True))
+
+        accepted = []
+        for number, row, record in chunk:
+            record_barcodes = {item["barcode"] for item in record["items"]}
+            if record["isbn13"] and (record["isbn13"] in taken_isbns or record["isbn13"] in self.pending_isbns):
+                self.reject(number, row, f"ISBN {record['isbn']} is already in the catalog")
+            elif record_barcodes & (taken_barcodes | self.pending_barcodes):
+                taken = sorted(record_barcodes & (taken_barcodes | self.pending_barcodes))
+                self.reject(number, row, f"Barcode already in use: {', '.join(taken)}")
+            else:
+                if record["isbn13"]:
+                    self.pending_isbns.add(record["isbn13"])
+                self.pending_barcodes |= record_barcodes
+                accepted.append((number, row, record))
+        return accepted
+
+    def _create_named(self, model, lookup, names):
+        """Create the ``names`` missing from ``lookup`` (lower-cased name -> pk), add them to it and return their keys"""
+        missing = {}
+        for name in names:
+            missing.setdefault(name.lower(), name)
+        missing = {key: name for key, name in missing.items() if key not in lookup}
+        if not missing:
+            return []
+        if self.dry_run:
+            lookup.update(dict.fromkeys(missing))
+            return list(missing)
+        model.objects.bulk_create([model(name=name) for name in missing.values()], ignore_conflicts=True)
+        for pk, name in model.objects.filter(name__in=missing.values()).values_list("pk", "name"):
+            lookup[name.lower()] = pk
+        return list(missing)
+
+    def _create_authors(self, chunk):
+        missing = {}
+        for _, _, record in chunk:
+            for first, last in record["authors"]:
+                key = (first.lower(), last.lower())
+                if key not in self.authors:
+                    missing.setdefault(key, (first, last))
+        if self.dry_run:
+            self.authors.update(dict.fromkeys(missing))
+        elif missing:
+            created = Author.objects.bulk_create([Author(first_name=first, last_name=last) for first, last in missing.values()])
+            for key, author in zip(missing, created):
+                self.authors[key] = author.pk
+        return list(missing)
+
+    def _create_related(self, chunk, created):
+        """Create the chunk's new publishers, subjects and authors, recording the keys added to each lookup"""
+        created["publishers"] = self._create_named(
+            Publisher, self.publishers, [record["publisher"] for _, _, record in chunk if record["publisher"]]
+        )
+        created["subjects"] = self._create_named(
+            Subject, self.subjects, [name for _, _, record in chunk for name in record["subjects"]]
+        )
+        created["authors"] = self._create_authors(chunk)
+        return created
+
+    def _count_related(self, created):
+        self.summary.publishers += len(created["publishers"])
+        self.summary.subjects += len(created["subjects"])
+        self.summary.authors += len(created["authors"])
+
+    def flush(self, chunk):
+        chunk = self._reject_duplicates(chunk)
+        if self.dry_run:
+            self._count_related(self._create_related(chunk, {}))
+            self.summary.publications += len(chunk)
+            self.summary.items += sum(len(record["items"]) for _, _, record in chunk)
+        else:
+            created = {}
+            try:
+                # New publishers, subjects and authors are kept only if the chunk's publications are
+                with transaction.atomic():
+                    self._create_related(chunk, created)
+                    self._write(chunk)
+            except DatabaseError as e:
+                # Rolled back: forget their primary keys too
+                for name, keys in created.items():
+                    lookup = getattr(self, name)
+                    for key in keys:
+                        lookup.pop(key, None)
+                for number, row, _ in chunk:
+                    self.reject(number, row, f"Chunk failed to save: {e}")
+            else:
+                self._count_related(created)
+                self.summary.publications += len(chunk)
+                self.summary.items += sum(len(record["items"]) for _, _, record in chunk)
+            self.pending_isbns.clear()
+            self.pending_barcodes.clear()
+        if self.progress:
+            self.progress(self.summary)
+
+    def _write(self, chunk):
+        # bulk_create bypasses Publication.save(), so the ISBN keys are set here
+        publications = [
+            Publication(
+                title=record["title"],
+                subtitle=record["subtitle"],
+                publication_type_id=record["publication_type"],
+                publisher_id=self.publishers.get(record["publisher"].lower()),
+                publication_date=record["publication_date"],
+                edition=record["edition"],
+                isbn=record["isbn"],
+                normalized_isbn=compact_isbn(record["isbn"]),
+                isbn13=record["isbn13"],
+                language=record["language"] or "English",
+                pages=record["pages"],
+                abstract=record["abstract"],
+                summary=record["summary"],
+                call_number=record["call_number"],
+            )
+            for _, _, record in chunk
+        ]
+        authors_through = Publication.authors.through
+        subjects_through = Publication.subjects.through
+
+        Publication.objects.bulk_create(publications)
+        author_links, subject_links, items = [], [], []
+        for publication, (_, _, record) in zip(publications, chunk):
+            author_ids = dict.fromkeys(self.authors[(first.lower(), last.lower())] for first, last in record["authors"])
+            author_links += [authors_through(publication_id=publication.pk, author_id=pk) for pk in author_ids]
+            subject_ids = dict.fromkeys(self.subjects[name.lower()] for name in record["subjects"])
+            subject_links += [subjects_through(publication_id=publication.pk, subject_id=pk) for pk in subject_ids]
+            for item in record["items"]:
+                values = {key: value for key, value in item.items() if value is not None and key != "location"}
+                items.append(Item(publication_id=publication.pk, location_id=item["location"], **values))
+        authors_through.objects.bulk_create(author_links)
+        subjects_through.objects.bulk_create(subject_links)
+        Item.objects.bulk_create(items)
+        # bulk_create sends no signals; new publications show up across the catalog pages
+        invalidate_pages({CATALOG_SCOPE})
@@ -0,0 +1,77 @@
+"""
+Page cache scopes of the public catalog pages (see elibrary.page_cache).
+
+    index                 catalog:index
+    publication_detail    catalog:publication:<id>
+    browse_by_type        catalog:type:<id>
+    browse_by_subject     catalog:subject:<id>
+    browse_by_author      catalog:author:<id>
+
+Every page is also in the ``catalog`` scope, bumped for rare catalog-wide
+edits (locations, publishers, publication types) and after bulk imports.
+catalog.signals works out which scopes a change touches; generations are
+bumped once the transaction commits, so a page rendered meanwhile from the
+old rows cannot be cached under the new generation.
+"""
+
+from django.db import transaction
+
+from elibrary.page_cache import bump_generations
+from .models import Publication
+
+CATALOG_SCOPE = "catalog"
+INDEX_SCOPE = "catalog:index"
+
+# Publications listed as "recent" on the home page
+RECENT_PUBLICATIONS = 8
+
+
+def publication_scope(pk):
+    return f"catalog:publication:{pk}"
+
+
+def type_scope(pk):
+    return f"catalog:type:{pk}"
+
+
+def subject_scope(pk):
+    return f"catalog:subject:{pk}"
+
+
+def author_scope(pk):
+    return f"catalog:author:{pk}"
+
+
+def publication_scopes(publication_ids):
+    """Scopes of every page listing or showing one of the publications"""
+    ids = set(publication_ids)
+    if not ids:
+        return set()
+    scopes = {publication_scope(pk) for pk in ids}
+    scopes.update(
+        type_scope(pk)
+        for pk in Publication.objects.filter(pk__in=ids).values_list("publication_type_id", flat=True).distinct()
+    )
+    scopes.update(
+        author_scope(pk)
+        for pk in Publication.authors.through.objects.filter(publication_id__in=ids).values_list("author_id", flat=True)
+    )
+    scopes.update(
+        subject_scope(pk)
+        for pk in Publication.subjects.through.objects.filter(publication_id__in=ids).values_list("subject_id", flat=True)
+    )
+    recent = Publication.objects.order_by("-date_added").values_list("pk", flat=True)[:RECENT_PUBLICATIONS]
+    if ids.intersection(recent):
+        scopes.add(INDEX_SCOPE)
+    return scopes
+
+
+def invalidate_pages(scopes):
+    """Bump the scopes' generations when the current transaction commits"""
+    scopes = set(scopes)
+    if scopes:
+        transaction.on_commit(lambda: bump_generations(scopes))
+
+
+def invalidate_publication_pages(publication_ids, extra=()):
+    invalidate_pages(publication_scopes(publication_ids) | set(extra))
@@ -0,0 +1,109 @@
+"""
+Optimistic concurrency control for records edited from several desks at once.
+
+Models inheriting ``VersionedModel`` carry a ``version`` column. Every save
+of an existing row is a compare-and-swap: the UPDATE only matches when the
+stored version is still the one that was read, and bumps it. A save that
+matches no row raises ``ConcurrentUpdateError`` instead of silently
+overwriting someone else's change.
+"""
+
+import functools
+
+from django.conf import settings
+from django.contrib import messages
+from django.db import models, transaction
+from django.db.models import F
+from django.http import HttpRequest
+from django.shortcuts import redirect
+from django.utils.http import url_has_allowed_host_and_scheme
+
+CONFLICT_MESSAGE = "This record was changed by someone else at the same time. Please check it and try again."
+
+
+class ConcurrentUpdateError(Exception):
+    """Raised when a row changed between being read and being saved."""
+
+
+class VersionedModel(models.Model):
+    """Abstract base adding a version column and compare-and-swap saves"""
+
+    version = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if self._state.adding or kwargs.get("force_insert"):
+            return super().save(*args, **kwargs)
+
+        self._expected_version = self.version
+        self.version += 1
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "version"}
+        try:
+            super().save(*args, **kwargs)
+        except ConcurrentUpdateError:
+            self.version = self._expected_version
+            raise
+        finally:
+            self._expected_version = None
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        expected = getattr(self, "_expected_version", None)
+        if expected is None:
+            return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+
+        updated = super()._do_update(
+            base_qs.filter(version=expected), using, pk_val, values, update_fields, forced_update
+        )
+        if not updated:
+            raise ConcurrentUpdateError(
+                f"{self._meta.verbose_name} {pk_val} was changed by another transaction (expected version {expected})"
+            )
+        return updated
+
+
+def bump_version():
+    """Expression for queryset ``.update()`` calls so they invalidate stale copies too."""
+    return F("version") + 1
+
+
+def _conflict_response(request):
+    messages.error(request, CONFLICT_MESSAGE)
+    referer = request.META.get("HTTP_REFERER", "")
+    if url_has_allowed_host_and_scheme(referer, allowed_hosts={request.get_host()}, require_https=request.is_secure()):
+        return redirect(referer)
+    return redirect(settings.LOGIN_REDIRECT_URL)
+
+
+def retry_on_conflict(func=None, attempts=3):
+    """
+    Re-run a function from scratch when it hits a ConcurrentUpdateError.
+
+    Each attempt runs in its own transaction, so partial writes from a
+    conflicting attempt are rolled back before the function reloads its rows.
+    Once all attempts are used up a view gets a "record changed, please retry"
+    message and is sent back to the page it came from; other callers get the
+    error re-raised.
+    """
+
+    def decorator(view_func):
+        @functools.wraps(view_func)
+        def wrapper(*args, **kwargs):
+            for attempt in range(attempts):
+                try:
+                    with transaction.atomic():
+                        return view_func(*args, **kwargs)
+                except ConcurrentUpdateError:
+                    if attempt < attempts - 1:
+                        continue
+                    if args and isinstance(args[0], HttpRequest):
+                        return _conflict_response(args[0])
+                    raise
+
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
@@ -0,0 +1,230 @@
+"""
+Streaming catalog export and incremental deltas.
+
+``export_records`` yields one record per publication, with its authors,
+subjects and items (barcode, location, status) plus copy and available counts.
+Publications are read with ``.iterator(chunk_size=EXPORT_CHUNK_SIZE)`` and the
+authors, subjects and items are prefetched per chunk, so memory stays flat for
+any catalog size. Records are written as JSON Lines, CSV or MARC21 as they are
+produced.
+
+With ``since``, only publications changed at or after that time are exported:
+those whose ``date_updated`` moved, and those with an item whose
+``Item.date_updated`` moved (status changes, so availability stays current).
+Deleting an item touches its publication's ``date_updated`` (catalog.signals).
+Deleted publications are logged in ``PublicationTombstone`` by a post_delete
+signal and follow as deletion records (``"deleted": true`` in JSON Lines and
+CSV, leader status "d" in MARC), so applying the deltas in order reproduces the
+catalog. Run the next delta with ``since`` set to the time the previous one
+started; overlapping records are simply sent again.
+"""
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch, Q
+from django.utils import timezone
+
+from elibrary.exports import export_chunks
+from .marc import Field, MARCError, Record, record_bytes
+from .models import Item, Publication, PublicationTombstone
+
+EXPORT_FORMATS = ["jsonl", "csv", "marc"]
+EXPORT_CHUNK_SIZE = 1000
+# Longest abstract written to a MARC 520 field, in bytes (fields are limited to 9999)
+MARC_ABSTRACT_BYTES = 9000
+
+CSV_HEADER = [
+    "id",
+    "deleted",
+    "title",
+    "subtitle",
+    "authors",
+    "subjects",
+    "publisher",
+    "publication_type",
+    "publication_date",
+    "edition",
+    "isbn",
+    "isbn13",
+    "language",
+    "pages",
+    "call_number",
+    "barcodes",
+    "locations",
+    "copies",
+    "available",
+    "date_updated",
+]
+
+
+def changed_publications(since=None):
+    """Publications to export: all of them, or those whose record or items changed since ``since``"""
+    queryset = Publication.objects.all()
+    if since is not None:
+        changed_items = Item.objects.filter(date_updated__gte=since).values("publication_id")
+        queryset = queryset.filter(Q(date_updated__gte=since) | Q(pk__in=changed_items))
+    return (
+        queryset.select_related("publication_type", "publisher")
+        .prefetch_related(
+            "authors",
+            "subjects",
+            Prefetch(
+                "items",
+                queryset=Item.objects.select_related("location")
+                .only("publication_id", "barcode", "status", "location__code")
+                .order_by("barcode"),
+            ),
+        )
+        .order_by("pk")
+    )
+
+
+def publication_record(publication):
+    items = [
+        {"barcode": item.barcode, "location": item.location.code, "status": item.status}
+        for item in publication.items.all()
+    ]
+    return {
+        "id": publication.pk,
+        "title": publication.title,
+        "subtitle": publication.subtitle,
+        "authors": [
+            {"first_name": author.first_name, "last_name": author.last_name} for author in publication.authors.all()
+        ],
+        "subjects": [subject.name for subject in publication.subjects.all()],
+        "publisher": publication.publisher.name if publication.publisher else "",
+        "publication_type": publication.publication_type.code,
+        "publication_date": publication.publication_date,
+        "edition": publication.edition,
+        "isbn": publication.isbn,
+        "isbn13": publication.isbn13,
+        "language": publication.language,
+        "pages": publication.pages,
+        "abstract": publication.abstract,
+        "call_number": publication.call_number,
+        "items": items,
+        "copies": len(items),
+        "available": sum(1 for item in items if item["status"] == "available"),
+        "date_updated": publication.date_updated,
+    }
+
+
+def tombstone_record(tombstone):
+    return {
+        "id": tombstone.publication_id,
+        "deleted": True,
+        "title": tombstone.title,
+        "isbn13": tombstone.isbn13,
+        "date_updated": tombstone.deleted_date,
+    }
+
+
+def export_records(since=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Publication records in primary-key order, then deletion records when ``since`` is given"""
+    for publication in changed_publications(since).iterator(chunk_size=chunk_size):
+        yield publication_record(publication)
+    if since is not None:
+        tombstones = PublicationTombstone.objects.filter(deleted_date__gte=since).order_by("deleted_date", "pk")
+        for tombstone in tombstones.iterator(chunk_size=chunk_size):
+            yield tombstone_record(tombstone)
+
+
+def _jsonl_chunks(records):
+    encoder = DjangoJSONEncoder()
+    for record in records:
+        yield encoder.encode(record) + "\n"
+
+
+def _csv_row(record):
+    if record.get("deleted"):
+        return [record["id"], "true", record["title"], *[""] * 8, record["isbn13"], *[""] * 7, record["date_updated"]]
+    return [
+        record["id"],
+        "",
+        record["title"],
+        record["subtitle"],
+        "; ".join(f"{author['last_name']}, {author['first_name']}" for author in record["authors"]),
+        "; ".join(record["subjects"]),
+        record["publisher"],
+        record["publication_type"],
+        record["publication_date"],
+        record["edition"],
+        record["isbn"],
+        record["isbn13"],
+        record["language"],
+        record["pages"],
+        record["call_number"],
+        "; ".join(item["barcode"] for item in record["items"]),
+        "; ".join(dict.fromkeys(item["location"] for item in record["items"])),
+        record["copies"],
+        record["available"],
+        record["date_updated"],
+    ]
+
+
+def _truncate_bytes(value, limit):
+    encoded = value.encode()
+    return value if len(encoded) <= limit else encoded[:limit].decode(errors="ignore")
+
+
+def marc_record(record):
+    """A MARC21 bibliographic record for an export record"""
+    updated = timezone.localtime(record["date_updated"]).strftime("%Y%m%d%H%M%S.0")
+    fields = [Field("001", data=str(record["id"])), Field("005", data=updated)]
+    if record["isbn13"]:
+        fields.append(Field("020", subfields=[("a", record["isbn13"])]))
+    if record.get("deleted"):
+        fields.append(Field("245", indicators="00", subfields=[("a", record["title"])]))
+        return Record(leader="00000dam a2200000   4500", fields=fields)
+
+    authors = [f"{author['last_name']}, {author['first_name']}".rstrip(", ") for author in record["authors"]]
+    if record["call_number"]:
+        fields.append(Field("090", subfields=[("a", record["call_number"])]))
+    if authors:
+        fields.append(Field("100", indicators="1 ", subfields=[("a", authors[0])]))
+    title = [("a", record["title"])]
+    if record["subtitle"]:
+        title.append(("b", record["subtitle"]))
+    fields.append(Field("245", indicators="10" if authors else "00", subfields=title))
+    if record["edition"]:
+        fields.append(Field("250", subfields=[("a", record["edition"])]))
+    imprint = []
+    if record["publisher"]:
+        imprint.append(("b", record["publisher"]))
+    if record["publication_date"]:
+        imprint.append(("c", str(record["publication_date"].year)))
+    if imprint:
+        fields.append(Field("264", indicators=" 1", subfields=imprint))
+    if record["pages"]:
+        fields.append(Field("300", subfields=[("a", f"{record['pages']} p.")]))
+    if record["abstract"]:
+        fields.append(Field("520", subfields=[("a", _truncate_bytes(record["abstract"], MARC_ABSTRACT_BYTES))]))
+    if record["language"]:
+        fields.append(Field("546", subfields=[("a", record["language"])]))
+    fields += [Field("650", indicators=" 4", subfields=[("a", subject)]) for subject in record["subjects"]]
+    fields += [Field("700", indicators="1 ", subfields=[("a", author)]) for author in authors[1:]]
+    fields += [
+        Field("852", subfields=[("b", item["location"]), ("p", item["barcode"]), ("z", item["status"])])
+        for item in record["items"]
+    ]
+    return Record(fields=fields)
+
+
+def _marc_chunks(records, on_error=None):
+    for record in records:
+        try:
+            yield record_bytes(marc_record(record))
+        except MARCError as e:
+            if on_error:
+                on_error(record, str(e))
+
+
+def export_catalog_chunks(export_format, records, on_error=None):
+    """
+    Generator of str (jsonl, csv) or bytes (marc) chunks for ``records``.
+    ``on_error`` is called with (record, message) for records MARC cannot hold.
+    """
+    if export_format == "marc":
+        return _marc_chunks(records, on_error)
+    if export_format == "csv":
+        return export_chunks("csv", CSV_HEADER, (_csv_row(record) for record in records))
+    return _jsonl_chunks(records)
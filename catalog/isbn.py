@@ -0,0 +1,76 @@
+"""
+ISBN helpers.
+
+ISBNs arrive with hyphens, spaces, lower-case check digits and in both the
+10- and 13-digit forms. ``compact_isbn`` strips the formatting; ``to_isbn13``
+and ``to_isbn10`` convert between the forms (recomputing the check digit), so
+the same book matches whichever form was catalogued or scanned.
+
+``Publication.isbn13`` stores ``to_isbn13(isbn)`` and is the only column ISBN
+lookups use. ``validate_isbn`` rejects bad check digits when an ISBN is entered
+or changed; records catalogued before it existed keep their value, still get an
+isbn13 as long as it has the shape of an ISBN, and are otherwise matched on
+``normalized_isbn``.
+"""
+
+import re
+
+from django.core.exceptions import ValidationError
+
+_FORMATTING = re.compile(r"[\s-]+")
+_ISBN10 = re.compile(r"^\d{9}[\dX]$")
+_ISBN13 = re.compile(r"^\d{13}$")
+
+
+def compact_isbn(value):
+    """ISBN without hyphens or spaces, check digit upper-cased"""
+    if not value:
+        return ""
+    return _FORMATTING.sub("", value).upper()
+
+
+def isbn10_check_digit(first9):
+    total = sum((10 - position) * int(digit) for position, digit in enumerate(first9))
+    check = (11 - total % 11) % 11
+    return "X" if check == 10 else str(check)
+
+
+def isbn13_check_digit(first12):
+    total = sum(int(digit) * (3 if position % 2 else 1) for position, digit in enumerate(first12))
+    return str((10 - total % 10) % 10)
+
+
+def is_valid_isbn(value):
+    """True when ``value`` is a well-formed ISBN-10 or ISBN-13 with a correct check digit"""
+    value = compact_isbn(value)
+    if _ISBN10.match(value):
+        return isbn10_check_digit(value[:9]) == value[9]
+    if _ISBN13.match(value):
+        return isbn13_check_digit(value[:12]) == value[12]
+    return False
+
+
+def to_isbn13(value):
+    """The 13-digit form of an ISBN-10 or ISBN-13, or None"""
+    value = compact_isbn(value)
+    if _ISBN13.match(value):
+        return value
+    if _ISBN10.match(value):
+        return "978" + value[:9] + isbn13_check_digit("978" + value[:9])
+    return None
+
+
+def to_isbn10(value):
+    """The 10-digit form of a 978-prefixed ISBN-13 or an ISBN-10, or None"""
+    value = compact_isbn(value)
+    if _ISBN10.match(value):
+        return value
+    if _ISBN13.match(value) and value.startswith("978"):
+        return value[3:12] + isbn10_check_digit(value[3:12])
+    return None
+
+
+def validate_isbn(value):
+    """Model field validator: blank, or an ISBN-10/13 with a correct check digit"""
+    if value and not is_valid_isbn(value):
+        raise ValidationError("Enter a valid ISBN-10 or ISBN-13 (check the digits).", code="invalid_isbn")
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog.backfill import registered_backfills, run_backfill
+from catalog.models import BackfillCheckpoint
+
+
+class Command(BaseCommand):
+    help = "Recompute derived columns in resumable primary-key chunks (see catalog.backfill)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("names", nargs="*", help="Backfills to run")
+        parser.add_argument("--list", action="store_true", help="List the available backfills and their progress")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Rows per transaction")
+        parser.add_argument("--rate", type=int, help="Target rows per second (default: as fast as possible)")
+        parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start from the first row")
+
+    def handle(self, *args, **options):
+        backfills = registered_backfills()
+        if options["list"] or not options["names"]:
+            checkpoints = {c.name: c for c in BackfillCheckpoint.objects.filter(name__in=backfills)}
+            for name, backfill in backfills.items():
+                self.stdout.write(f"{name:<24} {backfill.description}")
+                if name in checkpoints:
+                    self.stdout.write(f"{'':<24} last run: {checkpoints[name]}")
+            return
+
+        unknown = [name for name in options["names"] if name not in backfills]
+        if unknown:
+            raise CommandError(f"Unknown backfill: {', '.join(unknown)}. Use --list to see the available ones.")
+
+        for name in options["names"]:
+            checkpoint = run_backfill(
+                backfills[name],
+                chunk_size=options["chunk_size"],
+                rows_per_second=options["rate"],
+                restart=options["restart"],
+                progress=lambda report, name=name: self.report(name, report),
+            )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{name}: scanned {checkpoint.rows_scanned} rows, updated {checkpoint.rows_updated}"
+                )
+            )
+
+    def report(self, name, report):
+        eta = f", ETA {report.eta}" if report.eta is not None and report.remaining else ""
+        self.stdout.write(
+            f"{name}: through pk {report.last_pk}, {report.scanned} scanned, {report.updated} updated, "
+            f"{report.rate:.0f} rows/s{eta}"
+        )
@@ -1,27 +1,15 @@
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
-import re
-
-from catalog.models import Publication
-
-
-def normalize_isbn(isbn):
-    if not isbn:
-        return ""
-    return re.sub(r"[\s-]+", "", isbn).upper()
 
 
 class Command(BaseCommand):
-    help = "Backfill Publication.normalized_isbn from existing isbn values."
+    help = "Backfill Publication.normalized_isbn and isbn13 from existing isbn values (same as `backfill isbn`)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Rows per transaction")
+        parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start from the first row")
 
     def handle(self, *args, **options):
-        qs = Publication.objects.all()
-        total = qs.count()
-        updated = 0
-        for pub in qs:
-            if pub.isbn:
-                new = normalize_isbn(pub.isbn)
-                if pub.normalized_isbn != new:
-                    pub.normalized_isbn = new
-                    pub.save(update_fields=["normalized_isbn"])
-                    updated += 1
-        self.stdout.write(self.style.SUCCESS(f"Processed {total} publications, updated {updated}"))
+        call_command(
+            "backfill", "isbn", chunk_size=options["chunk_size"], restart=options["restart"], stdout=self.stdout
+        )
@@ -0,0 +1,131 @@
+"""
+Concurrency harness for versioned models.
+
+Runs several threads that increment Item.times_borrowed on a small set of
+scratch items using three strategies and checks for lost updates:
+
+- unversioned: plain read-modify-write (shows the lost-update problem)
+- optimistic:  compare-and-swap save with retry on ConcurrentUpdateError
+- pessimistic: SELECT ... FOR UPDATE before every write
+
+Scratch rows are created for the run and removed afterwards. Point it at a
+PostgreSQL staging database for meaningful numbers; SQLite serializes all
+writers and ignores row locks.
+"""
+
+import random
+import threading
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction, OperationalError
+
+from catalog.cached_pages import CATALOG_SCOPE, invalidate_pages
+from catalog.concurrency import ConcurrentUpdateError
+from catalog.models import Item, Location, Publication, PublicationType
+
+
+class Command(BaseCommand):
+    help = "Measure lost updates and throughput of optimistic vs pessimistic item updates."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--ops", type=int, default=200, help="Increments per thread")
+        parser.add_argument("--rows", type=int, default=4, help="Scratch items shared by all threads")
+
+    def handle(self, *args, **options):
+        suffix = uuid.uuid4().hex[:8]
+        location = pub_type = publication = None
+        try:
+            location = Location.objects.create(name=f"Benchmark {suffix}", code=f"BENCH-{suffix}")
+            pub_type = PublicationType.objects.create(name=f"Benchmark {suffix}", code=suffix)
+            publication = Publication.objects.create(title=f"Concurrency benchmark {suffix}", publication_type=pub_type)
+            item_ids = [
+                item.pk
+                for item in Item.objects.bulk_create(
+                    Item(publication=publication, location=location, barcode=f"BENCH-{suffix}-{n}")
+                    for n in range(options["rows"])
+                )
+            ]
+            for strategy in ("unversioned", "optimistic", "pessimistic"):
+                Item.objects.filter(pk__in=item_ids).update(times_borrowed=0)
+                self.run_strategy(strategy, item_ids, options["threads"], options["ops"])
+        finally:
+            self.cleanup(location, pub_type, publication)
+
+    def cleanup(self, location, pub_type, publication):
+        """
+        Remove the scratch rows with raw deletes: no cascade collection or signals, so
+        tables the benchmark never touched cannot break cleanup and no tombstones are logged
+        """
+        if publication is not None:
+            Item.objects.filter(publication=publication)._raw_delete("default")
+            Publication.objects.filter(pk=publication.pk)._raw_delete("default")
+        if pub_type is not None:
+            PublicationType.objects.filter(pk=pub_type.pk)._raw_delete("default")
+        if location is not None:
+            Location.objects.filter(pk=location.pk)._raw_delete("default")
+        invalidate_pages({CATALOG_SCOPE})
+
+    def run_strategy(self, strategy, item_ids, threads, ops):
+        worker = getattr(self, f"increment_{strategy}")
+        stats = {"retries": 0, "errors": 0}
+        lock = threading.Lock()
+
+        def run():
+            try:
+                for _ in range(ops):
+                    try:
+                        retries = worker(random.choice(item_ids))
+                    except (OperationalError, ConcurrentUpdateError):
+                        retries = 0
+                        with lock:
+                            stats["errors"] += 1
+                    with lock:
+                        stats["retries"] += retries
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=run) for _ in range(threads)]
+        started = time.monotonic()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+        expected = threads * ops - stats["errors"]
+        # Failed operations did no work, so only completed increments count towards throughput
+        actual = sum(Item.objects.filter(pk__in=item_ids).values_list("times_borrowed", flat=True))
+        lost = expected - actual
+        style = self.style.SUCCESS if lost == 0 else self.style.WARNING
+        self.stdout.write(
+            style(
+                f"{strategy:<12} {expected / elapsed:8.0f} ops/s  lost updates: {lost:<5} "
+                f"retries: {stats['retries']:<5} db errors: {stats['errors']}"
+            )
+        )
+
+    def increment_unversioned(self, item_id):
+        current = Item.objects.values_list("times_borrowed", flat=True).get(pk=item_id)
+        Item.objects.filter(pk=item_id).update(times_borrowed=current + 1)
+        return 0
+
+    def increment_optimistic(self, item_id):
+        retries = 0
+        while True:
+            item = Item.objects.get(pk=item_id)
+            item.times_borrowed += 1
+            try:
+                item.save(update_fields=["times_borrowed"])
+                return retries
+            except ConcurrentUpdateError:
+                retries += 1
+
+    def increment_pessimistic(self, item_id):
+        with transaction.atomic():
+            item = Item.objects.select_for_update().get(pk=item_id)
+            item.times_borrowed += 1
+            item.save(update_fields=["times_borrowed"])
+        return 0
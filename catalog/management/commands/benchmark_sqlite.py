@@ -0,0 +1,101 @@
+"""
+Compare SQLite read/write throughput with the default connection settings
+against the production profile (WAL, synchronous=NORMAL, busy_timeout,
+mmap/cache sizing, in-memory temp store and BEGIN IMMEDIATE writes).
+
+The benchmark runs in a scratch database file with several worker
+processes, mimicking gunicorn workers, so it never touches library data.
+"""
+
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+ROWS = 20000
+
+
+def _connect(path, profile):
+    if profile == "production":
+        conn = sqlite3.connect(path, timeout=settings.SQLITE_BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+        for pragma, value in settings.SQLITE_PRODUCTION_PRAGMAS.items():
+            conn.execute(f"PRAGMA {pragma}={value}")
+    else:
+        conn = sqlite3.connect(path, isolation_level=None)
+    return conn
+
+
+def _worker(path, profile, role, duration, results):
+    conn = _connect(path, profile)
+    begin = "BEGIN IMMEDIATE" if profile == "production" else "BEGIN"
+    ops = errors = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        try:
+            if role == "write":
+                # Read-then-write, like a loan renewal: upgrades the lock mid-transaction
+                # under deferred BEGIN, which is where "database is locked" comes from.
+                conn.execute(begin)
+                row_id = random.randint(1, ROWS)
+                (count,) = conn.execute("SELECT n FROM bench WHERE id = ?", (row_id,)).fetchone()
+                conn.execute("UPDATE bench SET n = ? WHERE id = ?", (count + 1, row_id))
+                conn.execute("COMMIT")
+            else:
+                low = random.randint(1, ROWS - 100)
+                conn.execute("SELECT COUNT(*), SUM(n) FROM bench WHERE id BETWEEN ? AND ?", (low, low + 100)).fetchone()
+            ops += 1
+        except sqlite3.OperationalError:
+            errors += 1
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+    conn.close()
+    results.put((role, ops, errors))
+
+
+class Command(BaseCommand):
+    help = "Benchmark SQLite read/write throughput with default vs production connection settings."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--readers", type=int, default=4)
+        parser.add_argument("--writers", type=int, default=4)
+        parser.add_argument("--seconds", type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        for profile in ("default", "production"):
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, "bench.sqlite3")
+                conn = _connect(path, profile)
+                conn.execute("CREATE TABLE bench (id INTEGER PRIMARY KEY, n INTEGER NOT NULL)")
+                conn.executemany("INSERT INTO bench (id, n) VALUES (?, 0)", ((i,) for i in range(1, ROWS + 1)))
+                conn.close()
+
+                totals = self.run_profile(path, profile, options)
+            seconds = options["seconds"]
+            self.stdout.write(
+                f"{profile:<10} reads/s: {totals['read'][0] / seconds:9.0f}  "
+                f"writes/s: {totals['write'][0] / seconds:8.0f}  "
+                f"locked errors: {totals['read'][1] + totals['write'][1]}"
+            )
+
+    def run_profile(self, path, profile, options):
+        results = multiprocessing.Queue()
+        roles = ["read"] * options["readers"] + ["write"] * options["writers"]
+        processes = [
+            multiprocessing.Process(target=_worker, args=(path, profile, role, options["seconds"], results))
+            for role in roles
+        ]
+        for process in processes:
+            process.start()
+        totals = {"read": [0, 0], "write": [0, 0]}
+        for _ in processes:
+            role, ops, errors = results.get()
+            totals[role][0] += ops
+            totals[role][1] += errors
+        for process in processes:
+            process.join()
+        return totals
@@ -0,0 +1,79 @@
+import os
+import sys
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from catalog.export import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, export_catalog_chunks, export_records
+
+
+def parse_since(value):
+    """An aware datetime from an ISO date or datetime; naive values are in the current time zone"""
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            moment = datetime.combine(day, time.min) if day else None
+    except ValueError:
+        moment = None
+    if moment is None:
+        raise CommandError(f"--since must be an ISO date or datetime, not {value!r}")
+    return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+
+
+class Command(BaseCommand):
+    help = "Stream the catalog, or the changes since a point in time, as JSON Lines, CSV or MARC21."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=EXPORT_FORMATS, default="jsonl")
+        parser.add_argument("--since", help="Only publications changed or deleted since this ISO date/datetime")
+        parser.add_argument("--output", "-o", help="File to write (default: standard output)")
+        parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE, help="Publications per query")
+
+    def handle(self, *args, **options):
+        since = parse_since(options["since"]) if options["since"] else None
+        export_format = options["format"]
+        # Changes made while the export runs are picked up again by the next delta
+        started = timezone.now()
+        counts = {"records": 0, "skipped": 0}
+
+        def counted(records):
+            for record in records:
+                counts["records"] += 1
+                yield record
+
+        def on_error(record, message):
+            counts["skipped"] += 1
+            self.stderr.write(f"Publication {record['id']} skipped: {message}")
+
+        chunks = export_catalog_chunks(
+            export_format, counted(export_records(since, options["chunk_size"])), on_error=on_error
+        )
+        binary = export_format == "marc"
+        output = options["output"]
+        if output:
+            partial = output + ".part"
+            try:
+                with open(partial, "wb") if binary else open(partial, "w", encoding="utf-8", newline="") as f:
+                    for chunk in chunks:
+                        f.write(chunk)
+                os.replace(partial, output)
+            except BaseException:
+                if os.path.exists(partial):
+                    os.remove(partial)
+                raise
+        else:
+            for chunk in chunks:
+                if binary:
+                    sys.stdout.buffer.write(chunk)
+                else:
+                    self.stdout.write(chunk, ending="")
+            sys.stdout.flush()
+
+        skipped = f", {counts['skipped']} skipped" if counts["skipped"] else ""
+        self.stderr.write(
+            self.style.SUCCESS(f"Exported {counts['records'] - counts['skipped']} records{skipped}. ")
+            + f"Next delta: --since {started.isoformat()}"
+        )
@@ -0,0 +1,37 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from catalog.models import Publication
+from catalog.tasks import generate_cover_thumbnails
+
+
+def _render(publication_id):
+    try:
+        return generate_cover_thumbnails(publication_id)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Render cover thumbnails for publications that do not have them yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4, help="Image processing processes")
+        parser.add_argument("--all", action="store_true", help="Re-check every cover, not only missing ones")
+
+    def handle(self, *args, **options):
+        publications = Publication.objects.exclude(cover_image="").exclude(cover_image__isnull=True)
+        if not options["all"]:
+            publications = publications.filter(cover_digest="")
+        ids = list(publications.values_list("id", flat=True))
+
+        # Worker processes must open their own database connections, and under the spawn
+        # start method (Windows, macOS) load the app registry before unpickling tasks
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=options["workers"], initializer=django.setup) as pool:
+            for summary in pool.map(_render, ids):
+                self.stdout.write(summary)
+        self.stdout.write(self.style.SUCCESS(f"Processed {len(ids)} covers"))
@@ -0,0 +1,60 @@
+import csv
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog.bulk_import import FORMATS, READERS, CatalogImporter, open_source
+
+EXTENSIONS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".mrc": "marc", ".marc": "marc"}
+
+
+class Command(BaseCommand):
+    help = "Bulk-import publications and items from CSV, JSON Lines or MARC21 (see catalog.bulk_import)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import")
+        parser.add_argument("--format", choices=FORMATS, help="File format (default: from the file extension)")
+        parser.add_argument("--type", default="", help="Publication type code for records that do not name one")
+        parser.add_argument("--location", default="", help="Location code for items that do not name one")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Records per transaction")
+        parser.add_argument("--dry-run", action="store_true", help="Validate the file without writing anything")
+        parser.add_argument("--errors", help="Write rejected rows to this CSV file")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or EXTENSIONS.get(os.path.splitext(path)[1].lower())
+        if not file_format:
+            raise CommandError("Cannot tell the format from the file extension; pass --format.")
+        if not os.path.isfile(path):
+            raise CommandError(f"No such file: {path}")
+
+        error_file = open(options["errors"], "w", encoding="utf-8", newline="") if options["errors"] else None
+        error_writer = csv.writer(error_file) if error_file else None
+        if error_writer:
+            error_writer.writerow(["Row", "Title", "ISBN", "Error"])
+
+        def on_error(number, row, message):
+            if error_writer:
+                error_writer.writerow([number, row.get("title", ""), row.get("isbn", ""), message])
+            else:
+                self.stderr.write(f"Row {number}: {message}")
+
+        importer = CatalogImporter(
+            default_type=options["type"],
+            default_location=options["location"],
+            chunk_size=options["chunk_size"],
+            dry_run=options["dry_run"],
+            on_error=on_error,
+            progress=lambda summary: self.stdout.write(f"{summary.rows} rows read, {summary.errors} rejected"),
+        )
+        try:
+            with open_source(path, file_format) as stream:
+                summary = importer.run(READERS[file_format](stream))
+        finally:
+            if error_file:
+                error_file.close()
+
+        prefix = "Dry run, nothing written. " if options["dry_run"] else ""
+        self.stdout.write(self.style.SUCCESS(f"{prefix}{summary}"))
+        if summary.errors and error_file:
+            self.stdout.write(f"Rejected rows written to {options['errors']}")
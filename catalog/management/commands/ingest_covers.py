@@ -0,0 +1,170 @@
+"""
+Bulk cover ingestion from a directory tree.
+
+Image files are matched to publications by file name: the stem is compared to
+``isbn13`` first (ISBN-10 stems are converted), then to ``call_number``
+(underscores read as spaces), e.g. ``978-0-13-468599-1.jpg`` or ``QA76_9_D3.png``.
+
+Images are hashed and resized in a process pool and stored once per distinct
+image as ``covers/<ab>/<sha256>.jpg``, so identical scans shared by several
+publications are stored once and an image already in storage is not resized
+again. Publications are updated with ``bulk_update`` one batch at a time,
+with ``date_updated`` set so the new covers reach export deltas, OAI-PMH and
+the API, and their cached pages retired. Publications that already have a cover
+are skipped unless ``--replace`` is given, so an interrupted run can simply be
+started again and picks up where it stopped.
+"""
+
+import hashlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.utils import timezone
+
+from catalog.cached_pages import invalidate_publication_pages
+from catalog.isbn import to_isbn13
+from catalog.models import Publication
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".tif", ".tiff", ".bmp"}
+
+
+def _scan(root):
+    """Yield image file paths under root without building the full list"""
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS:
+                    yield entry.path
+
+
+def _process(args):
+    """
+    Hash and resize one image. Runs in a worker process.
+    Returns (path, digest, JPEG bytes or None when already stored, error or None).
+    """
+    path, max_size = args
+    from PIL import Image, ImageOps
+
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        if default_storage.exists(_cover_name(digest)):
+            return path, digest, None, None
+
+        with Image.open(io.BytesIO(data)) as source:
+            image = ImageOps.exif_transpose(source).convert("RGB")
+        image.thumbnail((max_size, max_size), Image.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, "JPEG", quality=90, optimize=True, progressive=True)
+        return path, digest, buffer.getvalue(), None
+    except OSError as e:
+        return path, None, None, str(e)
+
+
+def _cover_name(digest):
+    return f"covers/{digest[:2]}/{digest}.jpg"
+
+
+def _call_number_key(value):
+    return value.replace("_", " ").strip().upper()
+
+
+class Command(BaseCommand):
+    help = "Match cover images in a directory to publications by ISBN or call number and attach them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("directory", help="Directory tree to scan for cover images")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="Image processing processes")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Publications updated per transaction")
+        parser.add_argument("--max-size", type=int, default=1200, help="Longest side of the stored cover in pixels")
+        parser.add_argument("--replace", action="store_true", help="Replace covers that are already set")
+
+    def handle(self, *args, **options):
+        root = options["directory"]
+        if not os.path.isdir(root):
+            raise CommandError(f"{root} is not a directory")
+
+        by_isbn, by_call_number, has_cover = self.load_index()
+        self.stdout.write(f"Indexed {len(by_isbn)} ISBNs and {len(by_call_number)} call numbers")
+
+        matched = self.match_files(_scan(root), by_isbn, by_call_number, has_cover, options["replace"])
+        stats = {"updated": 0, "errors": 0}
+
+        # Worker processes must open their own database connections, and under the spawn
+        # start method (Windows, macOS) load the app registry before unpickling tasks
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=options["workers"], initializer=django.setup) as pool:
+            while True:
+                batch = list(islice(matched, options["batch_size"]))
+                if not batch:
+                    break
+                self.ingest_batch(pool, batch, options["max_size"], stats)
+                self.stdout.write(f"Updated {stats['updated']} publications, {stats['errors']} unreadable images")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done: {stats['updated']} covers attached. "
+                "Run generate_thumbnails to render their thumbnails ahead of first view."
+            )
+        )
+
+    def load_index(self):
+        by_isbn, by_call_number, has_cover = {}, {}, set()
+        rows = Publication.objects.values_list("id", "isbn13", "call_number", "cover_image")
+        for pk, isbn13, call_number, cover in rows.iterator(chunk_size=5000):
+            if isbn13:
+                by_isbn[isbn13] = pk
+            if call_number:
+                by_call_number[_call_number_key(call_number)] = pk
+            if cover:
+                has_cover.add(pk)
+        return by_isbn, by_call_number, has_cover
+
+    def match_files(self, paths, by_isbn, by_call_number, has_cover, replace):
+        """Yield (publication id, path) for each file whose name matches a publication"""
+        seen = set()
+        for path in paths:
+            stem = os.path.splitext(os.path.basename(path))[0]
+            pk = by_isbn.get(to_isbn13(stem)) or by_call_number.get(_call_number_key(stem))
+            if pk is None or pk in seen or (pk in has_cover and not replace):
+                continue
+            seen.add(pk)
+            yield pk, path
+
+    def ingest_batch(self, pool, batch, max_size, stats):
+        stored = {}
+        for path, digest, data, error in pool.map(_process, [(path, max_size) for _, path in batch], chunksize=16):
+            if error:
+                stats["errors"] += 1
+                self.stderr.write(f"{path}: {error}")
+                continue
+            # Stored here rather than in the workers: identical images in one batch would
+            # otherwise race, and storage renames the loser instead of sharing the file
+            name = _cover_name(digest)
+            if data is not None and not default_storage.exists(name):
+                name = default_storage.save(name, ContentFile(data))
+            stored[path] = name
+
+        # bulk_update skips auto_now and save signals: set date_updated so export deltas, OAI
+        # datestamps and API cache keys see the new cover, and retire the cached pages
+        now = timezone.now()
+        publications = [
+            Publication(pk=pk, cover_image=stored[path], cover_digest="", date_updated=now)
+            for pk, path in batch
+            if path in stored
+        ]
+        with transaction.atomic():
+            Publication.objects.bulk_update(publications, ["cover_image", "cover_digest", "date_updated"])
+            invalidate_publication_pages([publication.pk for publication in publications])
+        stats["updated"] += len(publications)
@@ -0,0 +1,65 @@
+"""
+Estimate static bytes and requests per page view before and after the
+precompressed, fingerprinted pipeline.
+
+Renders catalog pages with DEBUG off so {% static %} emits hashed names, then
+compares, for the local assets each page references:
+
+- before: uncompressed files, revalidated on every view (one request each)
+- after:  smallest precompressed variant on first view, nothing on repeat
+          views for hashed names (served as immutable); names the manifest
+          does not know are still revalidated
+
+Run ``collectstatic`` first. CDN assets in base.html are listed but not counted.
+"""
+
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+
+from elibrary.static_pipeline import ENCODINGS
+
+
+class Command(BaseCommand):
+    help = "Report static bytes and requests per page view with the precompressed static pipeline."
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="*", default=["/", "/search/"], help="Pages to measure")
+
+    def handle(self, *args, **options):
+        if not os.path.isdir(settings.STATIC_ROOT):
+            raise CommandError("STATIC_ROOT does not exist; run collectstatic first")
+
+        prefix = "/" + settings.STATIC_URL.lstrip("/")
+        with override_settings(DEBUG=False, ALLOWED_HOSTS=["*"]):
+            client = Client()
+            for page in options["paths"]:
+                html = client.get(page).content.decode()
+                urls = sorted(set(re.findall(r'(?:href|src)="([^"?#]+)', html)))
+                local = [url for url in urls if url.startswith(prefix)]
+                external = [url for url in urls if url.startswith("http")]
+                self.report(page, [url[len(prefix):] for url in local], len(external))
+
+    def report(self, page, names, external_count):
+        hashed = set(staticfiles_storage.hashed_files.values())
+        revalidated = sum(1 for name in names if name not in hashed)
+        raw = compressed = 0
+        for name in names:
+            path = os.path.join(settings.STATIC_ROOT, name)
+            if not os.path.isfile(path):
+                self.stderr.write(f"  missing from STATIC_ROOT: {name}")
+                continue
+            size = os.path.getsize(path)
+            variants = [os.path.getsize(path + suffix) for _, suffix in ENCODINGS if os.path.isfile(path + suffix)]
+            raw += size
+            compressed += min([size] + variants)
+
+        saved = 100 * (raw - compressed) / raw if raw else 0
+        self.stdout.write(self.style.SUCCESS(f"{page}"))
+        self.stdout.write(f"  local assets: {len(names)}  (CDN assets not counted: {external_count})")
+        self.stdout.write(f"  first view bytes:    {raw:>9} -> {compressed:>9}  ({saved:.0f}% less)")
+        self.stdout.write(f"  repeat view requests: {len(names):>8} -> {revalidated:>9}")
@@ -0,0 +1,160 @@
+"""
+Minimal MARC21 (ISO 2709) reader and writer.
+
+Only what the bulk import and export need: records are read one at a time
+from a binary stream, so a file of any size is parsed in bounded memory. Each
+record is a list of fields; control fields (001-009) hold a string, data
+fields hold two indicators and a list of (code, value) subfields.
+
+Records are written in UTF-8 (leader position 9 = "a"). Records whose leader
+declares MARC-8 are decoded as UTF-8 as well, with undecodable bytes replaced,
+which keeps plain ASCII intact.
+"""
+
+RECORD_TERMINATOR = b"\x1d"
+FIELD_TERMINATOR = b"\x1e"
+SUBFIELD_DELIMITER = b"\x1f"
+LEADER_LENGTH = 24
+DIRECTORY_ENTRY_LENGTH = 12
+MAX_FIELD_LENGTH = 9999
+MAX_RECORD_LENGTH = 99999
+# New record, language material, monograph, UTF-8; length and base address are filled in when written
+DEFAULT_LEADER = "00000nam a2200000   4500"
+
+
+class MARCError(ValueError):
+    """A record that is not valid ISO 2709"""
+
+
+class Field:
+    def __init__(self, tag, data=None, indicators="  ", subfields=()):
+        self.tag = tag
+        self.data = data
+        self.indicators = indicators
+        self.subfields = list(subfields)
+
+    def get(self, code):
+        """First value of subfield ``code``, or None"""
+        for subfield_code, value in self.subfields:
+            if subfield_code == code:
+                return value
+        return None
+
+    def get_all(self, *codes):
+        return [value for code, value in self.subfields if code in codes]
+
+
+class Record:
+    def __init__(self, leader=DEFAULT_LEADER, fields=None):
+        self.leader = leader
+        self.fields = fields if fields is not None else []
+
+    def get_fields(self, *tags):
+        return [field for field in self.fields if field.tag in tags]
+
+    def value(self, tag, code=None):
+        """Control field data, or the first value of ``code`` in the first ``tag`` field that has it"""
+        for field in self.get_fields(tag):
+            value = field.data if code is None else field.get(code)
+            if value:
+                return value
+        return None
+
+
+def _decode(raw):
+    return raw.decode("utf-8", errors="replace")
+
+
+def parse_record(raw):
+    """Parse one ISO 2709 record from bytes (terminator included or not)"""
+    if len(raw) < LEADER_LENGTH + 1:
+        raise MARCError("Record shorter than its leader")
+    leader = raw[:LEADER_LENGTH].decode("ascii", errors="replace")
+    try:
+        base_address = int(leader[12:17])
+    except ValueError:
+        raise MARCError(f"Invalid base address in leader {leader!r}")
+
+    directory = raw[LEADER_LENGTH:base_address - 1]
+    if len(directory) % DIRECTORY_ENTRY_LENGTH:
+        raise MARCError("Directory length is not a multiple of 12")
+
+    fields = []
+    for offset in range(0, len(directory), DIRECTORY_ENTRY_LENGTH):
+        entry = directory[offset:offset + DIRECTORY_ENTRY_LENGTH].decode("ascii", errors="replace")
+        tag = entry[:3]
+        try:
+            length, start = int(entry[3:7]), int(entry[7:12])
+        except ValueError:
+            raise MARCError(f"Invalid directory entry {entry!r}")
+        data = raw[base_address + start:base_address + start + length].rstrip(FIELD_TERMINATOR)
+        if tag < "010":
+            fields.append(Field(tag, data=_decode(data)))
+            continue
+        indicators = _decode(data[:2])
+        subfields = []
+        for chunk in data[2:].split(SUBFIELD_DELIMITER)[1:]:
+            if chunk:
+                subfields.append((_decode(chunk[:1]), _decode(chunk[1:]).strip()))
+        fields.append(Field(tag, indicators=indicators, subfields=subfields))
+    return Record(leader, fields)
+
+
+def read_records(stream):
+    """
+    Yield ``Record`` objects, or ``MARCError`` instances for records that could
+    not be parsed, from a binary stream of ISO 2709 records.
+    """
+    while True:
+        head = stream.read(5)
+        if not head or not head.strip():
+            return
+        try:
+            length = int(head)
+        except ValueError:
+            # Lost the record boundary; skip to the next terminator
+            while True:
+                byte = stream.read(1)
+                if not byte or byte == RECORD_TERMINATOR:
+                    break
+            yield MARCError(f"Invalid record length {head!r}")
+            continue
+        raw = head + stream.read(length - 5)
+        if len(raw) < length:
+            yield MARCError("Truncated record at end of file")
+            return
+        try:
+            yield parse_record(raw)
+        except MARCError as e:
+            yield e
+
+
+def _field_bytes(field):
+    if field.tag < "010":
+        body = field.data.encode()
+    else:
+        body = field.indicators.encode() + b"".join(
+            SUBFIELD_DELIMITER + code.encode() + value.encode() for code, value in field.subfields
+        )
+    return body + FIELD_TERMINATOR
+
+
+def record_bytes(record):
+    """ISO 2709 encoding of ``record``, with the record length and base address set in the leader"""
+    directory = []
+    data = []
+    offset = 0
+    for field in record.fields:
+        body = _field_bytes(field)
+        if len(body) > MAX_FIELD_LENGTH:
+            raise MARCError(f"Field {field.tag} is longer than {MAX_FIELD_LENGTH} bytes")
+        directory.append(f"{field.tag}{len(body):04d}{offset:05d}".encode())
+        data.append(body)
+        offset += len(body)
+    directory = b"".join(directory) + FIELD_TERMINATOR
+    base_address = LEADER_LENGTH + len(directory)
+    length = base_address + offset + 1
+    if length > MAX_RECORD_LENGTH:
+        raise MARCError(f"Record is longer than {MAX_RECORD_LENGTH} bytes")
+    leader = f"{length:05d}{record.leader[5:12]}{base_address:05d}{record.leader[17:]}"
+    return leader.encode() + directory + b"".join(data) + RECORD_TERMINATOR
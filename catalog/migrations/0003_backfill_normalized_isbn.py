@@ -17,10 +17,22 @@ def normalize_isbn(isbn):
 
 def forwards(apps, schema_editor):
     Publication = apps.get_model('catalog', 'Publication')
-    for pub in Publication.objects.all():
-        if pub.isbn:
-            pub.normalized_isbn = normalize_isbn(pub.isbn)
-            pub.save(update_fields=['normalized_isbn'])
+    # Primary-key chunks with one bulk UPDATE each, instead of a save() per row
+    last_pk = 0
+    while True:
+        rows = list(
+            Publication.objects.filter(pk__gt=last_pk).exclude(isbn='')
+            .order_by('pk').values_list('pk', 'isbn', 'normalized_isbn')[:1000]
+        )
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+        changed = [
+            Publication(pk=pk, normalized_isbn=normalize_isbn(isbn))
+            for pk, isbn, normalized in rows
+            if normalized != normalize_isbn(isbn)
+        ]
+        Publication.objects.bulk_update(changed, ['normalized_isbn'])
 
 
 def reverse(apps, schema_editor):
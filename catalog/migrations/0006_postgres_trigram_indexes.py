@@ -0,0 +1,43 @@
+"""Trigram GIN indexes for substring search on PostgreSQL.
+
+Catalog search uses ``icontains``, which PostgreSQL runs as
+``UPPER(col::text) LIKE UPPER('%term%')``. A B-tree index cannot serve a
+leading wildcard, but a pg_trgm GIN index on the same UPPER() expression can.
+The migration is a no-op on other database engines.
+"""
+from django.db import migrations
+
+TRIGRAM_INDEXES = [
+    ('catalog_pub_title_trgm_idx', 'catalog_publication', 'title'),
+    ('catalog_author_first_trgm_idx', 'catalog_author', 'first_name'),
+    ('catalog_author_last_trgm_idx', 'catalog_author', 'last_name'),
+    ('catalog_subject_name_trgm_idx', 'catalog_subject', 'name'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin (UPPER({column}::text) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0005_item_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
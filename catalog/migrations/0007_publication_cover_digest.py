@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0006_postgres_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publication',
+            name='cover_digest',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+    ]
@@ -0,0 +1,31 @@
+"""Add Publication.isbn13, the canonical ISBN-13 lookup key.
+
+Existing rows are filled in by 0012_backfill_isbn13; ``python manage.py
+backfill isbn`` recomputes the column later if needed.
+"""
+import catalog.isbn
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0007_publication_cover_digest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publication',
+            name='isbn13',
+            field=models.CharField(blank=True, editable=False, max_length=13, verbose_name='ISBN-13'),
+        ),
+        migrations.AlterField(
+            model_name='publication',
+            name='isbn',
+            field=models.CharField(blank=True, max_length=20, validators=[catalog.isbn.validate_isbn], verbose_name='ISBN'),
+        ),
+        migrations.AddIndex(
+            model_name='publication',
+            index=models.Index(fields=['isbn13'], name='catalog_pub_isbn13_idx'),
+        ),
+    ]
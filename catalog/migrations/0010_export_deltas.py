@@ -0,0 +1,34 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0009_backfill_checkpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PublicationTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('publication_id', models.BigIntegerField(db_index=True)),
+                ('isbn13', models.CharField(blank=True, max_length=13)),
+                ('title', models.CharField(max_length=500)),
+                ('deleted_date', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['deleted_date'],
+            },
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='date_updated',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddIndex(
+            model_name='publication',
+            index=models.Index(fields=['date_updated'], name='catalog_pub_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0010_export_deltas'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='publication',
+            name='catalog_pub_updated_idx',
+        ),
+        migrations.AddIndex(
+            model_name='publication',
+            index=models.Index(fields=['date_updated', 'id'], name='catalog_pub_updated_id_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+"""Backfill isbn13 for publications catalogued before 0008_publication_isbn13.
+
+ISBN lookups (resolve_isbn, search, the API, ingest_covers) match only on
+isbn13, so existing rows must have it before the new code serves them. Runs
+in primary-key chunks with one bulk UPDATE each; date_updated is bumped on the
+changed rows so incremental exports pick up the new identifier.
+"""
+from django.db import migrations
+from django.utils import timezone
+
+from catalog.isbn import to_isbn13
+
+
+def forwards(apps, schema_editor):
+    Publication = apps.get_model('catalog', 'Publication')
+    now = timezone.now()
+    last_pk = 0
+    while True:
+        rows = list(
+            Publication.objects.filter(pk__gt=last_pk).exclude(isbn='')
+            .order_by('pk').values_list('pk', 'isbn', 'isbn13')[:1000]
+        )
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+        changed = [
+            Publication(pk=pk, isbn13=to_isbn13(isbn) or '', date_updated=now)
+            for pk, isbn, isbn13 in rows
+            if isbn13 != (to_isbn13(isbn) or '')
+        ]
+        Publication.objects.bulk_update(changed, ['isbn13', 'date_updated'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0011_publication_updated_id_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -3,6 +3,8 @@ from django.utils import timezone
 from django.urls import reverse
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.conf import settings
+from .concurrency import VersionedModel
+from .isbn import compact_isbn, to_isbn13, validate_isbn
 
 
 class PublicationType(models.Model):
@@ -87,14 +89,18 @@ class Publication(models.Model):
     )
     publication_date = models.DateField(null=True, blank=True)
     edition = models.CharField(max_length=50, blank=True)
-    isbn = models.CharField(max_length=20, blank=True, verbose_name="ISBN")
+    isbn = models.CharField(max_length=20, blank=True, verbose_name="ISBN", validators=[validate_isbn])
     # Normalized ISBN (digits only, no hyphens/spaces) for fast lookups
     normalized_isbn = models.CharField(max_length=20, blank=True, db_index=True)
+    # ISBN-13 form of isbn (ISBN-10s converted); the key all ISBN lookups match on
+    isbn13 = models.CharField(max_length=13, blank=True, editable=False, verbose_name="ISBN-13")
     language = models.CharField(max_length=50, default="English")
     pages = models.IntegerField(null=True, blank=True)
     abstract = models.TextField(blank=True)
     summary = models.TextField(blank=True)
     cover_image = models.ImageField(upload_to="covers/", blank=True, null=True)
+    # SHA-256 of cover_image once its thumbnails exist (see catalog.thumbnails)
+    cover_digest = models.CharField(max_length=64, blank=True, editable=False)
     call_number = models.CharField(max_length=100, blank=True)
 
     # Metadata
@@ -107,6 +113,9 @@ class Publication(models.Model):
             models.Index(fields=["title"]),
             models.Index(fields=["call_number"]),
             models.Index(fields=["normalized_isbn"]),
+            models.Index(fields=["isbn13"], name="catalog_pub_isbn13_idx"),
+            # Keyset order for --since exports and OAI-PMH harvesting
+            models.Index(fields=["date_updated", "id"], name="catalog_pub_updated_id_idx"),
         ]
 
     def __str__(self):
@@ -119,12 +128,20 @@ class Publication(models.Model):
         """Return comma-separated list of authors"""
         return ", ".join([str(author) for author in self.authors.all()])
 
+    def clean_fields(self, exclude=None):
+        # ISBNs catalogued before check digits were validated are only checked once edited,
+        # so the record's other fields stay editable
+        if self.pk and self.isbn == Publication.objects.filter(pk=self.pk).values_list("isbn", flat=True).first():
+            exclude = {*(exclude or ()), "isbn"}
+        super().clean_fields(exclude=exclude)
+
     def save(self, *args, **kwargs):
-        # Normalize ISBN for consistent lookups: remove hyphens/spaces
-        if self.isbn:
-            self.normalized_isbn = self.isbn.replace("-", "").replace(" ", "")
-        else:
-            self.normalized_isbn = ""
+        # Normalize ISBN for consistent lookups: remove hyphens/spaces, canonical ISBN-13 key
+        self.normalized_isbn = compact_isbn(self.isbn)
+        self.isbn13 = to_isbn13(self.isbn) or ""
+        # A new or removed cover invalidates the rendered thumbnails
+        if not self.cover_image or not self.cover_image._committed:
+            self.cover_digest = ""
         super().save(*args, **kwargs)
 
     def get_available_copies_count(self):
@@ -154,7 +171,7 @@ class Publication(models.Model):
         return self.reviews.count()
 
 
-class Item(models.Model):
+class Item(VersionedModel):
     """Physical or digital copy of a publication"""
 
     STATUS_CHOICES = [
@@ -183,6 +200,9 @@ class Item(models.Model):
     times_borrowed = models.IntegerField(default=0)
     last_borrowed_date = models.DateTimeField(null=True, blank=True)
 
+    # Last change, e.g. of status; catalog delta exports pick up availability changes from it
+    date_updated = models.DateTimeField(auto_now=True, db_index=True)
+
     class Meta:
         ordering = ["barcode"]
         indexes = [
@@ -363,3 +383,37 @@ class ReadingProgress(models.Model):
     def get_progress_percentage(self):
         """Get reading progress as percentage"""
         return self.percentage_complete
+
+
+class BackfillCheckpoint(models.Model):
+    """Progress of a chunked backfill (catalog.backfill), so an interrupted run resumes where it stopped"""
+
+    name = models.CharField(max_length=100, unique=True)
+    last_pk = models.BigIntegerField(default=0, help_text="Highest primary key processed")
+    rows_scanned = models.BigIntegerField(default=0)
+    rows_updated = models.BigIntegerField(default=0)
+    started_date = models.DateTimeField(default=timezone.now)
+    updated_date = models.DateTimeField(default=timezone.now)
+    completed_date = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self):
+        state = "complete" if self.completed_date else f"at pk {self.last_pk}"
+        return f"{self.name} ({state})"
+
+
+class PublicationTombstone(models.Model):
+    """A deleted publication, kept so incremental catalog exports (catalog.export) can report the deletion"""
+
+    publication_id = models.BigIntegerField(db_index=True)
+    isbn13 = models.CharField(max_length=13, blank=True)
+    title = models.CharField(max_length=500)
+    deleted_date = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        ordering = ["deleted_date"]
+
+    def __str__(self):
+        return f"{self.title} (deleted {self.deleted_date:%Y-%m-%d})"
@@ -0,0 +1,370 @@
+"""
+OAI-PMH 2.0 provider for partner harvesters.
+
+Serves Identify, ListMetadataFormats, ListSets, ListIdentifiers, ListRecords
+and GetRecord at /oai/, with Dublin Core (oai_dc) records for publications.
+
+Records are listed in (datestamp, id) order, where the datestamp is
+``Publication.date_updated``, and each page is fetched with a keyset seek on
+the (date_updated, id) index::
+
+    WHERE date_updated > :d OR (date_updated = :d AND id > :id) ORDER BY date_updated, id LIMIT n + 1
+
+The resumption token carries the request arguments and the (datestamp, id) of
+the last record sent, so page 10,000 of a full harvest costs the same as the
+first and records changed during a harvest are sent again at the end instead of
+being skipped. Tokens do not expire.
+
+Deleted publications come from ``PublicationTombstone`` (see catalog.export)
+and are merged into the same order as headers with status="deleted"; the
+repository declares persistent deletion support.
+"""
+
+import base64
+import binascii
+import json
+import re
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from xml.sax.saxutils import escape, quoteattr
+
+from django.conf import settings
+from django.db.models import Min, Q
+from django.http import HttpResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+
+from elibrary.db_router import read_from_replica
+from .models import Publication, PublicationTombstone
+
+METADATA_PREFIX = "oai_dc"
+OAI_DC_NAMESPACE = "http://www.openarchives.org/OAI/2.0/oai_dc/"
+OAI_DC_SCHEMA = "http://www.openarchives.org/OAI/2.0/oai_dc.xsd"
+DC_NAMESPACE = "http://purl.org/dc/elements/1.1/"
+DATESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+# Arguments each verb accepts (required, optional); resumptionToken is exclusive
+VERB_ARGUMENTS = {
+    "Identify": (set(), set()),
+    "ListMetadataFormats": (set(), {"identifier"}),
+    "ListSets": (set(), {"resumptionToken"}),
+    "GetRecord": ({"identifier", "metadataPrefix"}, set()),
+    "ListIdentifiers": ({"metadataPrefix"}, {"from", "until", "set", "resumptionToken"}),
+    "ListRecords": ({"metadataPrefix"}, {"from", "until", "set", "resumptionToken"}),
+}
+
+_XML_ILLEGAL = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_DAY = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_SECOND = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}Z$")
+
+
+class OAIError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def _text(value):
+    return escape(_XML_ILLEGAL.sub("", str(value)))
+
+
+def datestamp(moment):
+    return moment.astimezone(dt_timezone.utc).strftime(DATESTAMP_FORMAT)
+
+
+def oai_identifier(pk):
+    return f"oai:{settings.OAI_REPOSITORY_IDENTIFIER}:{pk}"
+
+
+def _publication_pk(identifier):
+    prefix = f"oai:{settings.OAI_REPOSITORY_IDENTIFIER}:"
+    if identifier.startswith(prefix) and identifier[len(prefix):].isdigit():
+        return int(identifier[len(prefix):])
+    return None
+
+
+def _parse_datestamp(value, argument):
+    """(aware datetime, granularity) for a from/until argument"""
+    try:
+        if _DAY.match(value):
+            return datetime.combine(datetime.fromisoformat(value).date(), time.min, dt_timezone.utc), "day"
+        if _SECOND.match(value):
+            return datetime.strptime(value, DATESTAMP_FORMAT).replace(tzinfo=dt_timezone.utc), "second"
+    except ValueError:
+        pass
+    raise OAIError("badArgument", f"Invalid {argument} datestamp {value!r}")
+
+
+def encode_token(arguments, last):
+    payload = json.dumps([arguments, [last[0].isoformat(), last[1]]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_token(token):
+    """(arguments, (datestamp, id)) from a resumption token; raises badResumptionToken"""
+    try:
+        arguments, (moment, pk) = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        if arguments.get("metadataPrefix") != METADATA_PREFIX:
+            raise ValueError(arguments)
+        for bound in ("from", "until"):
+            if bound in arguments:
+                datetime.fromisoformat(arguments[bound])
+        return arguments, (datetime.fromisoformat(moment), int(pk))
+    except (binascii.Error, ValueError, TypeError, AttributeError):
+        raise OAIError("badResumptionToken", "The resumption token is invalid")
+
+
+# Records
+
+
+def _header(pk, moment, deleted=False):
+    status = ' status="deleted"' if deleted else ""
+    return (
+        f"<header{status}><identifier>{oai_identifier(pk)}</identifier>"
+        f"<datestamp>{datestamp(moment)}</datestamp></header>"
+    )
+
+
+def dublin_core(publication, request):
+    """oai_dc metadata element for a publication (authors, subjects, type and publisher preloaded)"""
+    elements = []
+
+    def add(name, value):
+        if value:
+            elements.append(f"<dc:{name}>{_text(value)}</dc:{name}>")
+
+    title = f"{publication.title}: {publication.subtitle}" if publication.subtitle else publication.title
+    add("title", title)
+    for author in publication.authors.all():
+        add("creator", str(author))
+    for subject in publication.subjects.all():
+        add("subject", subject.name)
+    add("description", publication.abstract)
+    add("publisher", publication.publisher.name if publication.publisher else "")
+    add("date", publication.publication_date.isoformat() if publication.publication_date else "")
+    add("type", publication.publication_type.name)
+    add("format", f"{publication.pages} pages" if publication.pages else "")
+    add("identifier", request.build_absolute_uri(publication.get_absolute_url()))
+    add("identifier", f"urn:isbn:{publication.isbn13}" if publication.isbn13 else "")
+    add("language", publication.language)
+    return (
+        f'<metadata><oai_dc:dc xmlns:oai_dc="{OAI_DC_NAMESPACE}" xmlns:dc="{DC_NAMESPACE}" '
+        f'xsi:schemaLocation="{OAI_DC_NAMESPACE} {OAI_DC_SCHEMA}">{"".join(elements)}</oai_dc:dc></metadata>'
+    )
+
+
+def _publications(with_metadata):
+    queryset = Publication.objects.all()
+    if with_metadata:
+        return queryset.select_related("publication_type", "publisher").prefetch_related("authors", "subjects")
+    return queryset.only("id", "date_updated")
+
+
+def _record(entry, request, with_metadata):
+    moment, pk, obj = entry
+    if isinstance(obj, PublicationTombstone):
+        header = _header(pk, moment, deleted=True)
+        return f"<record>{header}</record>" if with_metadata else header
+    header = _header(pk, moment)
+    return f"<record>{header}{dublin_core(obj, request)}</record>" if with_metadata else header
+
+
+def _page(arguments, after, with_metadata):
+    """
+    Up to OAI_PAGE_SIZE (datestamp, id, object) entries after ``after``, merging
+    publications and tombstones, and whether more follow.
+    """
+    size = settings.OAI_PAGE_SIZE
+    publications = _publications(with_metadata)
+    tombstones = PublicationTombstone.objects.all()
+    if arguments.get("from"):
+        start = datetime.fromisoformat(arguments["from"])
+        publications = publications.filter(date_updated__gte=start)
+        tombstones = tombstones.filter(deleted_date__gte=start)
+    if arguments.get("until"):
+        end = datetime.fromisoformat(arguments["until"])
+        publications = publications.filter(date_updated__lt=end)
+        tombstones = tombstones.filter(deleted_date__lt=end)
+    if after:
+        moment, pk = after
+        publications = publications.filter(Q(date_updated__gt=moment) | Q(date_updated=moment, pk__gt=pk))
+        tombstones = tombstones.filter(Q(deleted_date__gt=moment) | Q(deleted_date=moment, publication_id__gt=pk))
+
+    entries = [(p.date_updated, p.pk, p) for p in publications.order_by("date_updated", "pk")[: size + 1]]
+    entries += [
+        (t.deleted_date, t.publication_id, t)
+        for t in tombstones.order_by("deleted_date", "publication_id")[: size + 1]
+    ]
+    entries.sort(key=lambda entry: entry[:2])
+    return entries[:size], len(entries) > size
+
+
+# Verbs
+
+
+def _identify(request, arguments):
+    earliest = [
+        Publication.objects.aggregate(earliest=Min("date_updated"))["earliest"],
+        PublicationTombstone.objects.aggregate(earliest=Min("deleted_date"))["earliest"],
+    ]
+    earliest = min((moment for moment in earliest if moment), default=timezone.now())
+    return (
+        "<Identify>"
+        f"<repositoryName>{_text(settings.LIBRARY_NAME)}</repositoryName>"
+        f"<baseURL>{_text(request.build_absolute_uri(request.path))}</baseURL>"
+        "<protocolVersion>2.0</protocolVersion>"
+        f"<adminEmail>{_text(settings.OAI_ADMIN_EMAIL)}</adminEmail>"
+        f"<earliestDatestamp>{datestamp(earliest)}</earliestDatestamp>"
+        "<deletedRecord>persistent</deletedRecord>"
+        "<granularity>YYYY-MM-DDThh:mm:ssZ</granularity>"
+        "</Identify>"
+    )
+
+
+def _list_metadata_formats(request, arguments):
+    if "identifier" in arguments:
+        pk = _publication_pk(arguments["identifier"])
+        exists = pk is not None and (
+            Publication.objects.filter(pk=pk).exists() or PublicationTombstone.objects.filter(publication_id=pk).exists()
+        )
+        if not exists:
+            raise OAIError("idDoesNotExist", f"No record {arguments['identifier']}")
+    return (
+        "<ListMetadataFormats><metadataFormat>"
+        f"<metadataPrefix>{METADATA_PREFIX}</metadataPrefix><schema>{OAI_DC_SCHEMA}</schema>"
+        f"<metadataNamespace>{OAI_DC_NAMESPACE}</metadataNamespace>"
+        "</metadataFormat></ListMetadataFormats>"
+    )
+
+
+def _list_sets(request, arguments):
+    raise OAIError("noSetHierarchy", "This repository does not support sets")
+
+
+def _check_prefix(arguments):
+    if arguments["metadataPrefix"] != METADATA_PREFIX:
+        raise OAIError("cannotDisseminateFormat", f"Unsupported metadataPrefix {arguments['metadataPrefix']!r}")
+
+
+def _get_record(request, arguments):
+    _check_prefix(arguments)
+    pk = _publication_pk(arguments["identifier"])
+    publication = _publications(True).filter(pk=pk).first() if pk is not None else None
+    if publication is not None:
+        return f"<GetRecord>{_record((publication.date_updated, pk, publication), request, True)}</GetRecord>"
+    tombstone = PublicationTombstone.objects.filter(publication_id=pk).first() if pk is not None else None
+    if tombstone is None:
+        raise OAIError("idDoesNotExist", f"No record {arguments['identifier']}")
+    return f"<GetRecord>{_record((tombstone.deleted_date, pk, tombstone), request, True)}</GetRecord>"
+
+
+def _list(verb, with_metadata):
+    def handler(request, arguments):
+        token = arguments.get("resumptionToken")
+        if token:
+            arguments, after = decode_token(token)
+        else:
+            _check_prefix(arguments)
+            if "set" in arguments:
+                raise OAIError("noSetHierarchy", "This repository does not support sets")
+            arguments, after = _range_arguments(arguments), None
+
+        entries, more = _page(arguments, after, with_metadata)
+        if not entries and not token:
+            raise OAIError("noRecordsMatch", "No records match the request")
+        body = "".join(_record(entry, request, with_metadata) for entry in entries)
+        if more:
+            body += f"<resumptionToken>{encode_token(arguments, entries[-1][:2])}</resumptionToken>"
+        elif token:
+            body += "<resumptionToken/>"
+        return f"<{verb}>{body}</{verb}>"
+
+    return handler
+
+
+def _range_arguments(arguments):
+    """from (inclusive) and until (exclusive) as ISO datetimes for the token"""
+    selected = {"metadataPrefix": arguments["metadataPrefix"]}
+    granularities = set()
+    if arguments.get("from"):
+        start, granularity = _parse_datestamp(arguments["from"], "from")
+        selected["from"] = start.isoformat()
+        granularities.add(granularity)
+    if arguments.get("until"):
+        end, granularity = _parse_datestamp(arguments["until"], "until")
+        # until is inclusive at its granularity
+        end += timedelta(days=1) if granularity == "day" else timedelta(seconds=1)
+        selected["until"] = end.isoformat()
+        granularities.add(granularity)
+    if len(granularities) > 1:
+        raise OAIError("badArgument", "from and until must have the same granularity")
+    if "from" in selected and "until" in selected and selected["from"] >= selected["until"]:
+        raise OAIError("noRecordsMatch", "from is after until")
+    return selected
+
+
+VERBS = {
+    "Identify": _identify,
+    "ListMetadataFormats": _list_metadata_formats,
+    "ListSets": _list_sets,
+    "GetRecord": _get_record,
+    "ListIdentifiers": _list("ListIdentifiers", with_metadata=False),
+    "ListRecords": _list("ListRecords", with_metadata=True),
+}
+
+
+def _validated_arguments(params):
+    """The verb and its arguments; raises badVerb/badArgument"""
+    if any(len(values) > 1 for _, values in params.lists()):
+        raise OAIError("badArgument", "Arguments may not be repeated")
+    arguments = params.dict()
+    verb = arguments.pop("verb", None)
+    if verb not in VERBS:
+        raise OAIError("badVerb", "Missing or illegal verb")
+    required, optional = VERB_ARGUMENTS[verb]
+    unknown = set(arguments) - required - optional
+    if unknown:
+        raise OAIError("badArgument", f"Illegal argument: {', '.join(sorted(unknown))}")
+    if "resumptionToken" in arguments:
+        if len(arguments) > 1:
+            raise OAIError("badArgument", "resumptionToken is an exclusive argument")
+    elif required - set(arguments):
+        raise OAIError("badArgument", f"Missing argument: {', '.join(sorted(required - set(arguments)))}")
+    return verb, arguments
+
+
+def _response(request, body, verb=None, arguments=None):
+    attributes = ""
+    if verb:
+        attributes = f" verb={quoteattr(verb)}" + "".join(
+            f" {name}={quoteattr(value)}" for name, value in sorted(arguments.items())
+        )
+    xml = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/" '
+        'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+        'xsi:schemaLocation="http://www.openarchives.org/OAI/2.0/ http://www.openarchives.org/OAI/2.0/OAI-PMH.xsd">'
+        f"<responseDate>{datestamp(timezone.now())}</responseDate>"
+        f"<request{attributes}>{_text(request.build_absolute_uri(request.path))}</request>"
+        f"{body}</OAI-PMH>\n"
+    )
+    return HttpResponse(xml, content_type="text/xml; charset=utf-8")
+
+
+@csrf_exempt
+@require_http_methods(["GET", "POST"])
+@read_from_replica
+def endpoint(request):
+    """OAI-PMH request handler"""
+    params = request.POST if request.method == "POST" else request.GET
+    try:
+        verb, arguments = _validated_arguments(params)
+    except OAIError as e:
+        # badVerb/badArgument responses do not echo the arguments
+        return _response(request, f'<error code="{e.code}">{_text(e.message)}</error>')
+    try:
+        body = VERBS[verb](request, dict(arguments))
+    except OAIError as e:
+        body = f'<error code="{e.code}">{_text(e.message)}</error>'
+    return _response(request, body, verb, arguments)
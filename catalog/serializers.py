@@ -0,0 +1,199 @@
+"""
+JSON representations for the read API (catalog.api), with a per-object cache.
+
+Each ``Resource`` turns model instances into plain dicts. ``serialize`` takes
+the rows of a page (only their primary key and ``date_updated`` are needed),
+reads their representations from the cache in one ``get_many`` and builds the
+misses with a single select_related/prefetch_related query, so a warm page
+costs one query for the keyset page itself.
+
+Cache keys of publications and items include ``date_updated``, so a write that
+moves it retires the cached entry. ``save()`` sets it automatically; queryset
+``.update()`` and ``bulk_update()`` skip ``auto_now``, so the catalog's bulk
+writers (ingest_covers, ``backfill``, hold allocation) set the column
+themselves, and any that does not keeps serving the old entry for up to
+API_CACHE_TIMEOUT. catalog.signals keeps related data current: saving an
+author, subject, publisher or publication type, or changing a publication's
+authors or subjects, touches the affected publications' ``date_updated``, and
+saving a location touches its items.
+
+Authors, subjects and locations have no timestamp. Their keys include a
+per-object generation kept in the cache (elibrary.page_cache.generations),
+bumped when the row is saved or deleted, so every worker sharing the cache
+sees the change. A per-process cache (no ELIBRARY_CACHE_URL) cannot see
+another worker's bump, so there their entries live at most
+UNSHARED_CACHE_TIMEOUT seconds.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.urls import reverse
+
+from elibrary.page_cache import bump_generations, generations
+from .models import Author, Item, Location, Publication, Subject
+
+# Lifetime of untimestamped entries when each worker has its own cache
+UNSHARED_CACHE_TIMEOUT = 300
+
+
+class Resource:
+    """How one model is represented in the API"""
+
+    def __init__(self, name, model, represent, fields, select_related=(), prefetch_related=()):
+        self.name = name
+        self.model = model
+        self.represent = represent
+        # Field names of the representation, for ?fields= selection
+        self.fields = list(fields)
+        self.select_related = list(select_related)
+        self.prefetch_related = list(prefetch_related)
+        self.timestamped = any(field.name == "date_updated" for field in model._meta.get_fields())
+
+    def page_queryset(self):
+        """Rows for keyset pages: just enough to find the cached representations"""
+        columns = ["id", "date_updated"] if self.timestamped else ["id"]
+        return self.model._default_manager.only(*columns)
+
+    def full_queryset(self):
+        return (
+            self.model._default_manager.select_related(*self.select_related)
+            .prefetch_related(*self.prefetch_related)
+        )
+
+    def _generation_scope(self, pk):
+        return f"api:{self.name}:{pk}"
+
+    def cache_keys(self, rows):
+        """Cache key of each row, by primary key"""
+        if self.timestamped:
+            return {row.pk: f"api:v1:{self.name}:{row.pk}:{row.date_updated.timestamp()}" for row in rows}
+        pks = [row.pk for row in rows]
+        current = generations([self._generation_scope(pk) for pk in pks])
+        return {pk: f"api:v1:{self.name}:{pk}:{generation}" for pk, generation in zip(pks, current)}
+
+    def cache_key(self, obj):
+        return self.cache_keys([obj])[obj.pk]
+
+    def cache_timeout(self):
+        if self.timestamped or settings.CACHE_URL:
+            return settings.API_CACHE_TIMEOUT
+        return min(settings.API_CACHE_TIMEOUT, UNSHARED_CACHE_TIMEOUT)
+
+    def serialize(self, rows):
+        """Representations of ``rows`` in order; rows deleted meanwhile are left out"""
+        keys = self.cache_keys(rows)
+        found = cache.get_many(keys.values())
+        missing = [pk for pk, key in keys.items() if key not in found]
+        if missing:
+            fresh = {keys[obj.pk]: self.represent(obj) for obj in self.full_queryset().filter(pk__in=missing)}
+            cache.set_many(fresh, self.cache_timeout())
+            found.update(fresh)
+        return [found[keys[row.pk]] for row in rows if keys[row.pk] in found]
+
+    def invalidate(self, pks):
+        """Retire cached entries of an untimestamped resource when the current transaction commits"""
+        scopes = [self._generation_scope(pk) for pk in pks]
+        transaction.on_commit(lambda: bump_generations(scopes))
+
+
+def _date(value):
+    return value.isoformat() if value else None
+
+
+def represent_publication(publication):
+    return {
+        "id": publication.pk,
+        "url": reverse("catalog:api_publication", args=[publication.pk]),
+        "title": publication.title,
+        "subtitle": publication.subtitle,
+        "authors": [
+            {"id": author.pk, "first_name": author.first_name, "last_name": author.last_name}
+            for author in publication.authors.all()
+        ],
+        "subjects": [{"id": subject.pk, "name": subject.name} for subject in publication.subjects.all()],
+        "publication_type": {
+            "id": publication.publication_type.pk,
+            "code": publication.publication_type.code,
+            "name": publication.publication_type.name,
+        },
+        "publisher": (
+            {"id": publication.publisher.pk, "name": publication.publisher.name} if publication.publisher else None
+        ),
+        "publication_date": _date(publication.publication_date),
+        "edition": publication.edition,
+        "isbn": publication.isbn,
+        "isbn13": publication.isbn13,
+        "language": publication.language,
+        "pages": publication.pages,
+        "abstract": publication.abstract,
+        "summary": publication.summary,
+        "call_number": publication.call_number,
+        "cover_image": publication.cover_image.url if publication.cover_image else None,
+        "date_added": _date(publication.date_added),
+        "date_updated": _date(publication.date_updated),
+    }
+
+
+def represent_item(item):
+    return {
+        "id": item.pk,
+        "url": reverse("catalog:api_item", args=[item.pk]),
+        "publication_id": item.publication_id,
+        "barcode": item.barcode,
+        "location": {"id": item.location.pk, "code": item.location.code, "name": item.location.name},
+        "status": item.status,
+        "condition": item.condition,
+        "date_updated": _date(item.date_updated),
+    }
+
+
+def represent_author(author):
+    return {
+        "id": author.pk,
+        "url": reverse("catalog:api_author", args=[author.pk]),
+        "first_name": author.first_name,
+        "last_name": author.last_name,
+        "bio": author.bio,
+    }
+
+
+def represent_subject(subject):
+    return {"id": subject.pk, "url": reverse("catalog:api_subject", args=[subject.pk]), "name": subject.name}
+
+
+def represent_location(location):
+    return {
+        "id": location.pk,
+        "url": reverse("catalog:api_location", args=[location.pk]),
+        "name": location.name,
+        "code": location.code,
+        "description": location.description,
+        "is_physical": location.is_physical,
+    }
+
+
+PUBLICATIONS = Resource(
+    "publication",
+    Publication,
+    represent_publication,
+    [
+        "id", "url", "title", "subtitle", "authors", "subjects", "publication_type", "publisher",
+        "publication_date", "edition", "isbn", "isbn13", "language", "pages", "abstract", "summary",
+        "call_number", "cover_image", "date_added", "date_updated",
+    ],
+    select_related=["publication_type", "publisher"],
+    prefetch_related=["authors", "subjects"],
+)
+ITEMS = Resource(
+    "item",
+    Item,
+    represent_item,
+    ["id", "url", "publication_id", "barcode", "location", "status", "condition", "date_updated"],
+    select_related=["location"],
+)
+AUTHORS = Resource("author", Author, represent_author, ["id", "url", "first_name", "last_name", "bio"])
+SUBJECTS = Resource("subject", Subject, represent_subject, ["id", "url", "name"])
+LOCATIONS = Resource(
+    "location", Location, represent_location, ["id", "url", "name", "code", "description", "is_physical"]
+)
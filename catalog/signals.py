@@ -0,0 +1,158 @@
+"""
+Catalog signal handlers.
+
+Deletions are logged as tombstones for delta exports and OAI-PMH; deleting an
+item touches its publication instead. Changes to
+data a publication or item is published with - its authors, subjects,
+publisher, type or location - touch the row's ``date_updated``, so export
+deltas, OAI-PMH harvests and the read API's cache keys and ETags
+(catalog.serializers) all see the change. The same changes invalidate the
+anonymous page cache for exactly the pages that show them (catalog.cached_pages).
+"""
+
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Author, Item, Location, Publication, PublicationTombstone, PublicationType, Publisher, Subject
+from .cached_pages import (
+    CATALOG_SCOPE,
+    INDEX_SCOPE,
+    author_scope,
+    invalidate_pages,
+    invalidate_publication_pages,
+    subject_scope,
+    type_scope,
+)
+from .serializers import AUTHORS, LOCATIONS, SUBJECTS
+
+
+def touch_publications(queryset):
+    Publication.objects.filter(pk__in=queryset.values("pk")).update(date_updated=timezone.now())
+
+
+@receiver(post_delete, sender=Publication, dispatch_uid="catalog_publication_tombstone")
+def record_tombstone(sender, instance, **kwargs):
+    """Log the deletion for delta exports; covers instance, queryset and admin deletes"""
+    PublicationTombstone.objects.create(publication_id=instance.pk, isbn13=instance.isbn13, title=instance.title)
+
+
+@receiver(post_delete, sender=Item, dispatch_uid="catalog_item_deleted")
+def touch_item_publication(sender, instance, **kwargs):
+    # A deleted item leaves no row with a date_updated, so its publication carries the change
+    touch_publications(Publication.objects.filter(pk=instance.publication_id))
+
+
+@receiver(m2m_changed, sender=Publication.authors.through, dispatch_uid="catalog_publication_authors_changed")
+@receiver(m2m_changed, sender=Publication.subjects.through, dispatch_uid="catalog_publication_subjects_changed")
+def touch_on_m2m_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # instance is the author/subject; pk_set holds publications (None on clear)
+        if action in ("post_add", "post_remove"):
+            touch_publications(Publication.objects.filter(pk__in=pk_set))
+        elif action == "pre_clear":
+            field = "authors" if sender is Publication.authors.through else "subjects"
+            touch_publications(Publication.objects.filter(**{field: instance}))
+    elif action in ("post_add", "post_remove", "post_clear"):
+        touch_publications(Publication.objects.filter(pk=instance.pk))
+
+
+_PUBLICATION_LOOKUPS = {
+    Author: "authors",
+    Subject: "subjects",
+    Publisher: "publisher",
+    PublicationType: "publication_type",
+}
+
+
+@receiver(post_save, sender=Author, dispatch_uid="catalog_author_saved")
+@receiver(post_save, sender=Subject, dispatch_uid="catalog_subject_saved")
+@receiver(post_save, sender=Publisher, dispatch_uid="catalog_publisher_saved")
+@receiver(post_save, sender=PublicationType, dispatch_uid="catalog_publication_type_saved")
+@receiver(pre_delete, sender=Author, dispatch_uid="catalog_author_deleted")
+@receiver(pre_delete, sender=Subject, dispatch_uid="catalog_subject_deleted")
+@receiver(pre_delete, sender=Publisher, dispatch_uid="catalog_publisher_deleted")
+def touch_related_publications(sender, instance, created=False, **kwargs):
+    if not created:
+        touch_publications(Publication.objects.filter(**{_PUBLICATION_LOOKUPS[sender]: instance}))
+    if sender is Author:
+        AUTHORS.invalidate([instance.pk])
+    elif sender is Subject:
+        SUBJECTS.invalidate([instance.pk])
+
+
+@receiver(post_save, sender=Location, dispatch_uid="catalog_location_saved")
+@receiver(post_delete, sender=Location, dispatch_uid="catalog_location_deleted")
+def touch_location_items(sender, instance, created=False, **kwargs):
+    if not created:
+        Item.objects.filter(location=instance).update(date_updated=timezone.now())
+    LOCATIONS.invalidate([instance.pk])
+
+
+@receiver(pre_save, sender=Publication, dispatch_uid="catalog_publication_pages_pre_save")
+def remember_publication_type(sender, instance, raw=False, **kwargs):
+    # A type change also changes the old type's browse page and the home page counts
+    instance._saved_publication_type_id = (
+        Publication.objects.filter(pk=instance.pk).values_list("publication_type_id", flat=True).first()
+        if instance.pk and not raw
+        else None
+    )
+
+
+@receiver(post_save, sender=Publication, dispatch_uid="catalog_publication_pages_saved")
+def invalidate_publication_saved(sender, instance, created, **kwargs):
+    extra = set()
+    saved_type_id = getattr(instance, "_saved_publication_type_id", None)
+    if created or (saved_type_id and saved_type_id != instance.publication_type_id):
+        extra = {INDEX_SCOPE, type_scope(saved_type_id)} if saved_type_id else {INDEX_SCOPE}
+    invalidate_publication_pages([instance.pk], extra)
+
+
+@receiver(pre_delete, sender=Publication, dispatch_uid="catalog_publication_pages_deleted")
+def invalidate_publication_deleted(sender, instance, **kwargs):
+    invalidate_publication_pages([instance.pk], {INDEX_SCOPE})
+
+
+@receiver(m2m_changed, sender=Publication.authors.through, dispatch_uid="catalog_publication_authors_pages")
+@receiver(m2m_changed, sender=Publication.subjects.through, dispatch_uid="catalog_publication_subjects_pages")
+def invalidate_m2m_pages(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    is_authors = sender is Publication.authors.through
+    scope = author_scope if is_authors else subject_scope
+    if reverse:
+        if action == "pre_clear":
+            pk_set = set(instance.publications.values_list("pk", flat=True))
+        invalidate_publication_pages(pk_set, {scope(instance.pk)})
+    else:
+        # Removed authors/subjects are no longer linked, so name their pages explicitly
+        invalidate_publication_pages([instance.pk], {scope(pk) for pk in pk_set or ()})
+
+
+@receiver(post_save, sender=Item, dispatch_uid="catalog_item_pages_saved")
+@receiver(post_delete, sender=Item, dispatch_uid="catalog_item_pages_deleted")
+def invalidate_item_pages(sender, instance, **kwargs):
+    invalidate_publication_pages([instance.publication_id])
+
+
+@receiver(post_save, sender=Author, dispatch_uid="catalog_author_pages_saved")
+@receiver(pre_delete, sender=Author, dispatch_uid="catalog_author_pages_deleted")
+def invalidate_author_pages(sender, instance, **kwargs):
+    invalidate_publication_pages(instance.publications.values_list("pk", flat=True), {author_scope(instance.pk)})
+
+
+@receiver(post_save, sender=Subject, dispatch_uid="catalog_subject_pages_saved")
+@receiver(pre_delete, sender=Subject, dispatch_uid="catalog_subject_pages_deleted")
+def invalidate_subject_pages(sender, instance, **kwargs):
+    invalidate_publication_pages(instance.publications.values_list("pk", flat=True), {subject_scope(instance.pk)})
+
+
+@receiver(post_save, sender=Location, dispatch_uid="catalog_location_pages_saved")
+@receiver(post_delete, sender=Location, dispatch_uid="catalog_location_pages_deleted")
+@receiver(post_save, sender=Publisher, dispatch_uid="catalog_publisher_pages_saved")
+@receiver(post_delete, sender=Publisher, dispatch_uid="catalog_publisher_pages_deleted")
+@receiver(post_save, sender=PublicationType, dispatch_uid="catalog_publication_type_pages_saved")
+@receiver(post_delete, sender=PublicationType, dispatch_uid="catalog_publication_type_pages_deleted")
+def invalidate_catalog_pages(sender, instance, **kwargs):
+    # Shown on most pages and rarely edited: retire them all
+    invalidate_pages({CATALOG_SCOPE})
@@ -0,0 +1,35 @@
+from celery import shared_task
+from .cached_pages import invalidate_publication_pages
+from .models import Publication
+from .thumbnails import UNRENDERABLE, generate_renditions
+import logging
+
+
+@shared_task
+def generate_cover_thumbnails(publication_id):
+    """
+    Render the list/card/detail thumbnails for a publication's cover
+    Runs after a cover upload, or the first time a page shows a cover without thumbnails
+    """
+    publication = Publication.objects.filter(pk=publication_id).only("cover_image").first()
+    if publication is None or not publication.cover_image:
+        return f"Publication {publication_id} has no cover"
+
+    try:
+        digest = generate_renditions(publication.cover_image)
+    except OSError as e:
+        # Missing file, or a format Pillow cannot read (e.g. SVG sample covers). Recorded so
+        # page views stop queueing it; a new upload or generate_thumbnails --all retries.
+        logging.getLogger(__name__).warning("Cannot render cover for publication %s: %s", publication_id, e)
+        Publication.objects.filter(pk=publication_id, cover_image=publication.cover_image.name).update(
+            cover_digest=UNRENDERABLE
+        )
+        return f"Skipped publication {publication_id}: {e}"
+
+    # Only record the digest if the cover was not replaced while rendering
+    if Publication.objects.filter(pk=publication_id, cover_image=publication.cover_image.name).update(
+        cover_digest=digest
+    ):
+        # Cached pages still point at the original image
+        invalidate_publication_pages([publication_id])
+    return f"Rendered thumbnails for publication {publication_id}"
@@ -0,0 +1,47 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from catalog.thumbnails import FORMATS, RENDITIONS, UNRENDERABLE, rendition_url, schedule_thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def cover_picture(publication, size="card", css_class="", style="", sizes=None):
+    """
+    Render a publication's cover as a <picture> with WebP/JPEG srcsets.
+
+    ``size`` picks the rendition used as the fallback src and, unless ``sizes``
+    is given, the displayed width. Covers without thumbnails yet are shown at
+    original size and queued for rendering; unrenderable ones are just shown.
+    """
+    image = publication.cover_image
+    if not image:
+        return ""
+
+    if not publication.cover_digest or publication.cover_digest == UNRENDERABLE:
+        schedule_thumbnails(publication)
+        return format_html(
+            '<img src="{}" class="{}" style="{}" alt="{}" loading="lazy">', image.url, css_class, style, publication.title
+        )
+
+    digest = publication.cover_digest
+    sizes = sizes or f"{RENDITIONS[size]}px"
+
+    def srcset(ext):
+        return ", ".join(f"{rendition_url(digest, name, ext)} {width}w" for name, width in RENDITIONS.items())
+
+    *preferred, fallback = FORMATS
+    sources = format_html_join(
+        "", '<source type="image/{}" srcset="{}" sizes="{}">', ((ext, srcset(ext), sizes) for ext in preferred)
+    )
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" class="{}" style="{}" alt="{}" loading="lazy"></picture>',
+        sources,
+        rendition_url(digest, size, fallback),
+        srcset(fallback),
+        sizes,
+        css_class,
+        style,
+        publication.title,
+    )
@@ -0,0 +1,126 @@
+"""
+Cover image renditions.
+
+Each cover is resized into a few fixed widths (list rows, result cards, the
+detail page) in WebP and JPEG. Files are content-addressed by the SHA-256 of
+the original upload, ``thumbs/<ab>/<digest>-<size>.<ext>``, so re-uploading
+the same image or sharing it between publications reuses the same files and
+they can be cached forever.
+
+Rendering happens in the ``catalog.tasks.generate_cover_thumbnails`` Celery
+task, queued after an upload or the first time a page shows a cover that has
+no renditions yet. Until then pages fall back to the original image. Covers
+Pillow cannot read are marked with the UNRENDERABLE digest so they keep the
+original image and are not queued again until a new cover is uploaded.
+"""
+
+import hashlib
+import io
+import logging
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+# Rendition name -> width in pixels. Height follows the cover's aspect ratio.
+RENDITIONS = {
+    "list": 96,
+    "card": 320,
+    "detail": 640,
+}
+
+# Extension -> (Pillow format, save options), best first
+FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+THUMBNAIL_DIR = "thumbs"
+
+# How long a queued rendering job suppresses further requests for the same cover
+PENDING_TIMEOUT = 600
+
+# cover_digest of a cover that cannot be rendered (missing file, SVG, corrupt image)
+UNRENDERABLE = "unrenderable"
+
+
+def file_digest(field_file):
+    """SHA-256 of an uploaded file, read in chunks"""
+    digest = hashlib.sha256()
+    field_file.open("rb")
+    try:
+        for chunk in field_file.chunks():
+            digest.update(chunk)
+    finally:
+        field_file.close()
+    return digest.hexdigest()
+
+
+def rendition_path(digest, size, ext):
+    return f"{THUMBNAIL_DIR}/{digest[:2]}/{digest}-{size}.{ext}"
+
+
+def generate_renditions(field_file):
+    """
+    Write every size/format rendition of a cover to storage.
+    Returns the content digest; renditions that already exist are not re-rendered.
+    """
+    from PIL import Image, ImageOps
+
+    digest = file_digest(field_file)
+    missing = [
+        (size, ext)
+        for size in RENDITIONS
+        for ext in FORMATS
+        if not default_storage.exists(rendition_path(digest, size, ext))
+    ]
+    if not missing:
+        return digest
+
+    field_file.open("rb")
+    try:
+        with Image.open(field_file) as source:
+            image = ImageOps.exif_transpose(source)
+            image = image.convert("RGB")
+    finally:
+        field_file.close()
+
+    for size, ext in missing:
+        width = min(RENDITIONS[size], image.width)
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.LANCZOS)
+        pil_format, options = FORMATS[ext]
+        buffer = io.BytesIO()
+        resized.save(buffer, pil_format, **options)
+        # Content-addressed, so a concurrent worker writing the same name wrote the same bytes
+        default_storage.save(rendition_path(digest, size, ext), ContentFile(buffer.getvalue()))
+    return digest
+
+
+def rendition_url(digest, size, ext):
+    return default_storage.url(rendition_path(digest, size, ext))
+
+
+def schedule_thumbnails(publication):
+    """
+    Queue rendering for a publication's cover once the current transaction commits.
+    Repeated calls for the same upload within PENDING_TIMEOUT are ignored.
+    """
+    if not publication.cover_image or publication.cover_digest == UNRENDERABLE:
+        return
+    key = f"thumbnails:pending:{publication.pk}:{publication.cover_image.name}"
+    if not cache.add(key, True, PENDING_TIMEOUT):
+        return
+
+    def enqueue():
+        from .tasks import generate_cover_thumbnails
+
+        try:
+            generate_cover_thumbnails.delay(publication.pk)
+        except Exception as e:
+            # A missing broker must not break the upload or the page; the next view retries
+            logging.getLogger(__name__).warning("Could not queue thumbnails for publication %s: %s", publication.pk, e)
+            cache.delete(key)
+
+    transaction.on_commit(enqueue)
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, oai, views
 
 app_name = "catalog"
 
@@ -16,4 +16,16 @@ urlpatterns = [
     path("edit/<int:pk>/", views.edit_publication, name="edit_publication"),
     path("delete/<int:pk>/", views.delete_publication, name="delete_publication"),
     path("add-items/<int:pk>/", views.add_items, name="add_items"),
+    path("oai/", oai.endpoint, name="oai"),
+    path("api/availability/", views.availability, name="availability"),
+    path("api/v1/publications/", api.publications, name="api_publications"),
+    path("api/v1/publications/<int:pk>/", api.publication, name="api_publication"),
+    path("api/v1/items/", api.items, name="api_items"),
+    path("api/v1/items/<int:pk>/", api.item, name="api_item"),
+    path("api/v1/authors/", api.authors, name="api_authors"),
+    path("api/v1/authors/<int:pk>/", api.author, name="api_author"),
+    path("api/v1/subjects/", api.subjects, name="api_subjects"),
+    path("api/v1/subjects/<int:pk>/", api.subject, name="api_subject"),
+    path("api/v1/locations/", api.locations, name="api_locations"),
+    path("api/v1/locations/<int:pk>/", api.location, name="api_location"),
 ]
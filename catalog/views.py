@@ -1,16 +1,38 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.shortcuts import render, get_object_or_404, redirect
 from django.db.models import Q, Count
-from django.core.paginator import Paginator
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_GET
 from .models import Publication, PublicationType, Subject, Author
 from .forms import SearchForm, PublicationForm, ItemForm
+from .cached_pages import (
+    CATALOG_SCOPE,
+    INDEX_SCOPE,
+    RECENT_PUBLICATIONS,
+    author_scope,
+    publication_scope,
+    subject_scope,
+    type_scope,
+)
+from .isbn import to_isbn13
+from .thumbnails import schedule_thumbnails
 from accounts.decorators import admin_required, staff_or_admin_required
+from elibrary.db_router import read_from_replica
+from elibrary.exports import ITERATOR_CHUNK_SIZE, requested_export_format, stream_export
+from elibrary.page_cache import cache_anonymous_page
+from elibrary.pagination import listing_count, paginate_request
 
 
+@cache_anonymous_page(lambda request: [CATALOG_SCOPE, INDEX_SCOPE])
 def index(request):
     """Homepage with featured publications"""
-    recent_publications = Publication.objects.all().order_by("-date_added")[:8]
+    recent_publications = Publication.objects.all().order_by("-date_added")[:RECENT_PUBLICATIONS]
     publication_types = PublicationType.objects.annotate(pub_count=Count("publications")).order_by("name")
 
     context = {
@@ -20,6 +42,7 @@ def index(request):
     return render(request, "catalog/index.html", context)
 
 
+@read_from_replica
 def search(request):
     """Advanced search functionality"""
     form = SearchForm(request.GET or None)
@@ -37,7 +60,7 @@ def search(request):
         # Apply search query
         if query:
             if search_field == "all":
-                publications = publications.filter(
+                matches = (
                     Q(title__icontains=query)
                     | Q(subtitle__icontains=query)
                     | Q(authors__first_name__icontains=query)
@@ -46,7 +69,11 @@ def search(request):
                     | Q(call_number__icontains=query)
                     | Q(isbn__icontains=query)
                     | Q(abstract__icontains=query)
-                ).distinct()
+                )
+                if to_isbn13(query):
+                    # Also find the book when it was catalogued under its other ISBN form
+                    matches |= Q(isbn13=to_isbn13(query))
+                publications = publications.filter(matches).distinct()
             elif search_field == "title":
                 publications = publications.filter(Q(title__icontains=query) | Q(subtitle__icontains=query))
             elif search_field == "author":
@@ -58,7 +85,12 @@ def search(request):
             elif search_field == "call_number":
                 publications = publications.filter(call_number__icontains=query)
             elif search_field == "isbn":
-                publications = publications.filter(isbn__icontains=query)
+                # A complete ISBN (either form) is an exact match on the indexed ISBN-13 key
+                isbn13 = to_isbn13(query)
+                if isbn13:
+                    publications = publications.filter(isbn13=isbn13)
+                else:
+                    publications = publications.filter(isbn__icontains=query)
 
         # Apply filters
         if publication_type:
@@ -76,19 +108,20 @@ def search(request):
         if available_only:
             publications = publications.filter(items__status="available").distinct()
 
-    # Pagination
-    paginator = Paginator(publications.distinct().order_by("title"), 20)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination: later pages cost the same as the first
+    publications = publications.distinct()
+    page_obj = paginate_request(request, publications, ["title", "id"], per_page=20)
 
     context = {
         "form": form,
         "page_obj": page_obj,
-        "total_results": paginator.count,
+        "total_results": listing_count(publications),
     }
     return render(request, "catalog/search.html", context)
 
 
+@cache_anonymous_page(lambda request, pk: [CATALOG_SCOPE, publication_scope(pk)])
+@read_from_replica
 def publication_detail(request, pk):
     """Detailed view of a publication"""
     publication = get_object_or_404(Publication, pk=pk)
@@ -122,14 +155,13 @@ def publication_detail(request, pk):
     return render(request, "catalog/publication_detail.html", context)
 
 
+@cache_anonymous_page(lambda request, type_id: [CATALOG_SCOPE, type_scope(type_id)])
+@read_from_replica
 def browse_by_type(request, type_id):
     """Browse publications by type"""
     publication_type = get_object_or_404(PublicationType, pk=type_id)
-    publications = Publication.objects.filter(publication_type=publication_type).order_by("title")
-
-    paginator = Paginator(publications, 20)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    publications = Publication.objects.filter(publication_type=publication_type)
+    page_obj = paginate_request(request, publications, ["title", "id"], per_page=20)
 
     context = {
         "publication_type": publication_type,
@@ -140,14 +172,13 @@ def browse_by_type(request, type_id):
     return render(request, "catalog/browse_results.html", context)
 
 
+@cache_anonymous_page(lambda request, subject_id: [CATALOG_SCOPE, subject_scope(subject_id)])
+@read_from_replica
 def browse_by_subject(request, subject_id):
     """Browse publications by subject"""
     subject = get_object_or_404(Subject, pk=subject_id)
-    publications = Publication.objects.filter(subjects=subject).order_by("title")
-
-    paginator = Paginator(publications, 20)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    publications = Publication.objects.filter(subjects=subject)
+    page_obj = paginate_request(request, publications, ["title", "id"], per_page=20)
 
     context = {
         "subject": subject,
@@ -158,14 +189,13 @@ def browse_by_subject(request, subject_id):
     return render(request, "catalog/browse_results.html", context)
 
 
+@cache_anonymous_page(lambda request, author_id: [CATALOG_SCOPE, author_scope(author_id)])
+@read_from_replica
 def browse_by_author(request, author_id):
     """Browse publications by author"""
     author = get_object_or_404(Author, pk=author_id)
-    publications = Publication.objects.filter(authors=author).order_by("title")
-
-    paginator = Paginator(publications, 20)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    publications = Publication.objects.filter(authors=author)
+    page_obj = paginate_request(request, publications, ["title", "id"], per_page=20)
 
     context = {
         "author": author,
@@ -192,14 +222,29 @@ def manage_publications(request):
     if type_filter:
         publications = publications.filter(publication_type_id=type_filter)
 
-    paginator = Paginator(publications, 25)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    export_format = requested_export_format(request)
+    if export_format:
+        rows = (
+            [
+                publication.title,
+                publication.publication_type.name,
+                publication.isbn,
+                publication.call_number,
+                publication.publication_date,
+                publication.date_added,
+            ]
+            for publication in publications.iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+        )
+        header = ["Title", "Type", "ISBN", "Call Number", "Publication Date", "Date Added"]
+        return stream_export(export_format, "publications", header, rows)
+
+    page_obj = paginate_request(request, publications, ["-date_added", "-id"], per_page=25)
 
     publication_types = PublicationType.objects.all()
 
     context = {
         "page_obj": page_obj,
+        "total_results": listing_count(publications),
         "search_query": search_query,
         "type_filter": type_filter,
         "publication_types": publication_types,
@@ -228,6 +273,7 @@ def add_publication(request):
         form = PublicationForm(request.POST, request.FILES)
         if form.is_valid():
             publication = form.save()
+            schedule_thumbnails(publication)
             messages.success(request, f'Publication "{publication.title}" has been created successfully!')
             return redirect("catalog:add_items", pk=publication.pk)
     else:
@@ -245,6 +291,8 @@ def edit_publication(request, pk):
         form = PublicationForm(request.POST, request.FILES, instance=publication)
         if form.is_valid():
             form.save()
+            if "cover_image" in form.changed_data:
+                schedule_thumbnails(publication)
             messages.success(request, f'Publication "{publication.title}" has been updated!')
             return redirect("catalog:manage_publications")
     else:
@@ -267,6 +315,14 @@ def add_items(request, pk):
             item.publication = publication
             item.save()
             messages.success(request, f"Item {item.barcode} has been added!")
+
+            # A new available copy may satisfy waiting holds
+            if item.status == "available":
+                from circulation.allocation import allocate_item
+
+                allocation = allocate_item(item)
+                if allocation:
+                    messages.info(request, f"Item {item.barcode} allocated to a hold for {allocation.hold.borrower}")
             return redirect("catalog:add_items", pk=pk)
     else:
         form = ItemForm()
@@ -275,9 +331,10 @@ def add_items(request, pk):
 
 
 # API Endpoints for AJAX functionality
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 
 
+@read_from_replica
 def search_suggestions(request):
     """API endpoint for autocomplete suggestions in search box"""
     query = request.GET.get('q', '').strip()
@@ -306,3 +363,36 @@ def search_suggestions(request):
     suggestions = list(set(suggestions))[:15]  # Remove duplicates and limit to 15
     
     return JsonResponse({'suggestions': sorted(suggestions)})
+
+
+def _split_param(value):
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+
+@require_GET
+@read_from_replica
+def availability(request):
+    """
+    Public JSON availability for discovery systems: ?ids=12,40 and/or
+    ?isbn=9780306406157,0306406152. Cacheable for AVAILABILITY_MAX_AGE seconds
+    and revalidated with the ETag.
+    """
+    from circulation.availability import MAX_LOOKUP, bulk_availability
+
+    ids = _split_param(request.GET.get("ids", ""))
+    isbns = _split_param(request.GET.get("isbn", ""))
+    if not all(pk.isdigit() for pk in ids):
+        return JsonResponse({"error": "ids must be publication ids separated by commas"}, status=400)
+    if not ids and not isbns:
+        return JsonResponse({"error": "Pass ids and/or isbn"}, status=400)
+    if len(ids) + len(isbns) > MAX_LOOKUP:
+        return JsonResponse({"error": f"At most {MAX_LOOKUP} publications per request"}, status=400)
+
+    body = json.dumps(bulk_availability([int(pk) for pk in ids], isbns), cls=DjangoJSONEncoder)
+    etag = f'"{hashlib.sha1(body.encode()).hexdigest()}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(body, content_type="application/json")
+    response["ETag"] = etag
+    patch_cache_control(response, public=True, max_age=settings.AVAILABILITY_MAX_AGE)
+    return response
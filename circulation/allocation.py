@@ -0,0 +1,196 @@
+"""
+Hold allocation engine.
+
+Runs whenever a copy becomes available (checkin, transit receipt, new item)
+and matches available copies to the oldest eligible waiting holds. Copies
+whose pickup location differs from the item's location are routed in
+transit automatically and stay reserved for that hold until received.
+"""
+
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from catalog.cached_pages import invalidate_publication_pages
+from catalog.concurrency import bump_version
+from catalog.models import Item
+from .models import CheckoutRequest, Hold, InTransit, Notification
+
+Allocation = namedtuple("Allocation", ["item", "hold", "transit"])
+
+
+def _pickup_deadline(now):
+    return now + timedelta(days=getattr(settings, "HOLD_PICKUP_DAYS", 7))
+
+
+def _choose_hold(item, holds):
+    """Pick the hold an item should serve.
+
+    A hold already reserved for this item (item routed in transit for it)
+    wins; otherwise the oldest hold picking up at the item's location, and
+    finally the oldest unreserved hold anywhere.
+    """
+    oldest = None
+    for hold in holds:
+        if hold.reserved_item_id == item.pk:
+            return hold
+    for hold in holds:
+        if hold.reserved_item_id is not None:
+            continue
+        if hold.pickup_location_id == item.location_id:
+            return hold
+        if oldest is None:
+            oldest = hold
+    return oldest
+
+
+def unreserved_copies(publication_id):
+    """Copies of a publication on the shelf that no open hold or approved request has reserved"""
+    reserved = Q(
+        pk__in=Hold.objects.filter(status__in=["waiting", "ready"], reserved_item__isnull=False).values("reserved_item")
+    ) | Q(pk__in=CheckoutRequest.objects.filter(status="approved", reserved_item__isnull=False).values("reserved_item"))
+    return Item.objects.filter(publication_id=publication_id, status__in=["available", "on_hold_shelf"]).exclude(
+        reserved
+    )
+
+
+def lendable_copies(publication_id, reserved_item_id=None):
+    """Copies that may be lent to fulfil a hold or request: its own reserved copy or an unreserved one"""
+    copies = unreserved_copies(publication_id)
+    if reserved_item_id:
+        copies = copies | Item.objects.filter(pk=reserved_item_id, publication_id=publication_id)
+    return copies
+
+
+def allocate_publication(publication_id, item_ids=None):
+    """Allocate available copies of one publication to its waiting holds.
+
+    The hold queue is read with a single locked query, so concurrent
+    availability events for the same publication serialize on it. Items are
+    claimed with a conditional UPDATE and skipped if another desk took them
+    first. When ``item_ids`` is given only those copies are considered.
+
+    Returns a list of ``Allocation`` tuples; ``transit`` is set when the
+    item was routed to another pickup location.
+    """
+    now = timezone.now()
+    allocations = []
+
+    with transaction.atomic():
+        hold_filter = Q(reserved_item__isnull=True)
+        if item_ids is not None:
+            hold_filter |= Q(reserved_item__in=item_ids)
+        else:
+            hold_filter |= Q(reserved_item__status="available")
+
+        holds = list(
+            Hold.objects.select_for_update(of=("self",))
+            .filter(hold_filter, publication_id=publication_id, status="waiting", borrower__is_blocked=False)
+            .select_related("borrower", "publication", "pickup_location")
+            .order_by("hold_date", "id")
+        )
+        if not holds:
+            return allocations
+
+        items = Item.objects.filter(publication_id=publication_id, status="available").select_related("location")
+        if item_ids is not None:
+            items = items.filter(pk__in=item_ids)
+
+        ready_holds = []
+        transits = []
+        for item in items.order_by("pk"):
+            hold = _choose_hold(item, holds)
+            if hold is None:
+                break
+
+            at_pickup = hold.pickup_location_id == item.location_id
+            new_status = "on_hold_shelf" if at_pickup else "in_transit"
+            if not Item.objects.filter(pk=item.pk, status="available").update(
+                status=new_status, version=bump_version(), date_updated=timezone.now()
+            ):
+                continue
+            item.status = new_status
+            item.version += 1
+            holds.remove(hold)
+
+            hold.reserved_item = item
+            hold.version += 1
+            transit = None
+            if at_pickup:
+                hold.status = "ready"
+                hold.ready_date = now
+                hold.expiry_date = _pickup_deadline(now)
+                ready_holds.append(hold)
+            else:
+                transit = InTransit(
+                    item=item,
+                    from_location=item.location,
+                    to_location=hold.pickup_location,
+                    send_date=now,
+                    notes=f"Routed automatically for hold #{hold.pk}",
+                )
+                transits.append(transit)
+            allocations.append(Allocation(item, hold, transit))
+
+        if not allocations:
+            return allocations
+
+        # The status updates bypass Item.save(), so the publication's cached pages are retired here
+        invalidate_publication_pages([publication_id])
+        Hold.objects.bulk_update(
+            [allocation.hold for allocation in allocations],
+            ["status", "ready_date", "expiry_date", "reserved_item", "version"],
+        )
+        InTransit.objects.bulk_create(transits)
+        Notification.objects.bulk_create([_hold_ready_notification(hold) for hold in ready_holds])
+
+    return allocations
+
+
+def allocate_items(items):
+    """Allocate a batch of newly available items, one pass per publication."""
+    by_publication = {}
+    for item in items:
+        by_publication.setdefault(item.publication_id, []).append(item.pk)
+
+    # One query instead of a locked hold-queue read per publication nobody is waiting for
+    queued = set(
+        Hold.objects.filter(publication_id__in=by_publication, status="waiting").values_list("publication_id", flat=True)
+    )
+    allocations = []
+    for publication_id, item_ids in by_publication.items():
+        if publication_id in queued:
+            allocations.extend(allocate_publication(publication_id, item_ids=item_ids))
+    return allocations
+
+
+def allocate_item(item):
+    """Allocate a single item; returns its ``Allocation`` or None."""
+    allocations = allocate_items([item])
+    return allocations[0] if allocations else None
+
+
+def release_items(item_ids):
+    """Return reserved copies to the shelf and offer them to the hold queue."""
+    if not item_ids:
+        return []
+    released = Item.objects.filter(pk__in=item_ids, status="on_hold_shelf")
+    publication_ids = list(released.values_list("publication_id", flat=True).distinct())
+    if released.update(status="available", version=bump_version(), date_updated=timezone.now()):
+        invalidate_publication_pages(publication_ids)
+    return allocate_items(Item.objects.filter(pk__in=item_ids, status="available"))
+
+
+def _hold_ready_notification(hold):
+    return Notification(
+        borrower=hold.borrower,
+        notification_type="hold_ready",
+        title=f"Hold Ready for Pickup: {hold.publication.title}",
+        message=f'Your hold for "{hold.publication.title}" is ready for pickup at {hold.pickup_location}. Please pick it up by {hold.expiry_date.strftime("%B %d, %Y")}.',
+        hold=hold,
+        action_url="/accounts/my-account/",
+    )
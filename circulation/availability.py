@@ -0,0 +1,109 @@
+"""
+Bulk availability for external discovery systems.
+
+``bulk_availability`` reports copies, per-location availability, the next due
+date and the hold queue length for up to MAX_LOOKUP publications using four
+grouped queries, however many are asked for:
+
+1. the publications, matched by id or by ``isbn13`` (``normalized_isbn`` for
+   input that is not a valid ISBN form)
+2. item counts grouped by publication, location and status
+3. the earliest active-loan due date grouped by publication and location
+4. waiting holds counted per publication
+"""
+
+from django.db.models import Count, Min, Q
+
+from catalog.isbn import compact_isbn, to_isbn13
+from catalog.models import Item, Publication
+from .models import Hold, Loan
+
+MAX_LOOKUP = 200
+
+
+def bulk_availability(ids=(), isbns=()):
+    """
+    Availability for publications given by primary key and/or ISBN (either
+    form), in request order. Returns {"results": [...], "not_found": [...]}.
+    """
+    wanted_isbns = {isbn: to_isbn13(isbn) for isbn in isbns}
+    # Malformed ISBNs have no ISBN-13 form; match them as catalogued
+    unconverted = {isbn: compact_isbn(isbn) for isbn, isbn13 in wanted_isbns.items() if not isbn13}
+    publications = Publication.objects.filter(
+        Q(pk__in=ids)
+        | Q(isbn13__in=[isbn13 for isbn13 in wanted_isbns.values() if isbn13])
+        | Q(normalized_isbn__in=[value for value in unconverted.values() if value])
+    ).values("pk", "isbn13", "normalized_isbn", "title")
+    by_pk = {row["pk"]: row for row in publications}
+    by_isbn = {row["isbn13"]: row for row in by_pk.values() if row["isbn13"]}
+    by_normalized = {row["normalized_isbn"]: row for row in by_pk.values() if row["normalized_isbn"]}
+
+    ordered, not_found = [], []
+    for pk in ids:
+        if pk in by_pk:
+            ordered.append(pk)
+        else:
+            not_found.append(pk)
+    for isbn, isbn13 in wanted_isbns.items():
+        row = by_isbn.get(isbn13) if isbn13 else by_normalized.get(unconverted[isbn])
+        if row is not None:
+            ordered.append(row["pk"])
+        else:
+            not_found.append(isbn)
+    ordered = list(dict.fromkeys(ordered))
+    if not ordered:
+        return {"results": [], "not_found": not_found}
+
+    locations = {}
+    item_counts = (
+        Item.objects.filter(publication_id__in=ordered)
+        .values("publication_id", "location_id", "location__code", "location__name", "status")
+        .annotate(copies=Count("id"))
+    )
+    for row in item_counts:
+        location = locations.setdefault(
+            (row["publication_id"], row["location_id"]),
+            {"code": row["location__code"], "name": row["location__name"], "total": 0, "available": 0},
+        )
+        location["total"] += row["copies"]
+        if row["status"] == "available":
+            location["available"] += row["copies"]
+
+    due_dates = (
+        Loan.objects.filter(status="active", item__publication_id__in=ordered)
+        .values("item__publication_id", "item__location_id")
+        .annotate(next_due=Min("due_date"))
+    )
+    for row in due_dates:
+        location = locations.get((row["item__publication_id"], row["item__location_id"]))
+        if location is not None:
+            location["next_due_date"] = row["next_due"]
+
+    holds = dict(
+        Hold.objects.filter(publication_id__in=ordered, status="waiting")
+        .values_list("publication_id")
+        .annotate(n=Count("id"))
+    )
+
+    per_publication = {}
+    for (publication_id, _), location in sorted(locations.items(), key=lambda entry: entry[1]["name"]):
+        location.setdefault("next_due_date", None)
+        per_publication.setdefault(publication_id, []).append(location)
+
+    results = []
+    for pk in ordered:
+        publication_locations = per_publication.get(pk, [])
+        due = [location["next_due_date"] for location in publication_locations if location["next_due_date"]]
+        results.append(
+            {
+                "id": pk,
+                "isbn13": by_pk[pk]["isbn13"],
+                "title": by_pk[pk]["title"],
+                "total_copies": sum(location["total"] for location in publication_locations),
+                "available_copies": sum(location["available"] for location in publication_locations),
+                "next_due_date": min(due, default=None),
+                "holds_waiting": holds.get(pk, 0),
+                "locations": publication_locations,
+            }
+        )
+    return {"results": results, "not_found": not_found}
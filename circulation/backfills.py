@@ -0,0 +1,34 @@
+"""Backfills for circulation counters (run with ``python manage.py backfill <name>``)"""
+
+from django.db.models import Count, Max
+
+from catalog.backfill import Backfill, register
+from catalog.models import Item
+from .models import Loan
+
+
+def _item_loan_counters(rows):
+    stats = {
+        row["item_id"]: row
+        for row in Loan.objects.filter(item_id__in=[row["pk"] for row in rows])
+        .values("item_id")
+        .annotate(loans=Count("id"), last=Max("checkout_date"))
+    }
+    return {
+        row["pk"]: {
+            "times_borrowed": stats[row["pk"]]["loans"] if row["pk"] in stats else 0,
+            "last_borrowed_date": stats[row["pk"]]["last"] if row["pk"] in stats else None,
+        }
+        for row in rows
+    }
+
+
+register(
+    Backfill(
+        "item_loan_counters",
+        Item,
+        ["times_borrowed", "last_borrowed_date"],
+        _item_loan_counters,
+        description="Item.times_borrowed and last_borrowed_date recounted from loan history",
+    )
+)
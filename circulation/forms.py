@@ -1,10 +1,8 @@
 from django import forms
-from django.db import models as django_models
-from .models import Loan, Hold, InTransit
-from catalog.models import Item, Publication
-from django.db.models import F, Value
-from django.db.models.functions import Replace
-from accounts.models import User
+from .allocation import unreserved_copies
+from .identifiers import resolve_borrower, resolve_identifier
+from .models import Loan, Hold, InTransit, ReportJob
+from catalog.models import Item
 
 
 class CheckoutForm(forms.ModelForm):
@@ -30,52 +28,38 @@ class CheckoutForm(forms.ModelForm):
 
     def clean_barcode(self):
         identifier = self.cleaned_data["barcode"].strip()
-        # Try ISBN first
-        if identifier:
-            # Normalize input (remove hyphens/spaces)
-            normalized = identifier.replace("-", "").replace(" ", "")
-            # Try exact match first
-            publication = Publication.objects.filter(isbn=identifier).first()
-            if not publication:
-                # Try normalized field lookup
-                publication = Publication.objects.filter(normalized_isbn=normalized).first()
-            if publication:
-                # pick first available item for this publication
-                item = Item.objects.filter(publication=publication, status__in=["available", "on_hold_shelf"]).first()
-                if not item:
-                    raise forms.ValidationError("No available items found for this ISBN.")
-                self.cleaned_data["item"] = item
-                return identifier
-            # If we didn't find a publication by ISBN, fallback to barcode lookup
-            if not publication:
-                # fallback: try to find by barcode
-                try:
-                    item = Item.objects.get(barcode=identifier)
-                    if not item.is_available_for_loan():
-                        raise forms.ValidationError(
-                            f"Item is not available. Current status: {item.get_status_display()}"
-                        )
-                    self.cleaned_data["item"] = item
-                    return identifier
-                except Item.DoesNotExist:
-                    raise forms.ValidationError("No publication or item found for this ISBN/ID.")
-        raise forms.ValidationError("Please enter an ISBN or Item ID.")
+        if not identifier:
+            raise forms.ValidationError("Please enter an ISBN or Item ID.")
+        resolved = resolve_identifier(identifier)
+        if resolved is None:
+            raise forms.ValidationError("No publication or item found for this ISBN/ID.")
+        kind, pk = resolved
+        if kind == "publication":
+            # pick the first copy no hold or approved request has reserved
+            item = unreserved_copies(pk).first()
+            if not item:
+                raise forms.ValidationError("No available items found for this ISBN.")
+        else:
+            item = Item.objects.filter(pk=pk).first()
+            if item is None:
+                raise forms.ValidationError("No publication or item found for this ISBN/ID.")
+            if not item.is_available_for_loan():
+                raise forms.ValidationError(f"Item is not available. Current status: {item.get_status_display()}")
+        self.cleaned_data["item"] = item
+        return identifier
 
     def clean_borrower_card(self):
         card = self.cleaned_data["borrower_card"]
-        try:
-            borrower = User.objects.get(django_models.Q(library_card_number=card) | django_models.Q(username=card))
-            if not borrower.can_borrow():
-                if borrower.is_blocked:
-                    raise forms.ValidationError(f"Borrower is blocked: {borrower.block_reason}")
-                else:
-                    raise forms.ValidationError(
-                        f"Borrower has reached maximum loan limit ({borrower.max_items_allowed})"
-                    )
-            self.cleaned_data["borrower"] = borrower
-            return card
-        except User.DoesNotExist:
+        borrower = resolve_borrower(card)
+        if borrower is None:
             raise forms.ValidationError("Borrower not found.")
+        if not borrower.can_borrow():
+            if borrower.is_blocked:
+                raise forms.ValidationError(f"Borrower is blocked: {borrower.block_reason}")
+            else:
+                raise forms.ValidationError(f"Borrower has reached maximum loan limit ({borrower.max_items_allowed})")
+        self.cleaned_data["borrower"] = borrower
+        return card
 
 
 class CheckinForm(forms.Form):
@@ -90,32 +74,22 @@ class CheckinForm(forms.Form):
 
     def clean_barcode(self):
         identifier = self.cleaned_data["barcode"].strip()
-        if identifier:
-            # Try ISBN: find an active loan for the publication (normalize input)
-            normalized = identifier.replace("-", "").replace(" ", "")
-            publication = Publication.objects.filter(isbn=identifier).first()
-            if not publication:
-                publication = Publication.objects.filter(normalized_isbn=normalized).first()
-
-            if publication:
-                loan = Loan.objects.filter(item__publication=publication, status="active").first()
-                if loan:
-                    self.cleaned_data["loan"] = loan
-                    return identifier
-                else:
-                    raise forms.ValidationError("No active loan found for this ISBN (publication).")
-            else:
-                # Fallback: barcode -> find item then loan
-                try:
-                    item = Item.objects.get(barcode=identifier)
-                    loan = Loan.objects.get(item=item, status="active")
-                    self.cleaned_data["loan"] = loan
-                    return identifier
-                except Item.DoesNotExist:
-                    raise forms.ValidationError("Item not found with this ISBN/ID.")
-                except Loan.DoesNotExist:
-                    raise forms.ValidationError("No active loan found for this item.")
-        raise forms.ValidationError("Please enter an ISBN or Item ID.")
+        if not identifier:
+            raise forms.ValidationError("Please enter an ISBN or Item ID.")
+        resolved = resolve_identifier(identifier)
+        if resolved is None:
+            raise forms.ValidationError("Item not found with this ISBN/ID.")
+        kind, pk = resolved
+        if kind == "publication":
+            loan = Loan.objects.filter(item__publication_id=pk, status="active").first()
+            if not loan:
+                raise forms.ValidationError("No active loan found for this ISBN (publication).")
+        else:
+            loan = Loan.objects.filter(item_id=pk, status="active").first()
+            if not loan:
+                raise forms.ValidationError("No active loan found for this item.")
+        self.cleaned_data["loan"] = loan
+        return identifier
 
 
 class RenewalForm(forms.Form):
@@ -154,36 +128,21 @@ class InTransitForm(forms.ModelForm):
         identifier = self.cleaned_data["barcode"].strip()
         if not identifier:
             raise forms.ValidationError("Please enter an ISBN or Item ID.")
-
-        # Try ISBN first: find a suitable item to send in transit
-        normalized = identifier.replace("-", "").replace(" ", "")
-        publication = None
-        try:
-            publication = Publication.objects.get(isbn=identifier)
-        except Publication.DoesNotExist:
-            publication = (
-                Publication.objects.annotate(
-                    _norm=Replace(Replace(F("isbn"), Value("-"), Value("")), Value(" "), Value(""))
-                )
-                .filter(_norm=normalized)
-                .first()
-            )
-
-        if publication:
-            item = Item.objects.filter(publication=publication, status__in=["available", "on_hold_shelf"]).first()
-            if item:
-                self.cleaned_data["item"] = item
-                return identifier
-            else:
+        resolved = resolve_identifier(identifier)
+        if resolved is None:
+            raise forms.ValidationError("Item not found with this ISBN/ID.")
+        kind, pk = resolved
+        if kind == "publication":
+            # find a copy to send in transit that is not reserved for someone else
+            item = unreserved_copies(pk).first()
+            if not item:
                 raise forms.ValidationError("No suitable item found for this ISBN to send in transit.")
         else:
-            # Fallback to barcode
-            try:
-                item = Item.objects.get(barcode=identifier)
-                self.cleaned_data["item"] = item
-                return identifier
-            except Item.DoesNotExist:
+            item = Item.objects.filter(pk=pk).first()
+            if item is None:
                 raise forms.ValidationError("Item not found with this ISBN/ID.")
+        self.cleaned_data["item"] = item
+        return identifier
 
 
 class BorrowerSearchForm(forms.Form):
@@ -200,3 +159,21 @@ class BorrowerSearchForm(forms.Form):
         choices=[("", "All"), ("yes", "Blocked"), ("no", "Active")],
         widget=forms.Select(attrs={"class": "form-control"}),
     )
+
+
+class ReportJobForm(forms.Form):
+    """Form for requesting a background report"""
+
+    report = forms.ChoiceField(choices=ReportJob.REPORT_CHOICES, widget=forms.Select(attrs={"class": "form-select"}))
+    export_format = forms.ChoiceField(
+        label="Format", choices=ReportJob.FORMAT_CHOICES, widget=forms.Select(attrs={"class": "form-select"})
+    )
+    start = forms.DateField(
+        required=False,
+        label="From",
+        help_text="Not used by the overdue report",
+        widget=forms.DateInput(attrs={"class": "form-control", "type": "date"}),
+    )
+    end = forms.DateField(
+        required=False, label="To", widget=forms.DateInput(attrs={"class": "form-control", "type": "date"})
+    )
@@ -0,0 +1,124 @@
+"""
+Identifier resolution for the circulation desk.
+
+Desk forms accept an ISBN or an item barcode in the same field, and a library
+card number or username for the borrower. ``resolve_identifier`` and
+``resolve_borrower`` answer these with indexed lookups only:
+
+- ISBN: one exact query on the indexed ``Publication.isbn13`` with the input
+  converted to ISBN-13; input that is not a valid ISBN form (records
+  catalogued with malformed ISBNs have an empty isbn13) is matched on the
+  indexed ``normalized_isbn`` instead
+- barcode: one query on the unique ``Item.barcode``
+- card: one query on the unique card number or username
+
+Recent resolutions (identifier -> primary key) are kept in a small per-process
+LRU for RECENT_TTL seconds, so rescanning the same copy at the desk goes
+straight to a primary-key fetch. Only the mapping is cached, never the row, so
+status checks always see current data. Misses are not cached.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.db.models import Q
+
+from accounts.models import User
+from catalog.isbn import compact_isbn, to_isbn13
+from catalog.models import Item, Publication
+
+RECENT_SIZE = 512
+RECENT_TTL = 60
+
+
+class _RecentResolutions:
+    """Thread-safe LRU of (namespace, identifier) -> (kind, pk), entries expiring after ttl seconds"""
+
+    def __init__(self, size, ttl):
+        self.size = size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, stored = entry
+            if time.monotonic() - stored > self.ttl:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = (value, time.monotonic())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+_recent = _RecentResolutions(RECENT_SIZE, RECENT_TTL)
+
+
+def clear_recent_resolutions():
+    _recent.clear()
+
+
+def resolve_isbn(identifier):
+    """Primary key of the publication with this ISBN (either form), or None"""
+    isbn13 = to_isbn13(identifier)
+    if isbn13:
+        publications = Publication.objects.filter(isbn13=isbn13)
+    elif compact_isbn(identifier):
+        publications = Publication.objects.filter(normalized_isbn=compact_isbn(identifier))
+    else:
+        return None
+    return publications.order_by("pk").values_list("pk", flat=True).first()
+
+
+def resolve_identifier(identifier):
+    """
+    Resolve desk input to ("publication", pk) by ISBN, preferred, or ("item", pk)
+    by barcode. Returns None when neither matches.
+    """
+    identifier = identifier.strip()
+    if not identifier:
+        return None
+    cached = _recent.get(("desk", identifier))
+    if cached:
+        return cached
+
+    publication_id = resolve_isbn(identifier)
+    if publication_id is not None:
+        resolved = ("publication", publication_id)
+    else:
+        item_id = Item.objects.filter(barcode=identifier).values_list("pk", flat=True).first()
+        if item_id is None:
+            return None
+        resolved = ("item", item_id)
+    _recent.put(("desk", identifier), resolved)
+    return resolved
+
+
+def resolve_borrower(card):
+    """The user with this library card number or username, or None"""
+    card = card.strip()
+    if not card:
+        return None
+    borrower = None
+    cached = _recent.get(("card", card))
+    if cached:
+        borrower = User.objects.filter(pk=cached[1]).first()
+    if borrower is None:
+        borrower = User.objects.filter(Q(library_card_number=card) | Q(username=card)).order_by("pk").first()
+    if borrower is not None:
+        _recent.put(("card", card), ("user", borrower.pk))
+    return borrower
@@ -0,0 +1,40 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+
+from circulation.models import Loan
+from circulation.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily circulation rollups from loan history (initial backfill or repair)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", help="First day to rebuild (YYYY-MM-DD), default: first loan")
+        parser.add_argument("--end", help="Last day to rebuild (YYYY-MM-DD), default: today")
+        parser.add_argument("--chunk-days", type=int, default=90, help="Days rebuilt per transaction")
+
+    def handle(self, *args, **options):
+        try:
+            end = date.fromisoformat(options["end"]) if options["end"] else timezone.localdate()
+            if options["start"]:
+                start = date.fromisoformat(options["start"])
+            else:
+                first = Loan.objects.aggregate(first=Min("checkout_date"))["first"]
+                start = timezone.localdate(first) if first else end
+        except ValueError as e:
+            raise CommandError(f"Invalid date: {e}")
+
+        chunk_start = start
+        while chunk_start <= end:
+            chunk_end = min(chunk_start + timedelta(days=options["chunk_days"] - 1), end)
+            counts = rebuild_rollups(chunk_start, chunk_end)
+            self.stdout.write(
+                f"{chunk_start} to {chunk_end}: {counts['daily']} type/location rows, "
+                f"{counts['item']} item rows, {counts['borrower']} borrower rows"
+            )
+            chunk_start = chunk_end + timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt circulation rollups from {start} to {end}"))
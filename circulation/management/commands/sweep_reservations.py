@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from circulation.tasks import sweep_expired_reservations
+
+
+class Command(BaseCommand):
+    help = "Expire uncollected holds and checkout requests now and reallocate their items."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows updated per transaction")
+
+    def handle(self, *args, **options):
+        summary = sweep_expired_reservations(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,18 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0004_rename_catalog_publication_normisbn_idx_catalog_pub_normali_2bbeea_idx'),
+        ('circulation', '0005_merge_0002_add_reserved_item_0004_add_reserved_item'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hold',
+            name='reserved_item',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reserved_for_holds', to='catalog.item'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0004_rename_catalog_publication_normisbn_idx_catalog_pub_normali_2bbeea_idx'),
+        ('circulation', '0006_hold_reserved_item'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PullList',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_date', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='pull_lists', to=settings.AUTH_USER_MODEL)),
+                ('location', models.ForeignKey(blank=True, help_text='Leave empty for all locations', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='pull_lists', to='catalog.location')),
+            ],
+            options={
+                'ordering': ['-created_date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PullListEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hold', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pull_list_entries', to='circulation.hold')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pull_list_entries', to='catalog.item')),
+                ('pull_list', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='circulation.pulllist')),
+            ],
+            options={
+                'ordering': ['item__location__name', 'item__publication__call_number', 'item__barcode'],
+                'verbose_name_plural': 'Pull list entries',
+            },
+        ),
+    ]
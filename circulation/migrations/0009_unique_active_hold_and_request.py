@@ -0,0 +1,56 @@
+"""Enforce one active hold and one active checkout request per borrower and publication.
+
+Existing duplicates are resolved first: the oldest active record is kept and
+the newer ones are cancelled so the conditional unique constraints can be added.
+"""
+from django.db import migrations, models
+
+
+def cancel_duplicates(apps, schema_editor):
+    Hold = apps.get_model('circulation', 'Hold')
+    CheckoutRequest = apps.get_model('circulation', 'CheckoutRequest')
+    Item = apps.get_model('catalog', 'Item')
+
+    for model, active, date_field in (
+        (Hold, ['waiting', 'ready'], 'hold_date'),
+        (CheckoutRequest, ['pending', 'approved'], 'request_date'),
+    ):
+        seen = set()
+        duplicate_ids = []
+        rows = (
+            model.objects.filter(status__in=active)
+            .order_by('publication_id', 'borrower_id', date_field, 'id')
+            .values_list('id', 'publication_id', 'borrower_id')
+        )
+        for pk, publication_id, borrower_id in rows.iterator():
+            key = (publication_id, borrower_id)
+            if key in seen:
+                duplicate_ids.append(pk)
+            else:
+                seen.add(key)
+        if duplicate_ids:
+            duplicates = model.objects.filter(pk__in=duplicate_ids)
+            reserved_ids = list(duplicates.exclude(reserved_item=None).values_list('reserved_item_id', flat=True))
+            duplicates.update(status='cancelled', reserved_item=None)
+            # Put copies reserved by the cancelled duplicates back on the shelf
+            Item.objects.filter(pk__in=reserved_ids, status='on_hold_shelf').update(status='available')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0005_item_version'),
+        ('circulation', '0008_loan_hold_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(cancel_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='hold',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['waiting', 'ready'])), fields=('publication', 'borrower'), name='unique_active_hold_per_borrower'),
+        ),
+        migrations.AddConstraint(
+            model_name='checkoutrequest',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'approved'])), fields=('publication', 'borrower'), name='unique_active_checkout_request'),
+        ),
+    ]
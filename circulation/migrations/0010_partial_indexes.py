@@ -0,0 +1,24 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0005_item_version'),
+        ('circulation', '0009_unique_active_hold_and_request'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['item'], name='loan_active_item_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['due_date'], name='loan_active_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hold',
+            index=models.Index(condition=models.Q(('status', 'waiting')), fields=['publication', 'hold_date'], name='hold_waiting_queue_idx'),
+        ),
+    ]
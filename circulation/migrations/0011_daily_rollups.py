@@ -0,0 +1,61 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0007_publication_cover_digest'),
+        ('circulation', '0010_partial_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyCirculation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('checkouts', models.PositiveIntegerField(default=0)),
+                ('returns', models.PositiveIntegerField(default=0)),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_circulation', to='catalog.location')),
+                ('publication_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_circulation', to='catalog.publicationtype')),
+            ],
+            options={
+                'verbose_name_plural': 'Daily circulation',
+                'ordering': ['-date'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'publication_type', 'location'), name='unique_daily_circulation')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyItemCirculation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('checkouts', models.PositiveIntegerField(default=0)),
+                ('returns', models.PositiveIntegerField(default=0)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_circulation', to='catalog.item')),
+            ],
+            options={
+                'verbose_name_plural': 'Daily item circulation',
+                'ordering': ['-date'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'item'), name='unique_daily_item_circulation')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyBorrowerCirculation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('checkouts', models.PositiveIntegerField(default=0)),
+                ('returns', models.PositiveIntegerField(default=0)),
+                ('borrower', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_circulation', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Daily borrower circulation',
+                'ordering': ['-date'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'borrower'), name='unique_daily_borrower_circulation')],
+            },
+        ),
+    ]
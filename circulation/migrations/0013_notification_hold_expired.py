@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('circulation', '0012_report_jobs'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='notification_type',
+            field=models.CharField(choices=[('checkout', 'Item Checked Out'), ('checkin', 'Item Returned'), ('due_soon', 'Due Soon (3 days)'), ('overdue', 'Overdue Notice'), ('hold_ready', 'Hold Ready for Pickup'), ('hold_placed', 'Hold Placed Successfully'), ('hold_expiring', 'Hold Expiring Soon'), ('hold_cancelled', 'Hold Cancelled'), ('hold_expired', 'Hold Expired'), ('renewal', 'Item Renewed'), ('fine_added', 'Fine Added')], max_length=20),
+        ),
+    ]
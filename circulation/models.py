@@ -1,12 +1,13 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
 from datetime import timedelta
+from catalog.concurrency import VersionedModel
 from catalog.models import Item, Publication
 
 
-class Loan(models.Model):
+class Loan(VersionedModel):
     """Record of item checkout/loan"""
 
     STATUS_CHOICES = [
@@ -39,6 +40,9 @@ class Loan(models.Model):
         indexes = [
             models.Index(fields=["borrower", "status"]),
             models.Index(fields=["due_date"]),
+            # Partial indexes: only active loans are looked up by item or scanned by due date
+            models.Index(fields=["item"], condition=models.Q(status="active"), name="loan_active_item_idx"),
+            models.Index(fields=["due_date"], condition=models.Q(status="active"), name="loan_active_due_idx"),
         ]
 
     def __str__(self):
@@ -92,7 +96,7 @@ class Loan(models.Model):
         return False
 
 
-class Hold(models.Model):
+class Hold(VersionedModel):
     """Hold/reserve request for a publication"""
 
     STATUS_CHOICES = [
@@ -112,12 +116,27 @@ class Hold(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="waiting")
     queue_position = models.IntegerField(default=0)
     notes = models.TextField(blank=True)
+    # Copy allocated to this hold - on the hold shelf when ready, or in transit to the pickup location
+    reserved_item = models.ForeignKey(
+        Item, on_delete=models.SET_NULL, null=True, blank=True, related_name="reserved_for_holds"
+    )
 
     class Meta:
         ordering = ["hold_date"]
         indexes = [
             models.Index(fields=["borrower", "status"]),
             models.Index(fields=["publication", "status"]),
+            # Partial index over the hold queue: waiting holds per publication in queue order
+            models.Index(
+                fields=["publication", "hold_date"], condition=models.Q(status="waiting"), name="hold_waiting_queue_idx"
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["publication", "borrower"],
+                condition=models.Q(status__in=["waiting", "ready"]),
+                name="unique_active_hold_per_borrower",
+            ),
         ]
 
     def __str__(self):
@@ -166,13 +185,179 @@ class InTransit(models.Model):
         return f"{self.item} - {self.from_location} to {self.to_location}"
 
     def mark_received(self):
-        """Mark item as received"""
-        self.status = "received"
-        self.receive_date = timezone.now()
-        self.item.location = self.to_location
-        self.item.status = "available"
-        self.item.save()
-        self.save()
+        """Mark item as received and offer it to waiting holds"""
+        from .allocation import allocate_item
+
+        with transaction.atomic():
+            self.status = "received"
+            self.receive_date = timezone.now()
+            self.item.location = self.to_location
+            self.item.status = "available"
+            self.item.save()
+            self.save()
+            return allocate_item(self.item)
+
+
+class PullList(models.Model):
+    """A generated hold pull list - available copies staff should pull from the shelves"""
+
+    location = models.ForeignKey(
+        "catalog.Location",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="pull_lists",
+        help_text="Leave empty for all locations",
+    )
+    created_date = models.DateTimeField(default=timezone.now)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="pull_lists"
+    )
+
+    class Meta:
+        ordering = ["-created_date"]
+
+    def __str__(self):
+        return f"Pull list {self.created_date:%Y-%m-%d %H:%M} ({self.location or 'All locations'})"
+
+
+class PullListEntry(models.Model):
+    """A copy listed on a pull list for a specific waiting hold"""
+
+    pull_list = models.ForeignKey(PullList, on_delete=models.CASCADE, related_name="entries")
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name="pull_list_entries")
+    hold = models.ForeignKey(Hold, on_delete=models.CASCADE, related_name="pull_list_entries")
+
+    class Meta:
+        ordering = ["item__location__name", "item__publication__call_number", "item__barcode"]
+        verbose_name_plural = "Pull list entries"
+
+    def __str__(self):
+        return f"{self.item} for {self.hold}"
+
+
+class DailyCirculation(models.Model):
+    """Checkouts and returns per day, publication type and location (maintained by circulation.rollups)"""
+
+    date = models.DateField()
+    publication_type = models.ForeignKey(
+        "catalog.PublicationType", on_delete=models.CASCADE, related_name="daily_circulation"
+    )
+    location = models.ForeignKey("catalog.Location", on_delete=models.CASCADE, related_name="daily_circulation")
+    checkouts = models.PositiveIntegerField(default=0)
+    returns = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-date"]
+        constraints = [
+            models.UniqueConstraint(fields=["date", "publication_type", "location"], name="unique_daily_circulation")
+        ]
+        verbose_name_plural = "Daily circulation"
+
+    def __str__(self):
+        return f"{self.date} {self.publication_type} @ {self.location}: {self.checkouts} out / {self.returns} in"
+
+
+class DailyItemCirculation(models.Model):
+    """Checkouts and returns per day and item"""
+
+    date = models.DateField()
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name="daily_circulation")
+    checkouts = models.PositiveIntegerField(default=0)
+    returns = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-date"]
+        constraints = [models.UniqueConstraint(fields=["date", "item"], name="unique_daily_item_circulation")]
+        verbose_name_plural = "Daily item circulation"
+
+    def __str__(self):
+        return f"{self.date} {self.item}: {self.checkouts} out / {self.returns} in"
+
+
+class DailyBorrowerCirculation(models.Model):
+    """Checkouts and returns per day and borrower"""
+
+    date = models.DateField()
+    borrower = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="daily_circulation")
+    checkouts = models.PositiveIntegerField(default=0)
+    returns = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-date"]
+        constraints = [
+            models.UniqueConstraint(fields=["date", "borrower"], name="unique_daily_borrower_circulation")
+        ]
+        verbose_name_plural = "Daily borrower circulation"
+
+    def __str__(self):
+        return f"{self.date} {self.borrower}: {self.checkouts} out / {self.returns} in"
+
+
+class ReportJob(models.Model):
+    """A staff report computed in the background; the finished file is reused until expires_at"""
+
+    REPORT_CHOICES = [
+        ("circulation", "Circulation by day"),
+        ("turnover", "Collection turnover"),
+        ("overdue", "Overdue items"),
+    ]
+
+    FORMAT_CHOICES = [
+        ("csv", "CSV"),
+        ("xlsx", "Excel"),
+        ("json", "JSON"),
+        ("html", "HTML"),
+    ]
+
+    STATUS_CHOICES = [
+        ("pending", "Queued"),
+        ("running", "Running"),
+        ("completed", "Completed"),
+        ("failed", "Failed"),
+    ]
+
+    ACTIVE_STATUSES = ["pending", "running"]
+
+    report = models.CharField(max_length=20, choices=REPORT_CHOICES)
+    export_format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default="csv")
+    params = models.JSONField(default=dict, blank=True)
+    fingerprint = models.CharField(max_length=64, help_text="Hash of report, format and parameters")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="report_jobs"
+    )
+    created_date = models.DateTimeField(default=timezone.now)
+    started_date = models.DateTimeField(null=True, blank=True)
+    completed_date = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+    artifact_path = models.CharField(max_length=255, blank=True, help_text="Relative to REPORT_ARTIFACT_ROOT")
+    row_count = models.PositiveIntegerField(default=0)
+    error_message = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["-created_date"]
+        indexes = [models.Index(fields=["fingerprint", "status"], name="reportjob_fingerprint_idx")]
+        constraints = [
+            # Single flight: at most one queued/running job per parameter set
+            models.UniqueConstraint(
+                fields=["fingerprint"],
+                condition=models.Q(status__in=["pending", "running"]),
+                name="unique_active_report_job",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.get_report_display()} ({self.export_format}) - {self.get_status_display()}"
+
+    @property
+    def is_active(self):
+        return self.status in self.ACTIVE_STATUSES
+
+    @property
+    def is_available(self):
+        """Completed and not yet expired"""
+        return self.status == "completed" and self.expires_at is not None and self.expires_at > timezone.now()
 
 
 class Notification(models.Model):
@@ -187,6 +372,7 @@ class Notification(models.Model):
         ("hold_placed", "Hold Placed Successfully"),
         ("hold_expiring", "Hold Expiring Soon"),
         ("hold_cancelled", "Hold Cancelled"),
+        ("hold_expired", "Hold Expired"),
         ("renewal", "Item Renewed"),
         ("fine_added", "Fine Added"),
     ]
@@ -241,6 +427,7 @@ class Notification(models.Model):
             "hold_placed": "bookmark-plus",
             "hold_expiring": "hourglass-split",
             "hold_cancelled": "bookmark-x",
+            "hold_expired": "calendar-x",
             "renewal": "arrow-repeat",
             "fine_added": "cash",
         }
@@ -257,6 +444,7 @@ class Notification(models.Model):
             "hold_placed": "info",
             "hold_expiring": "warning",
             "hold_cancelled": "secondary",
+            "hold_expired": "secondary",
             "renewal": "info",
             "fine_added": "warning",
         }
@@ -310,6 +498,13 @@ class CheckoutRequest(models.Model):
             models.Index(fields=["borrower", "status"]),
             models.Index(fields=["status", "request_date"]),
         ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["publication", "borrower"],
+                condition=models.Q(status__in=["pending", "approved"]),
+                name="unique_active_checkout_request",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.publication.title} - {self.borrower.username} ({self.status})"
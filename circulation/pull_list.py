@@ -0,0 +1,78 @@
+"""
+Hold pull-list generation.
+
+Finds available copies on the shelves that should be pulled for waiting
+holds. Waiting holds are joined to available items of the same publication
+in a single query and matched in Python, oldest hold first, preferring a
+copy at the hold's pickup location. Each run is recorded so the next run
+skips holds and copies with an open entry: the hold is still waiting and the
+copy still on the shelf. Once the pulled copy is gone (lent, reserved for
+another hold) the entry is resolved and the hold is matched again.
+"""
+
+from django.db import transaction
+
+from catalog.models import Item
+from .models import Hold, PullList, PullListEntry
+
+
+def _candidate_rows(location=None):
+    open_entries = PullListEntry.objects.filter(hold__status="waiting", item__status="available")
+    eligible_holds = Hold.objects.filter(status="waiting", reserved_item__isnull=True).exclude(
+        pk__in=open_entries.values("hold_id")
+    )
+    items = Item.objects.filter(status="available", publication__holds__in=eligible_holds.values("pk"))
+    if location is not None:
+        items = items.filter(location=location)
+    return (
+        items.exclude(pk__in=open_entries.values("item_id"))
+        .values_list(
+            "pk",
+            "location_id",
+            "publication_id",
+            "publication__holds__id",
+            "publication__holds__hold_date",
+            "publication__holds__pickup_location_id",
+        )
+        .order_by("publication_id", "publication__holds__hold_date", "publication__holds__id", "pk")
+    )
+
+
+def match_pull_candidates(location=None):
+    """
+    Return ``(item_id, hold_id, item_location_id)`` tuples to pull, one copy per hold.
+    With ``location`` only copies shelved there are matched.
+    """
+    holds_by_publication = {}
+    items_by_publication = {}
+    for item_id, location_id, publication_id, hold_id, hold_date, pickup_id in _candidate_rows(location).iterator(
+        chunk_size=2000
+    ):
+        holds = holds_by_publication.setdefault(publication_id, {})
+        holds.setdefault(hold_id, (hold_date, pickup_id))
+        items_by_publication.setdefault(publication_id, {}).setdefault(item_id, location_id)
+
+    matches = []
+    for publication_id, holds in holds_by_publication.items():
+        items = items_by_publication[publication_id]
+        for hold_id, (_, pickup_id) in sorted(holds.items(), key=lambda entry: (entry[1][0], entry[0])):
+            if not items:
+                break
+            item_id = next((pk for pk, location_id in items.items() if location_id == pickup_id), None)
+            if item_id is None:
+                item_id = next(iter(items))
+            matches.append((item_id, hold_id, items.pop(item_id)))
+    return matches
+
+
+def generate_pull_list(location=None, user=None):
+    """Record a new pull list run for ``location`` (or every location)."""
+    matches = match_pull_candidates(location)
+
+    with transaction.atomic():
+        pull_list = PullList.objects.create(location=location, created_by=user)
+        PullListEntry.objects.bulk_create(
+            [PullListEntry(pull_list=pull_list, item_id=item_id, hold_id=hold_id) for item_id, hold_id, _ in matches],
+            batch_size=1000,
+        )
+    return pull_list
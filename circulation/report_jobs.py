@@ -0,0 +1,308 @@
+"""
+Background report jobs.
+
+Long staff reports are computed by the ``circulation.tasks.generate_report``
+Celery task instead of in the request. The task reads its rows in chunks
+(date windows or keyset batches of publications) and writes the artifact
+(CSV, Excel, JSON or HTML) to REPORT_ARTIFACT_ROOT, while the job page polls
+for completion.
+
+Jobs are keyed by a fingerprint of report, format and parameters:
+
+- a completed artifact younger than REPORT_ARTIFACT_TTL is handed back as is
+- while a job is queued or running, the partial unique constraint on
+  ``ReportJob.fingerprint`` lets only one exist, so staff opening the same
+  report join it instead of starting a second computation (single flight)
+- a queued/running job older than REPORT_JOB_TIMEOUT is assumed lost with its
+  worker and is failed, so the report can be requested again
+
+Expired artifacts are deleted by ``circulation.tasks.purge_expired_reports``.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from catalog.models import Publication
+from elibrary.exports import ITERATOR_CHUNK_SIZE, export_chunks
+from .models import DailyCirculation, DailyItemCirculation, Loan, ReportJob
+
+# Days of rollup rows read per query for date-range reports
+DATE_CHUNK_DAYS = 31
+# Publications per batch for the turnover report
+PUBLICATION_CHUNK_SIZE = 500
+
+
+def parse_date_range(data, default_days=30):
+    """(start, end) from ISO ``start``/``end`` values, defaulting to the last ``default_days`` days"""
+    today = timezone.localdate()
+    try:
+        start = date.fromisoformat(data.get("start", ""))
+    except (TypeError, ValueError):
+        start = today - timedelta(days=default_days)
+    try:
+        end = date.fromisoformat(data.get("end", ""))
+    except (TypeError, ValueError):
+        end = today
+    if start > end:
+        start, end = end, start
+    return start, end
+
+
+def _date_windows(params):
+    start, end = date.fromisoformat(params["start"]), date.fromisoformat(params["end"])
+    while start <= end:
+        stop = min(start + timedelta(days=DATE_CHUNK_DAYS - 1), end)
+        yield start, stop
+        start = stop + timedelta(days=1)
+
+
+def _circulation_rows(params):
+    for start, end in _date_windows(params):
+        rows = (
+            DailyCirculation.objects.filter(date__gte=start, date__lte=end)
+            .select_related("publication_type", "location")
+            .order_by("date", "publication_type__name", "location__name")
+        )
+        for row in rows:
+            yield [row.date, row.publication_type.name, row.location.name, row.checkouts, row.returns]
+
+
+def _turnover_rows(params):
+    start, end = params["start"], params["end"]
+    last_id = 0
+    while True:
+        publications = list(
+            Publication.objects.filter(id__gt=last_id)
+            .select_related("publication_type")
+            .annotate(copies=Count("items"))
+            .order_by("id")[:PUBLICATION_CHUNK_SIZE]
+        )
+        if not publications:
+            return
+        last_id = publications[-1].id
+        checkouts = dict(
+            DailyItemCirculation.objects.filter(
+                date__gte=start, date__lte=end, item__publication_id__in=[p.id for p in publications]
+            )
+            .values_list("item__publication_id")
+            .annotate(n=Sum("checkouts"))
+        )
+        for publication in publications:
+            count = checkouts.get(publication.id, 0)
+            turnover = round(count / publication.copies, 2) if publication.copies else 0
+            yield [
+                publication.title,
+                publication.call_number,
+                publication.publication_type.name,
+                publication.copies,
+                count,
+                turnover,
+            ]
+
+
+def _overdue_rows(params):
+    loans = (
+        Loan.objects.filter(status="active", due_date__lt=params["as_of"])
+        .select_related("item__publication", "borrower")
+        .order_by("due_date", "id")
+    )
+    for loan in loans.iterator(chunk_size=ITERATOR_CHUNK_SIZE):
+        yield [
+            loan.item.publication.title,
+            loan.item.barcode,
+            loan.borrower.get_full_name(),
+            loan.borrower.email,
+            loan.due_date,
+            loan.days_overdue(),
+        ]
+
+
+class Report:
+    """A report that can run as a background job"""
+
+    def __init__(self, title, header, rows, date_range=True):
+        self.title = title
+        self.header = header
+        self.rows = rows
+        self.date_range = date_range
+
+    def params(self, data):
+        """Normalized parameters from request data; equal reports get equal parameters"""
+        if self.date_range:
+            start, end = parse_date_range(data)
+            return {"start": start.isoformat(), "end": end.isoformat()}
+        return {"as_of": timezone.localdate().isoformat()}
+
+    def describe(self, params):
+        if self.date_range:
+            return f"{self.title}, {params['start']} to {params['end']}"
+        return f"{self.title} as of {params['as_of']}"
+
+    def filename(self, key, params):
+        if self.date_range:
+            return f"{key}-{params['start']}-to-{params['end']}"
+        return f"{key}-{params['as_of']}"
+
+
+REPORTS = {
+    "circulation": Report(
+        "Circulation by day",
+        ["Date", "Publication Type", "Location", "Checkouts", "Returns"],
+        _circulation_rows,
+    ),
+    "turnover": Report(
+        "Collection turnover",
+        ["Title", "Call Number", "Publication Type", "Copies", "Checkouts", "Checkouts per Copy"],
+        _turnover_rows,
+    ),
+    "overdue": Report(
+        "Overdue items",
+        ["Title", "Barcode", "Borrower", "Email", "Due Date", "Days Overdue"],
+        _overdue_rows,
+        date_range=False,
+    ),
+}
+
+
+def report_fingerprint(report, export_format, params):
+    payload = json.dumps([report, export_format, params], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def artifact_file(job):
+    return os.path.join(settings.REPORT_ARTIFACT_ROOT, job.artifact_path)
+
+
+def request_report(report, export_format, params, user=None):
+    """
+    Return (job, created) for a report: a still-valid finished job, the job
+    already computing the same parameters, or a newly queued one.
+    """
+    fingerprint = report_fingerprint(report, export_format, params)
+    now = timezone.now()
+
+    finished = (
+        ReportJob.objects.filter(fingerprint=fingerprint, status="completed", expires_at__gt=now)
+        .order_by("-completed_date")
+        .first()
+    )
+    if finished and os.path.isfile(artifact_file(finished)):
+        return finished, False
+
+    ReportJob.objects.filter(
+        fingerprint=fingerprint,
+        status__in=ReportJob.ACTIVE_STATUSES,
+        created_date__lt=now - timedelta(seconds=settings.REPORT_JOB_TIMEOUT),
+    ).update(status="failed", completed_date=now, error_message="Timed out before finishing")
+
+    try:
+        # Savepoint, so losing the race does not abort the caller's transaction
+        with transaction.atomic():
+            job = ReportJob.objects.create(
+                report=report,
+                export_format=export_format,
+                params=params,
+                fingerprint=fingerprint,
+                requested_by=user,
+            )
+    except IntegrityError:
+        # Someone else's job for the same parameters is queued or running; join it
+        return ReportJob.objects.filter(fingerprint=fingerprint).order_by("-created_date").first(), False
+
+    def enqueue():
+        from .tasks import generate_report
+
+        try:
+            generate_report.delay(job.pk)
+        except Exception as e:
+            logging.getLogger(__name__).warning("Could not queue report job %s: %s", job.pk, e)
+            ReportJob.objects.filter(pk=job.pk, status="pending").update(
+                status="failed", completed_date=timezone.now(), error_message="The report queue is unavailable"
+            )
+
+    transaction.on_commit(enqueue)
+    return job, True
+
+
+class _Progress:
+    """Row iterator that records how many rows have been written on the job every chunk"""
+
+    def __init__(self, job_id, rows):
+        self.job_id = job_id
+        self.rows = rows
+        self.count = 0
+
+    def __iter__(self):
+        for row in self.rows:
+            yield row
+            self.count += 1
+            if self.count % ITERATOR_CHUNK_SIZE == 0:
+                ReportJob.objects.filter(pk=self.job_id).update(row_count=self.count)
+
+
+def run_report(job_id):
+    """
+    Compute a queued job and store its artifact. Returns the job, or None when
+    it was not pending (already claimed by another delivery of the task).
+    """
+    # Claim the job; only one worker can move it from pending to running
+    if not ReportJob.objects.filter(pk=job_id, status="pending").update(status="running", started_date=timezone.now()):
+        return None
+    job = ReportJob.objects.get(pk=job_id)
+    report = REPORTS[job.report]
+
+    job.artifact_path = f"{job.fingerprint[:2]}/{job.fingerprint}-{job.pk}.{job.export_format}"
+    path = artifact_file(job)
+    partial = path + ".part"
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    rows = _Progress(job.pk, report.rows(job.params))
+    chunks = export_chunks(job.export_format, report.header, rows, title=report.describe(job.params))
+    try:
+        if job.export_format == "xlsx":
+            with open(partial, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+        else:
+            with open(partial, "w", encoding="utf-8", newline="") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+        os.replace(partial, path)
+    except Exception as e:
+        if os.path.exists(partial):
+            os.remove(partial)
+        ReportJob.objects.filter(pk=job.pk).update(
+            status="failed", completed_date=timezone.now(), row_count=rows.count, error_message=str(e)
+        )
+        raise
+
+    job.status = "completed"
+    job.completed_date = timezone.now()
+    job.expires_at = job.completed_date + timedelta(seconds=settings.REPORT_ARTIFACT_TTL)
+    job.row_count = rows.count
+    job.save(update_fields=["status", "completed_date", "expires_at", "artifact_path", "row_count"])
+    return job
+
+
+def purge_expired_reports(now=None):
+    """Delete expired artifacts and their jobs, and failed jobs older than the TTL. Returns the job count."""
+    now = now or timezone.now()
+    expired = ReportJob.objects.filter(
+        Q(status="completed", expires_at__lt=now)
+        | Q(status="failed", created_date__lt=now - timedelta(seconds=settings.REPORT_ARTIFACT_TTL))
+    )
+    for job in expired.exclude(artifact_path="").iterator():
+        try:
+            os.remove(artifact_file(job))
+        except FileNotFoundError:
+            pass
+    deleted, _ = expired.delete()
+    return deleted
@@ -19,6 +19,7 @@ urlpatterns = [
     path("hold/place/<int:publication_id>/", views.place_hold, name="place_hold"),
     path("hold/cancel/<int:hold_id>/", views.cancel_hold, name="cancel_hold"),
     path("holds/manage/", views.manage_holds, name="manage_holds"),
+    path("holds/pull-list/", views.hold_pull_list, name="hold_pull_list"),
     path("hold/set-ready/<int:hold_id>/", views.set_hold_ready, name="set_hold_ready"),
     path("hold/complete/<int:hold_id>/", views.complete_hold, name="complete_hold"),
     # Borrower Management
@@ -34,6 +35,11 @@ urlpatterns = [
     path("reports/", views.reports, name="reports"),
     path("reports/overdue/", views.overdue_report, name="overdue_report"),
     path("reports/circulation-stats/", views.circulation_stats, name="circulation_stats"),
+    path("reports/jobs/", views.report_jobs, name="report_jobs"),
+    path("reports/jobs/queue/<str:report>/", views.queue_report, name="queue_report"),
+    path("reports/jobs/<int:job_id>/", views.report_job_detail, name="report_job_detail"),
+    path("reports/jobs/<int:job_id>/status/", views.report_job_status, name="report_job_status"),
+    path("reports/jobs/<int:job_id>/download/", views.report_job_download, name="report_job_download"),
     # Notifications
     path("notifications/", views.notifications_list, name="notifications_list"),
     path("notifications/<int:notification_id>/read/", views.mark_notification_read, name="mark_notification_read"),
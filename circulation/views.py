@@ -3,21 +3,44 @@ from django.urls import reverse
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
 from django.utils import timezone
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from django.conf import settings
-from django.db.models import Q, Count
+from django.db.models import Q, Sum
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
+from django.views.decorators.http import require_POST
+import csv
 import logging
+import os
 from datetime import timedelta
-from .models import Loan, Hold, InTransit, Notification, CheckoutRequest
+from .models import (
+    Loan,
+    Hold,
+    InTransit,
+    Notification,
+    CheckoutRequest,
+    PullList,
+    PullListEntry,
+    DailyCirculation,
+    DailyItemCirculation,
+    DailyBorrowerCirculation,
+    ReportJob,
+)
+from .allocation import allocate_item, lendable_copies, release_items, unreserved_copies
+from .identifiers import resolve_identifier
+from .pull_list import generate_pull_list
+from .report_jobs import REPORTS, artifact_file, parse_date_range, request_report
+from .rollups import circulation_totals, daily_series, record_checkout, record_return
 from .forms import (
     CheckoutForm,
     CheckinForm,
     HoldForm,
     InTransitForm,
     BorrowerSearchForm,
+    ReportJobForm,
 )
-from django.db.models import F, Value
-from django.db.models.functions import Replace
+from catalog.concurrency import retry_on_conflict
+from elibrary.exports import CONTENT_TYPES, ITERATOR_CHUNK_SIZE, requested_export_format, stream_export
+from elibrary.pagination import listing_count, paginate_request
 from catalog.models import Item, Publication, Location
 from accounts.models import User
 
@@ -99,15 +122,8 @@ def staff_dashboard(request):
         return_date__gte=timezone.now() - timedelta(days=1), status__in=["returned", "overdue_returned"]
     ).select_related("item__publication", "borrower")[:10]
 
-    # Prepare data for Chart.js (last 7 days)
-    daily_checkouts = []
-    daily_returns = []
-    for i in range(6, -1, -1):
-        date = today - timedelta(days=i)
-        checkouts = Loan.objects.filter(checkout_date__date=date).count()
-        returns = Loan.objects.filter(return_date__date=date).count()
-        daily_checkouts.append(checkouts)
-        daily_returns.append(returns)
+    # Prepare data for Chart.js (last 7 days), from the daily rollups
+    _, daily_checkouts, daily_returns = daily_series(today - timedelta(days=6), today)
 
     context = {
         "active_loans": active_loans,
@@ -164,6 +180,7 @@ def circulation_hub(request):
 
 @login_required
 @user_passes_test(is_staff_user)
+@retry_on_conflict
 def checkout(request):
     """Check out an item to a borrower"""
     # Get the 'next' parameter from either POST or GET
@@ -176,12 +193,14 @@ def checkout(request):
             loan.item = form.cleaned_data["item"]
             loan.borrower = form.cleaned_data["borrower"]
             loan.checkout_staff = request.user
-            loan.save()
+            with transaction.atomic():
+                loan.save()
+                record_checkout(loan)
 
-            # Update item statistics
-            loan.item.times_borrowed += 1
-            loan.item.last_borrowed_date = timezone.now()
-            loan.item.save()
+                # Update item statistics
+                loan.item.times_borrowed += 1
+                loan.item.last_borrowed_date = timezone.now()
+                loan.item.save()
 
             # Create notification
             create_notification(
@@ -203,6 +222,7 @@ def checkout(request):
 
 @login_required
 @user_passes_test(is_staff_user)
+@retry_on_conflict
 def checkin(request):
     """Check in a returned item"""
     # Get the 'next' parameter from either POST or GET
@@ -216,15 +236,14 @@ def checkin(request):
             loan.return_staff = request.user
 
             # Check if overdue
-            was_overdue = False
-            if loan.is_overdue():
-                loan.status = "overdue_returned"
-                was_overdue = True
-                messages.warning(request, f"Item was {loan.days_overdue()} day(s) overdue.")
-            else:
-                loan.status = "returned"
-
-            loan.save()
+            was_overdue = loan.is_overdue()
+            days_overdue = loan.days_overdue()
+            loan.status = "overdue_returned" if was_overdue else "returned"
+            with transaction.atomic():
+                loan.save()
+                record_return(loan)
+            if was_overdue:
+                messages.warning(request, f"Item was {days_overdue} day(s) overdue.")
 
             # Create return notification
             create_notification(
@@ -239,28 +258,8 @@ def checkin(request):
                 action_url="/accounts/my-account/",
             )
 
-            # Check if there's a hold on this item
-            hold = (
-                Hold.objects.filter(publication=loan.item.publication, status="waiting").order_by("hold_date").first()
-            )
-
-            if hold:
-                hold.status = "ready"
-                hold.save()
-                loan.item.status = "on_hold_shelf"
-                loan.item.save()
-
-                # Create hold ready notification
-                create_notification(
-                    borrower=hold.borrower,
-                    notification_type="hold_ready",
-                    title=f"Hold Ready for Pickup: {hold.publication.title}",
-                    message=f'Your hold for "{hold.publication.title}" is ready for pickup at {hold.pickup_location}. Please pick it up by {hold.expiry_date.strftime("%B %d, %Y")}.',
-                    hold=hold,
-                    action_url="/accounts/my-account/",
-                )
-
-                messages.info(request, f"Item placed on hold shelf for {hold.borrower}")
+            # Offer the returned copy to the hold queue
+            _report_allocation(request, allocate_item(loan.item))
 
             messages.success(request, "Item checked in successfully.")
             return redirect(next_url)
@@ -270,8 +269,19 @@ def checkin(request):
     return render(request, "circulation/checkin.html", {"form": form, "next": next_url})
 
 
+def _report_allocation(request, allocation):
+    """Tell staff where the hold allocation engine sent a copy"""
+    if allocation and allocation.transit:
+        messages.info(
+            request, f"Item routed in transit to {allocation.transit.to_location} for {allocation.hold.borrower}"
+        )
+    elif allocation:
+        messages.info(request, f"Item placed on hold shelf for {allocation.hold.borrower}")
+
+
 @login_required
 @user_passes_test(is_staff_user)
+@retry_on_conflict
 def renew_loan(request, loan_id):
     """Renew a loan (staff interface)"""
     loan = get_object_or_404(Loan, pk=loan_id)
@@ -290,6 +300,7 @@ def renew_loan(request, loan_id):
 
 
 @login_required
+@retry_on_conflict
 def renew_loan_online(request, loan_id):
     """Renew a loan (borrower interface)"""
     loan = get_object_or_404(Loan, pk=loan_id, borrower=request.user)
@@ -321,22 +332,20 @@ def place_hold(request, publication_id):
     """Place a hold on a publication"""
     publication = get_object_or_404(Publication, pk=publication_id)
 
-    # Check if user already has a hold
-    existing_hold = Hold.objects.filter(
-        publication=publication, borrower=request.user, status__in=["waiting", "ready"]
-    ).first()
-
-    if existing_hold:
-        messages.warning(request, "You already have a hold on this item.")
-        return redirect("catalog:publication_detail", pk=publication_id)
-
     if request.method == "POST":
         form = HoldForm(request.POST)
         if form.is_valid():
             hold = form.save(commit=False)
             hold.publication = publication
             hold.borrower = request.user
-            hold.save()
+            # One active hold per borrower is enforced by a unique constraint, so a
+            # double-click or retry fails the INSERT instead of queueing twice
+            try:
+                with transaction.atomic():
+                    hold.save()
+            except IntegrityError:
+                messages.warning(request, "You already have a hold on this item.")
+                return redirect("catalog:publication_detail", pk=publication_id)
             hold.update_queue_position()
 
             # Create hold placed notification
@@ -362,14 +371,19 @@ def place_hold(request, publication_id):
 
 
 @login_required
+@retry_on_conflict
 def cancel_hold(request, hold_id):
     """Cancel a hold"""
     hold = get_object_or_404(Hold, pk=hold_id, borrower=request.user)
     publication_title = hold.publication.title
 
     if hold.status in ["waiting", "ready"]:
+        released_item_id = hold.reserved_item_id if hold.status == "ready" else None
         hold.status = "cancelled"
+        hold.reserved_item = None
         hold.save()
+        # Hand a copy already on the hold shelf to the next borrower in the queue
+        release_items([released_item_id] if released_item_id else [])
 
         # Create hold cancelled notification
         create_notification(
@@ -391,25 +405,90 @@ def cancel_hold(request, hold_id):
 @user_passes_test(is_staff_user)
 def manage_holds(request):
     """Manage hold requests"""
-    waiting_holds = (
-        Hold.objects.filter(status="waiting")
-        .select_related("publication", "borrower", "pickup_location")
-        .order_by("publication", "hold_date")
-    )
+    holds = Hold.objects.select_related("publication", "borrower", "pickup_location")
+    waiting_holds = holds.filter(status="waiting")
+    ready_holds = holds.filter(status="ready").order_by("ready_date")
+
+    export_format = requested_export_format(request)
+    if export_format:
+        rows = (
+            [
+                hold.get_status_display(),
+                hold.publication.title,
+                hold.borrower.get_full_name(),
+                hold.borrower.email,
+                hold.pickup_location.name,
+                hold.hold_date,
+                hold.ready_date,
+                hold.expiry_date,
+            ]
+            for hold in holds.filter(status__in=["waiting", "ready"])
+            .order_by("status", "publication__title", "hold_date", "id")
+            .iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+        )
+        header = ["Status", "Title", "Borrower", "Email", "Pickup Location", "Hold Date", "Ready Date", "Expiry Date"]
+        return stream_export(export_format, "holds", header, rows)
 
-    ready_holds = (
-        Hold.objects.filter(status="ready")
-        .select_related("publication", "borrower", "pickup_location")
-        .order_by("ready_date")
-    )
+    page = paginate_request(request, waiting_holds, ["publication__title", "hold_date", "id"])
 
     context = {
-        "waiting_holds": waiting_holds,
+        "waiting_holds": page,
+        "waiting_count": waiting_holds.count(),
+        "page": page,
         "ready_holds": ready_holds,
     }
     return render(request, "circulation/manage_holds.html", context)
 
 
+@login_required
+@user_passes_test(is_staff_user)
+def hold_pull_list(request):
+    """Pull list of available copies to fetch for waiting holds, grouped by location"""
+    if request.method == "POST":
+        location_id = request.POST.get("location")
+        location = get_object_or_404(Location, pk=location_id) if location_id else None
+        pull_list = generate_pull_list(location=location, user=request.user)
+        messages.success(request, f"Pull list generated with {pull_list.entries.count()} new item(s) to pull.")
+        return redirect(f"{reverse('circulation:hold_pull_list')}?run={pull_list.pk}")
+
+    run_id = request.GET.get("run")
+    pull_lists = PullList.objects.select_related("location", "created_by")
+    pull_list = get_object_or_404(pull_lists, pk=run_id) if run_id else pull_lists.first()
+
+    entries = PullListEntry.objects.none()
+    if pull_list:
+        entries = pull_list.entries.select_related(
+            "item__location", "item__publication", "hold__borrower", "hold__pickup_location"
+        )
+
+    if pull_list and request.GET.get("format") == "csv":
+        response = HttpResponse(content_type="text/csv")
+        response["Content-Disposition"] = f'attachment; filename="pull-list-{pull_list.pk}.csv"'
+        writer = csv.writer(response)
+        writer.writerow(["Location", "Call Number", "Title", "Barcode", "Borrower", "Pickup Location", "Hold Date"])
+        for entry in entries.iterator(chunk_size=2000):
+            writer.writerow(
+                [
+                    entry.item.location.name,
+                    entry.item.publication.call_number,
+                    entry.item.publication.title,
+                    entry.item.barcode,
+                    entry.hold.borrower.get_full_name(),
+                    entry.hold.pickup_location.name,
+                    entry.hold.hold_date.strftime("%Y-%m-%d"),
+                ]
+            )
+        return response
+
+    context = {
+        "pull_list": pull_list,
+        "entries": entries,
+        "recent_pull_lists": pull_lists[:10],
+        "locations": Location.objects.filter(is_physical=True),
+    }
+    return render(request, "circulation/hold_pull_list.html", context)
+
+
 @login_required
 @user_passes_test(is_staff_user)
 def set_hold_ready(request, hold_id):
@@ -420,10 +499,8 @@ def set_hold_ready(request, hold_id):
         # Reserve an available item inside a transaction to avoid races
         try:
             with transaction.atomic():
-                available_qs = Item.objects.select_for_update().filter(
-                    publication=hold.publication, status__in=["available", "on_hold_shelf"]
-                )
-                item = available_qs.first()
+                # Never take a copy already reserved for another hold or approved request
+                item = unreserved_copies(hold.publication_id).select_for_update().first()
                 if not item:
                     messages.error(
                         request, "Cannot mark hold as ready - no available items found for this publication."
@@ -434,6 +511,7 @@ def set_hold_ready(request, hold_id):
                 item.save()
 
                 hold.status = "ready"
+                hold.reserved_item = item
                 hold.ready_date = timezone.now()
                 # Set expiry/pickup-by date for the hold (default 7 days)
                 pickup_days = getattr(settings, "HOLD_PICKUP_DAYS", 7)
@@ -466,6 +544,7 @@ def set_hold_ready(request, hold_id):
 
 @login_required
 @user_passes_test(is_staff_user)
+@retry_on_conflict
 def complete_hold(request, hold_id):
     """Complete a hold by checking out the item to the borrower"""
     hold = get_object_or_404(Hold, pk=hold_id)
@@ -479,16 +558,16 @@ def complete_hold(request, hold_id):
 
         if not item_identifier:
             messages.error(request, "Please select an item.")
-            available_items = Item.objects.filter(
-                publication=hold.publication, status__in=["available", "on_hold_shelf"]
-            ).select_related("location")
+            available_items = lendable_copies(hold.publication_id, hold.reserved_item_id).select_related("location")
             return render(request, "circulation/complete_hold.html", {"hold": hold, "available_items": available_items})
 
         try:
             # Reserve & create loan atomically
             with transaction.atomic():
-                item = Item.objects.select_for_update().get(
-                    id=item_identifier, publication=hold.publication, status__in=["available", "on_hold_shelf"]
+                item = (
+                    lendable_copies(hold.publication_id, hold.reserved_item_id)
+                    .select_for_update()
+                    .get(id=item_identifier, status__in=["available", "on_hold_shelf"])
                 )
 
                 # Check borrower eligibility
@@ -512,6 +591,7 @@ def complete_hold(request, hold_id):
                     due_date=due_date,
                     status="active",
                 )
+                record_checkout(loan)
 
                 # Update item
                 item.status = "on_loan"
@@ -523,11 +603,13 @@ def complete_hold(request, hold_id):
                 hold.status = "fulfilled"
                 hold.save()
 
+                # Lent a different copy: put the one reserved for this hold back into circulation
+                if hold.reserved_item_id and hold.reserved_item_id != item.pk:
+                    release_items([hold.reserved_item_id])
+
         except Item.DoesNotExist:
             messages.error(request, "No available item found for this publication.")
-            available_items = Item.objects.filter(
-                publication=hold.publication, status__in=["available", "on_hold_shelf"]
-            ).select_related("location")
+            available_items = lendable_copies(hold.publication_id, hold.reserved_item_id).select_related("location")
             return render(request, "circulation/complete_hold.html", {"hold": hold, "available_items": available_items})
 
         messages.success(
@@ -537,9 +619,7 @@ def complete_hold(request, hold_id):
         return redirect("circulation:manage_holds")
 
     # GET request - show form
-    available_items = Item.objects.filter(
-        publication=hold.publication, status__in=["available", "on_hold_shelf"]
-    ).select_related("location")
+    available_items = lendable_copies(hold.publication_id, hold.reserved_item_id).select_related("location")
 
     context = {
         "hold": hold,
@@ -573,11 +653,32 @@ def borrower_list(request):
         elif is_blocked == "no":
             borrowers = borrowers.filter(is_blocked=False)
 
-    borrowers = borrowers.order_by("last_name", "first_name")
+    export_format = requested_export_format(request)
+    if export_format:
+        rows = (
+            [
+                borrower.library_card_number,
+                borrower.last_name,
+                borrower.first_name,
+                borrower.username,
+                borrower.email,
+                "Blocked" if borrower.is_blocked else "Active",
+                borrower.max_items_allowed,
+            ]
+            for borrower in borrowers.order_by("last_name", "first_name", "id").iterator(
+                chunk_size=ITERATOR_CHUNK_SIZE
+            )
+        )
+        header = ["Library Card", "Last Name", "First Name", "Username", "Email", "Status", "Max Items"]
+        return stream_export(export_format, "borrowers", header, rows)
+
+    page = paginate_request(request, borrowers, ["last_name", "first_name", "id"])
 
     context = {
         "form": form,
-        "borrowers": borrowers,
+        "borrowers": page,
+        "page": page,
+        "total_results": listing_count(borrowers),
     }
     return render(request, "circulation/borrower_list.html", context)
 
@@ -644,6 +745,7 @@ def unblock_borrower(request, user_id):
 
 @login_required
 @user_passes_test(is_staff_user)
+@retry_on_conflict
 def send_in_transit(request):
     """Send an item in transit"""
     if request.method == "POST":
@@ -667,6 +769,7 @@ def send_in_transit(request):
 
 @login_required
 @user_passes_test(is_staff_user)
+@retry_on_conflict
 def receive_in_transit(request):
     """Receive items in transit"""
     if request.method == "POST":
@@ -674,48 +777,22 @@ def receive_in_transit(request):
         isbn = request.POST.get("isbn", "").strip()
         barcode = request.POST.get("barcode", "").strip()
 
-        handled = False
-        # If ISBN provided, try to find an in-transit record for that publication
-        if isbn:
-            try:
-                # Try exact then normalized match (strip hyphens/spaces)
-                normalized = isbn.replace("-", "").replace(" ", "")
-                try:
-                    publication = Publication.objects.get(isbn=isbn)
-                except Publication.DoesNotExist:
-                    publication = (
-                        Publication.objects.annotate(
-                            _norm=Replace(Replace(F("isbn"), Value("-"), Value("")), Value(" "), Value(""))
-                        )
-                        .filter(_norm=normalized)
-                        .first()
-                    )
-
-                if not publication:
-                    messages.error(request, "No publication found with that ISBN.")
-                    handled = True
-                else:
-                    transit = InTransit.objects.filter(item__publication=publication, status="in_transit").first()
-                    if transit:
-                        transit.mark_received()
-                        messages.success(request, f"Item received at {transit.to_location}")
-                        handled = True
-                    else:
-                        messages.error(request, "No in-transit record found for this ISBN.")
-                        handled = True
-            except Exception:
-                messages.error(request, "Error while looking up in-transit record for ISBN.")
-                handled = True
-
-        # Fallback: if ISBN not provided or not handled, accept barcode for compatibility
-        if not handled:
-            try:
-                item = Item.objects.get(barcode=barcode)
-                transit = InTransit.objects.get(item=item, status="in_transit")
-                transit.mark_received()
-                messages.success(request, f"Item received at {transit.to_location}")
-            except (Item.DoesNotExist, InTransit.DoesNotExist):
-                messages.error(request, "No in-transit record found for this item.")
+        # Barcode accepted for compatibility when no ISBN is given
+        resolved = resolve_identifier(isbn or barcode)
+        not_in_transit = "No in-transit record found for this ISBN." if isbn else "No in-transit record found for this item."
+        if resolved is None:
+            messages.error(request, "No publication found with that ISBN." if isbn else not_in_transit)
+        else:
+            kind, pk = resolved
+            in_transit = InTransit.objects.filter(status="in_transit")
+            if kind == "publication":
+                transit = in_transit.filter(item__publication_id=pk).first()
+            else:
+                transit = in_transit.filter(item_id=pk).first()
+            if transit:
+                _receive_transit(request, transit)
+            else:
+                messages.error(request, not_in_transit)
 
         return redirect("circulation:receive_in_transit")
 
@@ -726,17 +803,39 @@ def receive_in_transit(request):
     return render(request, "circulation/receive_in_transit.html", {"pending_transits": pending_transits})
 
 
+def _receive_transit(request, transit):
+    """Mark a transit received and report where the copy went next"""
+    allocation = transit.mark_received()
+    messages.success(request, f"Item received at {transit.to_location}")
+    _report_allocation(request, allocation)
+
+
 @login_required
 @user_passes_test(is_staff_user)
 def transit_list(request):
     """List all transit records"""
-    transits = (
-        InTransit.objects.all()
-        .select_related("item__publication", "from_location", "to_location")
-        .order_by("-send_date")[:50]
-    )
+    transits = InTransit.objects.select_related("item__publication", "from_location", "to_location")
+
+    export_format = requested_export_format(request)
+    if export_format:
+        rows = (
+            [
+                transit.item.publication.isbn,
+                transit.item.publication.title,
+                transit.item.barcode,
+                transit.from_location.name,
+                transit.to_location.name,
+                transit.send_date,
+                transit.receive_date,
+                transit.get_status_display(),
+            ]
+            for transit in transits.order_by("-send_date", "-id").iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+        )
+        header = ["ISBN", "Title", "Barcode", "From", "To", "Sent", "Received", "Status"]
+        return stream_export(export_format, "transits", header, rows)
 
-    return render(request, "circulation/transit_list.html", {"transits": transits})
+    page = paginate_request(request, transits, ["-send_date", "-id"])
+    return render(request, "circulation/transit_list.html", {"transits": page, "page": page})
 
 
 @login_required
@@ -751,58 +850,109 @@ def reports(request):
 def overdue_report(request):
     """Report of overdue items"""
     today = timezone.now().date()
-    overdue_loans = (
-        Loan.objects.filter(status="active", due_date__lt=today)
-        .select_related("item__publication", "borrower")
-        .order_by("due_date")
+    overdue_loans = Loan.objects.filter(status="active", due_date__lt=today).select_related(
+        "item__publication", "borrower"
     )
 
+    export_format = requested_export_format(request)
+    if export_format:
+        rows = (
+            [
+                loan.item.publication.title,
+                loan.item.barcode,
+                loan.borrower.get_full_name(),
+                loan.borrower.email,
+                loan.due_date,
+                loan.days_overdue(),
+            ]
+            for loan in overdue_loans.order_by("due_date", "id").iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+        )
+        header = ["Title", "Barcode", "Borrower", "Email", "Due Date", "Days Overdue"]
+        return stream_export(export_format, f"overdue-{today}", header, rows)
+
     context = {
-        "overdue_loans": overdue_loans,
+        "overdue_count": overdue_loans.count(),
+        "page": paginate_request(request, overdue_loans, ["due_date", "id"], per_page=100),
         "today": today,
     }
     return render(request, "circulation/overdue_report.html", context)
 
 
+def _one_year_earlier(day):
+    try:
+        return day.replace(year=day.year - 1)
+    except ValueError:  # 29 February
+        return day.replace(year=day.year - 1, day=28)
+
+
 @login_required
 @user_passes_test(is_staff_user)
 def circulation_stats(request):
-    """Circulation statistics report"""
-    today = timezone.now().date()
-    last_30_days = today - timedelta(days=30)
+    """Circulation statistics report, read from the daily rollups"""
+    start, end = parse_date_range(request.GET)
+
+    export_format = requested_export_format(request)
+    if export_format:
+        rows = (
+            [row.date, row.publication_type.name, row.location.name, row.checkouts, row.returns]
+            for row in DailyCirculation.objects.filter(date__gte=start, date__lte=end)
+            .select_related("publication_type", "location")
+            .order_by("date", "publication_type__name", "location__name")
+            .iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+        )
+        header = ["Date", "Publication Type", "Location", "Checkouts", "Returns"]
+        return stream_export(export_format, f"circulation-{start}-to-{end}", header, rows)
 
-    # Loan statistics
-    total_checkouts = Loan.objects.filter(checkout_date__gte=last_30_days).count()
+    total_checkouts, total_returns = circulation_totals(start, end)
 
-    total_returns = Loan.objects.filter(return_date__gte=last_30_days).count()
+    # Same range one year earlier, for year-over-year comparison
+    previous_checkouts, previous_returns = circulation_totals(_one_year_earlier(start), _one_year_earlier(end))
 
     # Most borrowed items
-    popular_items = (
-        Item.objects.filter(loans__checkout_date__gte=last_30_days)
-        .annotate(loan_count=Count("loans"))
-        .select_related("publication")
+    item_counts = list(
+        DailyItemCirculation.objects.filter(date__gte=start, date__lte=end, checkouts__gt=0)
+        .values("item")
+        .annotate(loan_count=Sum("checkouts"))
         .order_by("-loan_count")[:10]
     )
+    items = Item.objects.select_related("publication").in_bulk([row["item"] for row in item_counts])
+    popular_items = []
+    for row in item_counts:
+        item = items[row["item"]]
+        item.loan_count = row["loan_count"]
+        popular_items.append(item)
 
     # Active borrowers
-    active_borrowers = (
-        User.objects.filter(user_type="borrower", loans__checkout_date__gte=last_30_days)
-        .annotate(loan_count=Count("loans"))
+    borrower_counts = list(
+        DailyBorrowerCirculation.objects.filter(
+            date__gte=start, date__lte=end, checkouts__gt=0, borrower__user_type="borrower"
+        )
+        .values("borrower")
+        .annotate(loan_count=Sum("checkouts"))
         .order_by("-loan_count")[:10]
     )
+    borrowers = User.objects.in_bulk([row["borrower"] for row in borrower_counts])
+    active_borrowers = []
+    for row in borrower_counts:
+        borrower = borrowers[row["borrower"]]
+        borrower.loan_count = row["loan_count"]
+        active_borrowers.append(borrower)
 
     # By publication type
     by_type = (
-        Loan.objects.filter(checkout_date__gte=last_30_days)
-        .values("item__publication__publication_type__name")
-        .annotate(count=Count("id"))
+        DailyCirculation.objects.filter(date__gte=start, date__lte=end, checkouts__gt=0)
+        .values("publication_type__name")
+        .annotate(count=Sum("checkouts"))
         .order_by("-count")
     )
 
     context = {
-        "last_30_days": last_30_days,
+        "start": start,
+        "end": end,
         "total_checkouts": total_checkouts,
         "total_returns": total_returns,
+        "previous_checkouts": previous_checkouts,
+        "previous_returns": previous_returns,
         "popular_items": popular_items,
         "active_borrowers": active_borrowers,
         "by_type": by_type,
@@ -810,6 +960,93 @@ def circulation_stats(request):
     return render(request, "circulation/circulation_stats.html", context)
 
 
+@login_required
+@user_passes_test(is_staff_user)
+def report_jobs(request):
+    """Request a background report, and list recent ones"""
+    if request.method == "POST":
+        form = ReportJobForm(request.POST)
+        if form.is_valid():
+            report = form.cleaned_data["report"]
+            params = REPORTS[report].params(request.POST)
+            job, created = request_report(report, form.cleaned_data["export_format"], params, user=request.user)
+            if created:
+                messages.success(request, "Report queued. This page updates when it is ready.")
+            elif job.is_active:
+                messages.info(request, "This report is already being prepared; showing that job.")
+            else:
+                messages.info(request, "A recent copy of this report is ready.")
+            return redirect("circulation:report_job_detail", job_id=job.pk)
+    else:
+        form = ReportJobForm(initial={"report": request.GET.get("report", "circulation")})
+
+    jobs = ReportJob.objects.select_related("requested_by")
+    page = paginate_request(request, jobs, ["-created_date", "-id"], per_page=25)
+    return render(request, "circulation/report_jobs.html", {"form": form, "jobs": page, "page": page})
+
+
+@login_required
+@user_passes_test(is_staff_user)
+@require_POST
+def queue_report(request, report):
+    """Queue a background report with the date range of the report page it is launched from"""
+    if report not in REPORTS:
+        raise Http404("Unknown report")
+    export_format = request.POST.get("format", "csv")
+    if export_format not in dict(ReportJob.FORMAT_CHOICES):
+        export_format = "csv"
+    job, _ = request_report(report, export_format, REPORTS[report].params(request.POST), user=request.user)
+    return redirect("circulation:report_job_detail", job_id=job.pk)
+
+
+def _report_job_state(job):
+    return {
+        "status": job.status,
+        "status_display": job.get_status_display(),
+        "row_count": job.row_count,
+        "error": job.error_message,
+        "download_url": reverse("circulation:report_job_download", args=[job.pk]) if job.is_available else None,
+    }
+
+
+@login_required
+@user_passes_test(is_staff_user)
+def report_job_detail(request, job_id):
+    """Status page for a report job; polls report_job_status until the artifact is ready"""
+    job = get_object_or_404(ReportJob.objects.select_related("requested_by"), pk=job_id)
+    context = {
+        "job": job,
+        "description": REPORTS[job.report].describe(job.params),
+        "state": _report_job_state(job),
+    }
+    return render(request, "circulation/report_job_detail.html", context)
+
+
+@login_required
+@user_passes_test(is_staff_user)
+def report_job_status(request, job_id):
+    """JSON status of a report job, for polling"""
+    job = get_object_or_404(ReportJob, pk=job_id)
+    return JsonResponse(_report_job_state(job))
+
+
+@login_required
+@user_passes_test(is_staff_user)
+def report_job_download(request, job_id):
+    """Download a finished report artifact; HTML reports open in the browser"""
+    job = get_object_or_404(ReportJob, pk=job_id)
+    path = artifact_file(job) if job.is_available else None
+    if path is None or not os.path.isfile(path):
+        raise Http404("This report has expired; request it again.")
+    filename = f"{REPORTS[job.report].filename(job.report, job.params)}.{job.export_format}"
+    return FileResponse(
+        open(path, "rb"),
+        as_attachment=job.export_format != "html",
+        filename=filename,
+        content_type=CONTENT_TYPES[job.export_format],
+    )
+
+
 @login_required
 def notifications_list(request):
     """List all notifications for current user"""
@@ -889,18 +1126,6 @@ def request_checkout(request, publication_id):
     """Borrower requests to checkout a book"""
     publication = get_object_or_404(Publication, pk=publication_id)
 
-    # Check if user already has an active request
-    existing_request = CheckoutRequest.objects.filter(
-        publication=publication, borrower=request.user, status__in=["pending", "approved"]
-    ).first()
-
-    if existing_request:
-        messages.warning(
-            request,
-            f"You already have a {existing_request.get_status_display().lower()} checkout request for this item.",
-        )
-        return redirect("catalog:publication_detail", pk=publication_id)
-
     # Check if item is available
     available_items = publication.items.filter(status="available")
     if not available_items.exists():
@@ -910,7 +1135,15 @@ def request_checkout(request, publication_id):
     if request.method == "POST":
         notes = request.POST.get("notes", "")
 
-        CheckoutRequest.objects.create(publication=publication, borrower=request.user, notes=notes, status="pending")
+        # One active request per borrower is enforced by a unique constraint
+        try:
+            with transaction.atomic():
+                CheckoutRequest.objects.create(
+                    publication=publication, borrower=request.user, notes=notes, status="pending"
+                )
+        except IntegrityError:
+            messages.warning(request, "You already have an active checkout request for this item.")
+            return redirect("catalog:publication_detail", pk=publication_id)
 
         # Create notification
         create_notification(
@@ -941,8 +1174,11 @@ def cancel_checkout_request(request, request_id):
         return redirect("accounts:my_account")
 
     if request.method == "POST":
+        released_item_id = checkout_request.reserved_item_id
         checkout_request.status = "cancelled"
+        checkout_request.reserved_item = None
         checkout_request.save()
+        release_items([released_item_id] if released_item_id else [])
 
         # Create notification
         create_notification(
@@ -965,15 +1201,37 @@ def manage_checkout_requests(request):
     """Staff view to manage checkout requests"""
     status_filter = request.GET.get("status", "pending")
 
-    requests_queryset = CheckoutRequest.objects.select_related("publication", "borrower", "reviewed_by").order_by(
-        "-request_date"
-    )
+    requests_queryset = CheckoutRequest.objects.select_related("publication", "borrower", "reviewed_by")
 
     if status_filter and status_filter != "all":
         requests_queryset = requests_queryset.filter(status=status_filter)
 
+    export_format = requested_export_format(request)
+    if export_format:
+        rows = (
+            [
+                checkout_request.get_status_display(),
+                checkout_request.publication.title,
+                checkout_request.borrower.get_full_name(),
+                checkout_request.borrower.email,
+                checkout_request.request_date,
+                checkout_request.review_date,
+                checkout_request.reviewed_by.get_full_name() if checkout_request.reviewed_by else "",
+                checkout_request.pickup_by_date,
+                checkout_request.notes,
+            ]
+            for checkout_request in requests_queryset.order_by("-request_date", "-id").iterator(
+                chunk_size=ITERATOR_CHUNK_SIZE
+            )
+        )
+        header = ["Status", "Title", "Borrower", "Email", "Requested", "Reviewed", "Reviewed By", "Pickup By", "Notes"]
+        return stream_export(export_format, f"checkout-requests-{status_filter or 'all'}", header, rows)
+
+    page = paginate_request(request, requests_queryset, ["-request_date", "-id"])
+
     context = {
-        "checkout_requests": requests_queryset,
+        "checkout_requests": page,
+        "page": page,
         "status_filter": status_filter,
         "pending_count": CheckoutRequest.objects.filter(status="pending").count(),
         "approved_count": CheckoutRequest.objects.filter(status="approved").count(),
@@ -1085,6 +1343,7 @@ def deny_checkout_request(request, request_id):
 
 @login_required
 @user_passes_test(is_staff_user)
+@retry_on_conflict
 def complete_checkout_request(request, request_id):
     """Staff completes checkout request by checking out the item to borrower"""
     checkout_request = get_object_or_404(CheckoutRequest, pk=request_id)
@@ -1106,8 +1365,8 @@ def complete_checkout_request(request, request_id):
                 "circulation/complete_checkout_request.html",
                 {
                     "checkout_request": checkout_request,
-                    "available_items": Item.objects.filter(
-                        publication=checkout_request.publication, status__in=["available", "on_hold_shelf"]
+                    "available_items": lendable_copies(
+                        checkout_request.publication_id, checkout_request.reserved_item_id
                     ).select_related("location"),
                 },
             )
@@ -1116,10 +1375,10 @@ def complete_checkout_request(request, request_id):
             # Reserve & create loan atomically
             with transaction.atomic():
                 # CURRENT METHOD: Find item by ID (from dropdown selection)
-                item = Item.objects.select_for_update().get(
-                    id=item_identifier,
-                    publication=checkout_request.publication,
-                    status__in=["available", "on_hold_shelf"],
+                item = (
+                    lendable_copies(checkout_request.publication_id, checkout_request.reserved_item_id)
+                    .select_for_update()
+                    .get(id=item_identifier, status__in=["available", "on_hold_shelf"])
                 )
 
                 # Check if borrower can borrow
@@ -1147,6 +1406,7 @@ def complete_checkout_request(request, request_id):
                     due_date=due_date,
                     status="active",
                 )
+                record_checkout(loan)
 
                 # Update item
                 item.status = "on_loan"
@@ -1159,6 +1419,10 @@ def complete_checkout_request(request, request_id):
                 checkout_request.loan = loan
                 checkout_request.save()
 
+                # Lent a different copy: put the one reserved for this request back into circulation
+                if checkout_request.reserved_item_id and checkout_request.reserved_item_id != item.pk:
+                    release_items([checkout_request.reserved_item_id])
+
         except Item.DoesNotExist:
             messages.error(request, "No available item found for this publication.")
             return render(
@@ -1166,8 +1430,8 @@ def complete_checkout_request(request, request_id):
                 "circulation/complete_checkout_request.html",
                 {
                     "checkout_request": checkout_request,
-                    "available_items": Item.objects.filter(
-                        publication=checkout_request.publication, status__in=["available", "on_hold_shelf"]
+                    "available_items": lendable_copies(
+                        checkout_request.publication_id, checkout_request.reserved_item_id
                     ).select_related("location"),
                 },
             )
@@ -1189,8 +1453,8 @@ def complete_checkout_request(request, request_id):
         return redirect("circulation:manage_checkout_requests")
 
     # GET request - show form
-    available_items = Item.objects.filter(
-        publication=checkout_request.publication, status__in=["available", "on_hold_shelf"]
+    available_items = lendable_copies(
+        checkout_request.publication_id, checkout_request.reserved_item_id
     ).select_related("location")
 
     context = {
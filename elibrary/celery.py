@@ -36,4 +36,24 @@ app.conf.beat_schedule = {
         "task": "circulation.tasks.check_expiring_holds",
         "schedule": crontab(hour=11, minute=0),  # Run daily at 11 AM
     },
+    # Expire uncollected holds/checkout requests and reallocate their copies
+    "sweep-expired-reservations": {
+        "task": "circulation.tasks.sweep_expired_reservations",
+        "schedule": 900.0,  # Every 15 minutes (in seconds)
+    },
+    # Refresh SQLite planner statistics and checkpoint the WAL hourly
+    "optimize-sqlite-hourly": {
+        "task": "circulation.tasks.optimize_sqlite_database",
+        "schedule": crontab(minute=30),  # Run hourly at :30
+    },
+    # Delete expired session rows in chunks every hour
+    "purge-expired-sessions-hourly": {
+        "task": "accounts.tasks.purge_expired_sessions",
+        "schedule": crontab(minute=15),  # Run hourly at :15
+    },
+    # Delete expired background report artifacts hourly
+    "purge-expired-report-artifacts": {
+        "task": "circulation.tasks.purge_expired_report_artifacts",
+        "schedule": crontab(minute=45),  # Run hourly at :45
+    },
 }
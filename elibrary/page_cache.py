@@ -0,0 +1,134 @@
+"""
+Full-page cache for anonymous visitors.
+
+``cache_anonymous_page(scopes)`` wraps a view whose output is the same for
+every anonymous user. ``scopes(request, *args, **kwargs)`` names the data the
+page shows, e.g. ``["catalog:publication:12"]``. Each scope has a generation
+in the cache, and the page key includes the generations of all its scopes, so
+``bump_generations(["catalog:publication:12"])`` retires exactly the pages
+showing that publication; their old entries simply expire. Generations are
+fresh ``time_ns()`` values, so a generation lost to eviction is never reused
+and cannot resurrect an old page.
+
+Stampede protection: an entry stays fresh for PAGE_CACHE_TIMEOUT seconds and
+is kept PAGE_CACHE_STALE seconds longer. The first request after it goes
+stale takes a short lock (``cache.add``) and re-renders while concurrent
+requests keep getting the stale copy. On a cold key the lock holder renders
+and the others wait up to LOCK_WAIT seconds for its result before rendering
+themselves.
+
+Signed-in users, non-GET requests, requests carrying flash messages and
+responses that set cookies or use the CSRF token are never cached.
+"""
+
+import functools
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpResponse
+
+# How long the lock holder may take to render before others render too
+LOCK_TIMEOUT = 10
+# How long a request waits for another request rendering the same cold page
+LOCK_WAIT = 2
+POLL_INTERVAL = 0.05
+
+
+def _generation_key(scope):
+    return f"pagegen:{scope}"
+
+
+def generations(scopes):
+    """Current generation of each scope, starting any that are missing"""
+    keys = [_generation_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        for key in missing:
+            cache.add(key, time.time_ns(), None)
+        found.update(cache.get_many(missing))
+    return [found.get(key, 0) for key in keys]
+
+
+def bump_generations(scopes):
+    """Retire every cached page that shows any of ``scopes``"""
+    scopes = set(scopes)
+    if scopes:
+        value = time.time_ns()
+        cache.set_many({_generation_key(scope): value for scope in scopes}, None)
+
+
+def _cacheable_request(request):
+    return (
+        settings.PAGE_CACHE_TIMEOUT > 0
+        and request.method in ("GET", "HEAD")
+        and not request.user.is_authenticated
+        and not len(get_messages(request))
+    )
+
+
+def _cacheable_response(request, response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+    )
+
+
+def _from_entry(entry):
+    _, content, content_type = entry
+    return HttpResponse(content, content_type=content_type)
+
+
+def _wait_for(key):
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def cache_anonymous_page(scopes):
+    """Serve the view from the page cache for anonymous GETs; see the module docstring"""
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not _cacheable_request(request):
+                return view(request, *args, **kwargs)
+
+            page_scopes = scopes(request, *args, **kwargs)
+            version = ":".join(str(generation) for generation in generations(page_scopes))
+            path = hashlib.sha1(request.get_full_path().encode()).hexdigest()
+            key = f"page:{view.__module__}.{view.__name__}:{path}:{version}"
+            lock_key = f"{key}:lock"
+
+            entry = cache.get(key)
+            if entry is not None:
+                # Fresh, or stale while another request is already re-rendering it
+                if time.time() < entry[0] or not cache.add(lock_key, True, LOCK_TIMEOUT):
+                    return _from_entry(entry)
+            elif not cache.add(lock_key, True, LOCK_TIMEOUT):
+                entry = _wait_for(key)
+                if entry is not None:
+                    return _from_entry(entry)
+                return view(request, *args, **kwargs)
+
+            try:
+                response = view(request, *args, **kwargs)
+                if _cacheable_response(request, response):
+                    entry = (time.time() + settings.PAGE_CACHE_TIMEOUT, response.content, response["Content-Type"])
+                    cache.set(key, entry, settings.PAGE_CACHE_TIMEOUT + settings.PAGE_CACHE_STALE)
+            finally:
+                cache.delete(lock_key)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,203 @@
+"""
+Keyset (seek) pagination.
+
+Instead of ``OFFSET n`` the next page is fetched with a WHERE clause on the
+ordering columns of the last row shown, e.g. for ``["-due_date", "-id"]``::
+
+    WHERE due_date < :d OR (due_date = :d AND id < :id) ORDER BY due_date DESC, id DESC LIMIT 51
+
+so page 500 costs the same as page 1 and rows inserted meanwhile do not shift
+pages. The ordering must end with a unique column (normally ``id``) and use
+non-null columns. Cursors are opaque URL-safe strings; a malformed cursor falls
+back to the first page.
+
+Result totals come from ``listing_count``. With LISTING_COUNT = "estimated"
+(the default) it counts at most COUNT_ESTIMATE_THRESHOLD rows exactly and
+beyond that uses the PostgreSQL planner's row estimate, or shows "1000+" on
+other databases, instead of a full ``COUNT(*)`` (with DISTINCT) per page view.
+"""
+
+import base64
+import binascii
+import datetime
+import json
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, connections
+from django.db.models import Q
+
+CURSOR_PARAM = "cursor"
+COUNT_ESTIMATE_THRESHOLD = 1000
+
+
+class _CursorEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        # Full microsecond precision; DjangoJSONEncoder rounds to milliseconds, which would break the seek
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(direction, values):
+    payload = json.dumps([direction, values], cls=_CursorEncoder, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Return (direction, values), or None for a missing or malformed cursor"""
+    if not cursor:
+        return None
+    try:
+        direction, values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError, TypeError):
+        return None
+    if direction not in ("next", "prev") or not isinstance(values, list):
+        return None
+    return direction, values
+
+
+def _row_values(obj, fields):
+    values = []
+    for field in fields:
+        value = obj
+        for part in field.split("__"):
+            value = value[part] if isinstance(value, dict) else getattr(value, part)
+        values.append(value)
+    return values
+
+
+def _seek_filter(ordering, values, forward):
+    """(a > x) OR (a = x AND b > y) OR ... honouring each column's direction"""
+    clauses = []
+    for position, key in enumerate(ordering):
+        field = key.lstrip("-")
+        descending = key.startswith("-")
+        lookup = "lt" if descending == forward else "gt"
+        equal = {ordering[i].lstrip("-"): values[i] for i in range(position)}
+        clauses.append(Q(**equal, **{f"{field}__{lookup}": values[position]}))
+    return reduce(or_, clauses)
+
+
+def _reverse(key):
+    return key[1:] if key.startswith("-") else f"-{key}"
+
+
+class KeysetPage:
+    """One page of a keyset-paginated queryset"""
+
+    def __init__(self, object_list, ordering, has_next, has_previous):
+        self.object_list = object_list
+        self.ordering = ordering
+        self.has_next = has_next
+        self.has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def _cursor(self, direction, obj):
+        return encode_cursor(direction, _row_values(obj, [key.lstrip("-") for key in self.ordering]))
+
+    @property
+    def next_cursor(self):
+        return self._cursor("next", self.object_list[-1]) if self.has_next and self.object_list else None
+
+    @property
+    def previous_cursor(self):
+        return self._cursor("prev", self.object_list[0]) if self.has_previous and self.object_list else None
+
+
+def keyset_paginate(queryset, ordering, cursor=None, per_page=50):
+    """
+    Fetch the page of ``queryset`` after/before ``cursor`` ordered by ``ordering``.
+    One query of per_page + 1 rows; the extra row only tells whether another page exists.
+    """
+    ordering = list(ordering)
+    decoded = decode_cursor(cursor)
+    if decoded and len(decoded[1]) != len(ordering):
+        decoded = None
+
+    if decoded is None:
+        rows = list(queryset.order_by(*ordering)[: per_page + 1])
+        return KeysetPage(rows[:per_page], ordering, has_next=len(rows) > per_page, has_previous=False)
+
+    direction, values = decoded
+    if direction == "next":
+        rows = list(queryset.filter(_seek_filter(ordering, values, True)).order_by(*ordering)[: per_page + 1])
+        return KeysetPage(rows[:per_page], ordering, has_next=len(rows) > per_page, has_previous=True)
+
+    rows = list(
+        queryset.filter(_seek_filter(ordering, values, False)).order_by(*map(_reverse, ordering))[: per_page + 1]
+    )
+    has_previous = len(rows) > per_page
+    return KeysetPage(rows[:per_page][::-1], ordering, has_next=True, has_previous=has_previous)
+
+
+def paginate_request(request, queryset, ordering, per_page=50):
+    """keyset_paginate using the ?cursor= parameter of the request"""
+    return keyset_paginate(queryset, ordering, request.GET.get(CURSOR_PARAM), per_page)
+
+
+class ResultCount:
+    """A result total that may be approximate ("about 12,400") or a lower bound ("1,000+")"""
+
+    def __init__(self, value, approximate=False, lower_bound=False):
+        self.value = value
+        self.approximate = approximate
+        self.lower_bound = lower_bound
+
+    def __int__(self):
+        return self.value
+
+    def __bool__(self):
+        return self.value > 0
+
+    def __str__(self):
+        if self.lower_bound:
+            return f"{self.value:,}+"
+        if self.approximate:
+            return f"about {self.value:,}"
+        return f"{self.value:,}"
+
+
+def _planner_estimate(queryset):
+    """Row estimate from PostgreSQL's EXPLAIN, or None"""
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+    except DatabaseError:
+        return None
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def estimated_count(queryset, threshold=COUNT_ESTIMATE_THRESHOLD):
+    """Exact up to ``threshold`` rows, estimated above it; never scans more than threshold + 1 rows"""
+    exact = queryset.order_by()[: threshold + 1].count()
+    if exact <= threshold:
+        return ResultCount(exact)
+    estimate = _planner_estimate(queryset)
+    if estimate is not None and estimate > threshold:
+        return ResultCount(estimate, approximate=True)
+    return ResultCount(threshold, lower_bound=True)
+
+
+def listing_count(queryset):
+    """Result total for a listing, exact or estimated per settings.LISTING_COUNT"""
+    if getattr(settings, "LISTING_COUNT", "estimated") == "exact":
+        return ResultCount(queryset.count())
+    return estimated_count(queryset)
@@ -0,0 +1,139 @@
+"""
+Fingerprinted, precompressed static files.
+
+``collectstatic`` with ``PrecompressedManifestStaticFilesStorage`` writes
+content-hashed copies (``custom.3f2a9c1b7d4e.css``) plus a manifest, and next to
+every compressible file a ``.gz`` and, when the ``brotli`` package is
+installed, a ``.br`` variant. Compression happens once at deploy time instead
+of per request.
+
+``serve_static`` serves STATIC_ROOT from the app itself for deployments with no
+reverse proxy. It picks the smallest variant the browser accepts, and returns
+a ``FileResponse`` so WSGI servers with ``wsgi.file_wrapper`` (gunicorn, uWSGI)
+send it with sendfile. Hashed names never change content, so they are cached
+for a year as ``immutable`` and repeat page views make no static requests.
+"""
+
+import gzip
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".mjs", ".svg", ".json", ".map", ".txt", ".xml", ".html", ".ico"}
+# Files smaller than this fit in a packet either way
+MIN_COMPRESS_SIZE = 512
+
+# (Accept-Encoding token, file suffix), preferred first
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+# Unhashed names (files referenced without {% static %}) may change on deploy
+MUTABLE_MAX_AGE = 60 * 5
+
+_HASHED_NAME = re.compile(r"\.[0-9a-f]{12}\.")
+
+
+class PrecompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Manifest storage that also writes .gz/.br variants of text assets"""
+
+    # A template referencing a file that was never collected (or a deploy that skipped
+    # collectstatic) must not turn every page into a 500
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Not in the manifest and not on disk to hash: use the plain name, which
+            # serve_static caches as mutable
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+
+        for name in list(self.hashed_files.values()) + list(paths):
+            if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS or not self.exists(name):
+                continue
+            with self.open(name) as f:
+                content = f.read()
+            if len(content) < MIN_COMPRESS_SIZE:
+                continue
+            for suffix, compressed in self.compress(content):
+                # Keep only variants that actually save bytes
+                if len(compressed) < len(content):
+                    if self.exists(name + suffix):
+                        self.delete(name + suffix)
+                    self._save(name + suffix, ContentFile(compressed))
+
+    def compress(self, content):
+        # mtime=0 keeps .gz output identical across deploys
+        yield ".gz", gzip.compress(content, compresslevel=9, mtime=0)
+        if brotli is not None:
+            yield ".br", brotli.compress(content, quality=11)
+
+
+def _accepted_encodings(request):
+    header = request.headers.get("Accept-Encoding", "")
+    accepted = set()
+    for part in header.split(","):
+        token, _, params = part.partition(";")
+        quality = params.strip().removeprefix("q=")
+        try:
+            if params and float(quality) == 0:
+                continue
+        except ValueError:
+            pass
+        accepted.add(token.strip().lower())
+    return accepted
+
+
+def serve_static(request, path):
+    """Serve a collected static file, preferring a precompressed variant"""
+    try:
+        fullpath = safe_join(str(settings.STATIC_ROOT), path)
+    except ValueError:
+        raise Http404("Invalid path")
+    if not os.path.isfile(fullpath):
+        raise Http404(f"{path} not found")
+
+    content_type, _ = mimetypes.guess_type(fullpath)
+    content_type = content_type or "application/octet-stream"
+
+    served_path, encoding = fullpath, None
+    if os.path.splitext(fullpath)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+        accepted = _accepted_encodings(request)
+        for token, suffix in ENCODINGS:
+            if token in accepted and os.path.isfile(fullpath + suffix):
+                served_path, encoding = fullpath + suffix, token
+                break
+
+    stat = os.stat(served_path)
+    if not was_modified_since(request.headers.get("If-Modified-Since"), stat.st_mtime):
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(open(served_path, "rb"), content_type=content_type)
+        if encoding:
+            response["Content-Encoding"] = encoding
+
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    response["Vary"] = "Accept-Encoding"
+    if _HASHED_NAME.search(os.path.basename(path)):
+        response["Cache-Control"] = f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+    else:
+        response["Cache-Control"] = f"public, max-age={MUTABLE_MAX_AGE}"
+    return response